@@ -1,6 +1,9 @@
-from . import hdf5_adapter
-from . import ros_adapter
-from . import lerobot_adapter
-from . import unitree_adapter
-from . import folder_adapter
-from . import dasmcap_adapter
\ No newline at end of file
+# 只登记模块路径，真正 import (及其 h5py/pandas/av/mcap 等依赖) 推迟到 AdapterRegistry.get_class
+from src.core.registry import AdapterRegistry
+
+AdapterRegistry.register_lazy("HDF5", "src.adapters.hdf5_adapter")
+AdapterRegistry.register_lazy("ROS", "src.adapters.ros_adapter")
+AdapterRegistry.register_lazy("LeRobot", "src.adapters.lerobot_adapter")
+AdapterRegistry.register_lazy("Unitree", "src.adapters.unitree_adapter")
+AdapterRegistry.register_lazy("RawFolder", "src.adapters.folder_adapter")
+AdapterRegistry.register_lazy("DASMCAP", "src.adapters.dasmcap_adapter")
\ No newline at end of file
@@ -1,48 +1,214 @@
 # src/adapters/ego_adapter.py
 import os
 import json
+import threading
 import av
 import cv2
 import numpy as np
 import scipy.interpolate as si
 import scipy.spatial.transform as st
+from collections import OrderedDict
 from pathlib import Path
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Sequence, Tuple
 from mcap.reader import make_reader
 from mcap_protobuf.decoder import DecoderFactory
 from concurrent.futures import ThreadPoolExecutor
 
-from src.core.interface import BaseDatasetReader, FrameData, AdapterConfig
+from src.core.interface import BaseDatasetReader, FrameData, FrameBatch, AdapterConfig, EpisodeSnapshot
+from src.core.mcap_index import McapChunkIndex
 from src.core.registry import AdapterRegistry
+from src.core.episode_pool import EpisodeHandlePool
+
+def is_h264_keyframe(compressed_data: bytes) -> bool:
+    """以 SPS (NAL type 7) 开头的访问单元视为可独立解码的关键帧"""
+    if not compressed_data: return False
+    start_offset = 4 if compressed_data.startswith(b"\x00\x00\x00\x01") else 3 if compressed_data.startswith(b"\x00\x00\x01") else 0
+    if start_offset >= len(compressed_data): return False
+    return (compressed_data[start_offset] & 0x1F) == 7
+
+def _read_ue(data: bytes, count: int) -> List[int]:
+    """从字节串开头依次读取 count 个无符号指数哥伦布码 ue(v)，数据不足时提前结束"""
+    value, nbits, pos, out = int.from_bytes(data, "big"), len(data) * 8, 0, []
+    for _ in range(count):
+        zeros = 0
+        while pos < nbits and not (value >> (nbits - 1 - pos)) & 1:
+            zeros += 1
+            pos += 1
+        pos += 1
+        if pos + zeros > nbits: break
+        bits = (value >> (nbits - pos - zeros)) & ((1 << zeros) - 1)
+        pos += zeros
+        out.append((1 << zeros) - 1 + bits)
+    return out
+
+def is_h264_bframe(compressed_data: bytes) -> bool:
+    """访问单元中含 B slice (slice_type 为 1 或 6) 时返回 True，只解析 slice header 开头的两个 ue(v)"""
+    if not compressed_data: return False
+    starts, pos = [], compressed_data.find(b"\x00\x00\x01")
+    while pos >= 0:
+        starts.append(pos + 3)
+        pos = compressed_data.find(b"\x00\x00\x01", pos + 3)
+    for start in starts or [0]:
+        if start >= len(compressed_data) or (compressed_data[start] & 0x1F) not in (1, 5): continue
+        # 去掉防竞争字节 0x03 后读取 first_mb_in_slice 与 slice_type
+        header = compressed_data[start + 1:start + 13].replace(b"\x00\x00\x03", b"\x00\x00")
+        fields = _read_ue(header, 2)
+        if len(fields) == 2 and fields[1] % 5 == 1: return True
+    return False
 
 class VideoDecoder:
-    """参考 das-datakit 的 H264 连续解码器 (开启了内部多线程)"""
-    def __init__(self):
+    """参考 das-datakit 的 H264 连续解码器 (开启了内部多线程)，scale > 1 时转换 RGB 的同时缩小输出"""
+    def __init__(self, scale: int = 1):
         av.logging.set_level(av.logging.ERROR)
         self.decoder_codec = av.CodecContext.create('h264', 'r')
         self.decoder_codec.thread_count = 4  # 允许FFmpeg底层多核解码
         self.has_find_first_kf = False
+        self.scale = scale
+
+    def _to_rgb(self, frame) -> np.ndarray:
+        if self.scale > 1:
+            return frame.to_ndarray(format="rgb24", width=-(-frame.width // self.scale), height=-(-frame.height // self.scale))
+        return frame.to_ndarray(format="rgb24")
 
     def decode(self, compressed_data: bytes) -> np.ndarray:
-        if not compressed_data: return None
-        start_offset = 4 if compressed_data.startswith(b"\x00\x00\x00\x01") else 3 if compressed_data.startswith(b"\x00\x00\x01") else 0
-        nal_unit_type = compressed_data[start_offset] & 0x1F
+        frames = self.decode_frames(compressed_data)
+        return frames[0][1] if frames else None
         
-        if nal_unit_type != 7 and not self.has_find_first_kf:
-            return None  
+    def decode_frames(self, compressed_data: bytes, pts: Optional[int] = None) -> List[Tuple[Optional[int], np.ndarray]]:
+        """
+        送入一个包，返回解码器此时吐出的全部帧 [(pts, RGB), ...] (多线程解码存在输出延迟)。
+        pts 随包传入并由解码器原样带到输出帧上，调用方据此把输出帧对应回包的位置。
+        """
+        if not compressed_data: return []
+        if not self.has_find_first_kf and not is_h264_keyframe(compressed_data):
+            return []
             
         self.has_find_first_kf = True
         try:
             packet = av.packet.Packet(compressed_data)
-            for frame in self.decoder_codec.decode(packet):
-                # 直接转为 RGB24 格式的 numpy 数组，跳过后续所有色彩空间转换
-                return frame.to_ndarray(format="rgb24")
+            if pts is not None: packet.pts = pts
+            # 直接转为 RGB24 格式的 numpy 数组，跳过后续所有色彩空间转换
+            return [(frame.pts, self._to_rgb(frame)) for frame in self.decoder_codec.decode(packet)]
         except Exception:
-            return None
-        return None
+            return []
+
+    def flush(self) -> List[Tuple[Optional[int], np.ndarray]]:
+        """码流结束时取出解码器内部缓存的剩余帧"""
+        try:
+            return [(frame.pts, self._to_rgb(frame)) for frame in self.decoder_codec.decode(None)]
+        except Exception:
+            return []
+
+class LazyVideoStream:
+    """
+    按需解码的单路视频流。
+    load 阶段只保存每个包的位置引用与关键帧 (GOP) 下标；get 时：
+    - 目标帧在当前解码位置之后且没有跨过新的关键帧 -> 继续向前解码
+    - 否则 -> 从最近的前置关键帧重建解码器
+    已解码的帧保存在一个有界窗口中，顺序播放和小范围回退无需重复解码。
+
+    packets 必须是码流 (解码) 顺序。不含 B 帧时解码顺序即显示顺序，输出帧按所属包的下标归位；
+    含 B 帧 (reorder=True) 时解码器按显示顺序输出，输出帧按其在所属 GOP 内的输出序号归位，
+    即第 k 个显示的画面对应时间轴上的第 k 个时间戳。GOP 内有包解码失败时只影响该 GOP 的末尾几帧。
+    """
+    def __init__(self, packets: List[Any], keyframes: List[int], fetch, window_size: int = 64, reorder: bool = False):
+        self.packets = packets
+        self.keyframes = np.asarray(keyframes, dtype=np.int64)
+        self.fetch = fetch                  # 包引用 -> H264 字节
+        self.window_size = max(1, int(window_size))
+        self.window: "OrderedDict[int, np.ndarray]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.decoder: Optional[VideoDecoder] = None
+        self.next_packet = 0                # 下一个要送入解码器的包
+        self.next_frame = 0                 # 解码器下一个吐出的帧对应的下标
+        self.scale = 1                      # 窗口中已解码帧的预览缩放倍数
+        self.reorder = reorder              # 码流含 B 帧，解码顺序与显示顺序不同
+
+    def __len__(self) -> int:
+        return len(self.packets)
+
+    @property
+    def nbytes(self) -> int:
+        """解码窗口 + 内存中保存的压缩包 (未建索引的文件) 占用的字节数"""
+        packet_bytes = sum(len(p) for p in self.packets if isinstance(p, (bytes, bytearray)))
+        return packet_bytes + sum(img.nbytes for img in self.window.values())
+
+    def _restart(self, keyframe_pos: int):
+        self.decoder = VideoDecoder(self.scale)
+        self.next_packet = keyframe_pos
+        self.next_frame = keyframe_pos
+
+    def _push(self, frames: List[Tuple[Optional[int], np.ndarray]]):
+        """
+        按 pts (= 包下标) 放入窗口。某些包解码失败时没有对应输出，
+        跳过的下标放入 None 占位，后续帧仍对应到正确的下标。
+        含 B 帧时 pts 只用于确定所属 GOP，GOP 内按输出顺序依次占用下标。
+        """
+        for pts, img in frames:
+            if pts is None:
+                index = self.next_frame
+            elif self.reorder:
+                gop_start = int(self.keyframes[max(0, np.searchsorted(self.keyframes, pts, side='right') - 1)])
+                index = max(self.next_frame, gop_start)
+            else:
+                index = int(pts)
+            if index < self.next_frame: continue
+            self._skip_to(index)
+            self.window[index] = img
+            self.window.move_to_end(index)
+            self.next_frame = index + 1
+        while len(self.window) > self.window_size:
+            self.window.popitem(last=False)
+
+    def _skip_to(self, index: int):
+        """[next_frame, index) 之间没有解码输出的下标放入 None 占位"""
+        for missing in range(self.next_frame, index):
+            self.window[missing] = None
+            self.window.move_to_end(missing)
+        self.next_frame = max(self.next_frame, index)
+
+    def get(self, index: int, scale: int = 1) -> Optional[np.ndarray]:
+        if index < 0 or index >= len(self.packets): return None
+        with self.lock:
+            # 缩放倍数变化后窗口中的帧尺寸不再适用
+            if scale != self.scale:
+                self.window.clear()
+                self.decoder = None
+                self.scale = scale
+            if index in self.window:
+                self.window.move_to_end(index)
+                return self.window[index]
+
+            k_pos = int(self.keyframes[max(0, np.searchsorted(self.keyframes, index, side='right') - 1)])
+            # 目标在已解码位置之前，或中间隔着新的关键帧 -> 直接跳到最近关键帧
+            if self.decoder is None or index < self.next_frame or k_pos > self.next_packet:
+                self._restart(k_pos)
+
+            while self.next_frame <= index:
+                if self.next_packet < len(self.packets):
+                    pos = self.next_packet
+                    frames = self.decoder.decode_frames(self.fetch(self.packets[pos]), pts=pos)
+                    self.next_packet += 1
+                    self._push(frames)
+                else:
+                    self._push(self.decoder.flush())
+                    self.decoder = None
+                    # 末尾几个包解码失败时同样占位，避免反复重建解码器
+                    self._skip_to(len(self.packets))
+                    while len(self.window) > self.window_size:
+                        self.window.popitem(last=False)
+                    break
+            return self.window.get(index)
+
+    def close(self):
+        self.window.clear()
+        self.decoder = None
 
 @AdapterRegistry.register("DASMCAP")
 class DASMCAPAdapter(BaseDatasetReader):
+    _episode_state_attrs = ("image_keys", "timestamps", "video_streams", "chunk_index", "_packet_decoders",
+                            "camera_info_cache", "raw_state_data", "interpolators", "qpos_matrix", "qpos_names")
+
     def __init__(self, config: Optional[AdapterConfig] = None):
         super().__init__(config)
         self.root_path = None
@@ -57,16 +223,25 @@ class DASMCAPAdapter(BaseDatasetReader):
         # 额外的开关配置
         extra_opts = getattr(self.config, 'extra_options', {}) or {}
         self.enable_undistort = extra_opts.get("enable_undistort", False)
+        # 每路相机保留的已解码帧窗口大小，以及 MCAP Chunk 的 LRU 缓存数量
+        self.decode_window = int(extra_opts.get("decode_window", 64))
+        self.chunk_cache_size = int(extra_opts.get("chunk_cache_size", 8))
+        self.episode_pool = EpisodeHandlePool.from_options(extra_opts)
                 
         # 2. 数据缓存初始化
         self.image_keys = []           
         self.timestamps = []           
-        self.images_cache = {}         
+        self.video_streams: Dict[str, LazyVideoStream] = {}
+        self.chunk_index: Optional[McapChunkIndex] = None
+        self._packet_decoders = {}
         self.camera_info_cache = {}    
         self.raw_state_data: Dict[str, List] = {} 
         self.interpolators = {}
+        # [优化项]: 整条轨迹的状态矩阵 (T, D) 及每一列的名称
+        self.qpos_matrix = np.zeros((0, 0), dtype=np.float32)
+        self.qpos_names: List[str] = []
         
-        # [优化项]: 初始化线程池用于并行解码视频
+        # [优化项]: 初始化线程池用于多路相机并行解码
         self.executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 8)
 
     def load(self, file_path: str) -> bool:
@@ -84,8 +259,13 @@ class DASMCAPAdapter(BaseDatasetReader):
 
     def set_episode(self, episode_idx: int):
         if episode_idx < 0 or episode_idx >= len(self.episode_files): return
-        self.close()  
+        pooled = self._checkout_episode(self.episode_files[episode_idx])
+        self._close_episode()
         self.current_episode_idx = episode_idx
+        if pooled is not None:
+            self._apply_episode_state(pooled)
+            print(f"♻️ [DASMCAPAdapter] 复用已解析的 Episode: {len(self.timestamps)} 帧")
+            return
         target_file = self.episode_files[episode_idx]
         print(f"🔄 [DASMCAPAdapter] 解析数据流: {target_file.name}")
         
@@ -99,65 +279,93 @@ class DASMCAPAdapter(BaseDatasetReader):
         base_topics = list(self.base_map.keys())
         target_topics = set(list(self.camera_map.keys()) + all_arm_topics + base_topics)
 
-        # [优化项]: 临时缓存每路相机的二进制压缩数据
-        raw_video_packets: Dict[str, List[tuple]] = {}
+        # [优化项]: 每路相机只登记包的位置引用 (publish_time, ref, is_keyframe)，不做解码
+        video_packets: Dict[str, List[tuple]] = {}
+        # 码流中出现 B 帧的相机，解码顺序与显示顺序不同
+        reorder_cams = set()
         
-        with open(target_file, "rb") as f:
-            reader = make_reader(f, decoder_factories=[DecoderFactory()])
-            for schema, channel, message, proto_msg in reader.iter_decoded_messages():
-                topic = channel.topic
-                if topic not in target_topics: continue
-
-                # 1. 解析相机视频流 ([仅提取数据，不解码])
-                if topic in self.camera_map:
-                    std_cam_name = self.camera_map[topic]
-                    if std_cam_name not in raw_video_packets:
-                        raw_video_packets[std_cam_name] = []
-                        if std_cam_name not in self.image_keys:
-                            self.image_keys.append(std_cam_name)
-                    # 存入原始 H264 字节流
-                    raw_video_packets[std_cam_name].append((message.publish_time, proto_msg.data))
-
-                # 2. 解析末端位姿 (EEF Pose) -> 完全保留你的原逻辑
-                elif any(topic == g.get('pose_topic') for g in self.arm_groups.values()):
-                    if topic not in self.raw_state_data: self.raw_state_data[topic] = []
-                    pose = np.array([
-                        proto_msg.pose.position.x, proto_msg.pose.position.y, proto_msg.pose.position.z,
-                        proto_msg.pose.orientation.x, proto_msg.pose.orientation.y, proto_msg.pose.orientation.z, proto_msg.pose.orientation.w
-                    ])
-                    self.raw_state_data[topic].append((message.publish_time, pose))
-
-                # 3. 解析夹爪或通用状态 (Gripper / Base / Joints) -> 完全保留你的原逻辑
-                else:
-                    if topic not in self.raw_state_data: self.raw_state_data[topic] = []
-                    val = getattr(proto_msg, 'value', getattr(proto_msg, 'data', 0.0))
-                    # 自动处理 list 或单值
-                    val = np.array(val) if isinstance(val, (list, np.ndarray)) else float(val)
-                    self.raw_state_data[topic].append((message.publish_time, val))
-
-        # [优化项]: 文件读取完毕，开始按相机并行解码视频流
-        def decode_stream(cam_name, packets):
-            decoder = VideoDecoder()
-            imgs = []
-            tms = []
-            for pub_time, data in packets:
-                img = decoder.decode(data)
-                if img is not None:
-                    imgs.append(img)
-                    tms.append(pub_time)
-            return cam_name, imgs, tms
-
-        futures = [self.executor.submit(decode_stream, name, pkts) for name, pkts in raw_video_packets.items()]
-        for future in futures:
-            name, imgs, tms = future.result()
-            self.images_cache[name] = imgs
+        index = McapChunkIndex(target_file, cache_size=self.chunk_cache_size)
+        if index.open():
+            self.chunk_index = index
+            messages = self._iter_indexed_messages(index, target_topics)
+        else:
+            # 未建立 Chunk 索引的文件只能顺序读取，退化为在内存中保存压缩包 (仍然按需解码)
+            messages = self._iter_stream_messages(target_file, target_topics)
+
+        for topic, publish_time, proto_msg, ref in messages:
+            # 1. 解析相机视频流 ([仅登记包位置与关键帧，不解码])
+            if topic in self.camera_map:
+                std_cam_name = self.camera_map[topic]
+                if std_cam_name not in video_packets:
+                    video_packets[std_cam_name] = []
+                    if std_cam_name not in self.image_keys:
+                        self.image_keys.append(std_cam_name)
+                packet_ref = ref if ref is not None else proto_msg.data
+                video_packets[std_cam_name].append((publish_time, packet_ref, is_h264_keyframe(proto_msg.data)))
+                if std_cam_name not in reorder_cams and is_h264_bframe(proto_msg.data):
+                    reorder_cams.add(std_cam_name)
+
+            # 2. 解析末端位姿 (EEF Pose) -> 完全保留你的原逻辑
+            elif any(topic == g.get('pose_topic') for g in self.arm_groups.values()):
+                if topic not in self.raw_state_data: self.raw_state_data[topic] = []
+                pose = np.array([
+                    proto_msg.pose.position.x, proto_msg.pose.position.y, proto_msg.pose.position.z,
+                    proto_msg.pose.orientation.x, proto_msg.pose.orientation.y, proto_msg.pose.orientation.z, proto_msg.pose.orientation.w
+                ])
+                self.raw_state_data[topic].append((publish_time, pose))
+
+            # 3. 解析夹爪或通用状态 (Gripper / Base / Joints) -> 完全保留你的原逻辑
+            else:
+                if topic not in self.raw_state_data: self.raw_state_data[topic] = []
+                val = getattr(proto_msg, 'value', getattr(proto_msg, 'data', 0.0))
+                # 自动处理 list 或单值
+                val = np.array(val) if isinstance(val, (list, np.ndarray)) else float(val)
+                self.raw_state_data[topic].append((publish_time, val))
+
+        # 建立每路相机的 GOP 索引。时间轴从第一个关键帧开始，与原先“找到首个关键帧才出图”一致
+        for name, packets in video_packets.items():
+            reorder = name in reorder_cams
+            # 含 B 帧的码流必须保持文件中的解码顺序送入解码器，时间戳单独排序后按显示顺序对应
+            if not reorder:
+                packets.sort(key=lambda p: p[0])
+            first_kf = next((i for i, p in enumerate(packets) if p[2]), None)
+            if first_kf is None: continue
+            packets = packets[first_kf:]
+            keyframes = [i for i, p in enumerate(packets) if p[2]]
+            self.video_streams[name] = LazyVideoStream([p[1] for p in packets], keyframes, self._fetch_packet,
+                                                       self.decode_window, reorder=reorder)
             # 仅在第一台相机上建立主时间轴
             if self.image_keys and name == self.image_keys[0]:
-                self.timestamps = tms
+                self.timestamps = sorted(p[0] for p in packets)
 
         self._build_interpolators()
         print(f"✅ [DASMCAPAdapter] Episode 加载完毕，长度: {len(self.timestamps)} 帧")
 
+    def _iter_indexed_messages(self, index: McapChunkIndex, target_topics):
+        """基于 Chunk 索引顺序遍历，相机包额外返回 (channel_id, chunk_idx, offset) 引用"""
+        factory = DecoderFactory()
+        for topic, chunk_idx, offset, message in index.iter_messages(target_topics):
+            cid = message.channel_id
+            if cid not in self._packet_decoders:
+                channel = index.channels[cid]
+                self._packet_decoders[cid] = factory.decoder_for(channel.message_encoding, index.schemas.get(channel.schema_id))
+            decoder = self._packet_decoders[cid]
+            if decoder is None: continue
+            yield topic, message.publish_time, decoder(message.data), (cid, chunk_idx, offset)
+
+    def _iter_stream_messages(self, target_file: Path, target_topics):
+        with open(target_file, "rb") as f:
+            reader = make_reader(f, decoder_factories=[DecoderFactory()])
+            for schema, channel, message, proto_msg in reader.iter_decoded_messages(topics=list(target_topics)):
+                yield channel.topic, message.publish_time, proto_msg, None
+
+    def _fetch_packet(self, ref) -> bytes:
+        """包引用 -> H264 字节。引用是内存中的 bytes，或 (channel_id, chunk_idx, offset)"""
+        if isinstance(ref, (bytes, bytearray)): return ref
+        cid, chunk_idx, offset = ref
+        message = self.chunk_index.read_message(chunk_idx, offset)
+        return self._packet_decoders[cid](message.data).data
+
     def _build_interpolators(self):
         self.interpolators.clear()
         for topic, cache in self.raw_state_data.items():
@@ -176,6 +384,57 @@ class DASMCAPAdapter(BaseDatasetReader):
                 # 普通线性插值
                 self.interpolators[topic] = si.interp1d(times, data, axis=0, bounds_error=False, fill_value="extrapolate")
 
+        self._build_state_matrix()
+
+    def _build_state_matrix(self):
+        """一次性在整条时间轴上求值所有插值器，组装为连续的 (T, D) float32 QPos 矩阵 (Bucket 模式)"""
+        ts = np.asarray(self.timestamps, dtype=np.float64)
+        T = len(ts)
+        columns, names = [], []
+        if T > 0:
+            # --- 遍历所有手臂组 (Arms & Grippers) ---
+            for arm_name in sorted(self.arm_groups.keys()):
+                group = self.arm_groups[arm_name] or {}
+
+                # EEF Pose (7维)
+                pt = group.get('pose_topic')
+                if pt and f"{pt}_pos" in self.interpolators:
+                    t_min, t_max = self.interpolators[f"{pt}_rot_bounds"]
+                    columns.append(self.interpolators[f"{pt}_pos"](ts).reshape(T, -1))
+                    columns.append(self.interpolators[f"{pt}_rot"](np.clip(ts, t_min, t_max)).as_quat())
+                    names.extend(f"{arm_name}/{k}" for k in ["x", "y", "z", "qx", "qy", "qz", "qw"])
+
+                # Joints (多维)
+                jt = group.get('joint_topic')
+                if jt and jt in self.interpolators:
+                    joints = self.interpolators[jt](ts).reshape(T, -1)
+                    columns.append(joints)
+                    names.extend(f"{arm_name}/joint_{j}" for j in range(joints.shape[1]))
+
+                # Gripper (1维)
+                gt = group.get('gripper_topic')
+                if gt and gt in self.interpolators:
+                    columns.append(self.interpolators[gt](ts).reshape(T, -1) * 10) # 夹爪变为0-1之间而非0-0.1
+                    names.append(f"{arm_name}/gripper")
+
+            # --- 遍历底座 (Base) ---
+            for topic in self.base_map.keys():
+                if topic in self.interpolators:
+                    base_data = self.interpolators[topic](ts).reshape(T, -1)
+                    columns.append(base_data)
+                    base_name = self.base_map[topic] if isinstance(self.base_map[topic], str) else topic.strip('/')
+                    names.extend(f"base/{base_name}_{j}" for j in range(base_data.shape[1]))
+
+        self.qpos_matrix = np.ascontiguousarray(np.hstack(columns), dtype=np.float32) if columns else np.zeros((T, 0), dtype=np.float32)
+        self.qpos_names = names
+
+    def get_episode_states(self) -> Dict[str, np.ndarray]:
+        """返回整条轨迹的状态矩阵，{'qpos': (T, D) float32}"""
+        return {'qpos': self.qpos_matrix}
+
+    def get_state_schema(self) -> Dict[str, List[str]]:
+        return {'qpos': list(self.qpos_names)}
+
     def get_frame(self, index: int, specific_cameras: Optional[List[str]] = None) -> FrameData:
         if index < 0 or index >= len(self.timestamps): return None
         target_time = self.timestamps[index]
@@ -183,47 +442,94 @@ class DASMCAPAdapter(BaseDatasetReader):
         # 1. 获取图像
         images = {}
         keys_to_fetch = specific_cameras if specific_cameras else self.image_keys
-        for cam_name in keys_to_fetch:
-            if cam_name in self.images_cache and index < len(self.images_cache[cam_name]):
-                # [优化项]: 内存中已经是 RGB Numpy 数组，直接读取即可，不需要任何转换
-                images[cam_name] = self.images_cache[cam_name][index]
+        streams = {cam: self.video_streams[cam] for cam in keys_to_fetch if cam in self.video_streams}
+        # [优化项]: 每路相机持有独立解码器，按需并行解码
+        futures = {cam: self.executor.submit(stream.get, index, self.preview_scale) for cam, stream in streams.items()}
+        for cam_name, future in futures.items():
+            img = future.result()
+            if img is not None:
+                images[cam_name] = img
 
-        # 2. 构建 QPos (Bucket 模式) -> 完全保留你的原逻辑
-        qpos_list = []
-        
-        # --- 遍历所有手臂组 (Arms & Grippers) ---
-        for arm_name in sorted(self.arm_groups.keys()):
-            group = self.arm_groups[arm_name]
-            
-            # EEF Pose (7维)
-            pt = group.get('pose_topic')
-            if pt and f"{pt}_pos" in self.interpolators:
-                pos = self.interpolators[f"{pt}_pos"](target_time)
-                t_min, t_max = self.interpolators[f"{pt}_rot_bounds"]
-                safe_t = np.clip(target_time, t_min, t_max)
-                rot = self.interpolators[f"{pt}_rot"](safe_t).as_quat()
-                qpos_list.extend(pos.tolist() + rot.tolist())
-            
-            # Joints (多维)
-            jt = group.get('joint_topic')
-            if jt and jt in self.interpolators:
-                joints = self.interpolators[jt](target_time)
-                qpos_list.extend(joints.tolist() if joints.ndim > 0 else [float(joints)])
-
-            # Gripper (1维)
-            gt = group.get('gripper_topic')
-            if gt and gt in self.interpolators:
-                grip = self.interpolators[gt](target_time)
-                qpos_list.append(float(grip*10)) # 夹爪变为0-1之间而非0-0.1
-
-        # --- 遍历底座 (Base) ---
-        for topic in self.base_map.keys():
-            if topic in self.interpolators:
-                base_data = self.interpolators[topic](target_time)
-                qpos_list.extend(base_data.tolist() if base_data.ndim > 0 else [float(base_data)])
-
-        return FrameData(timestamp=target_time/1e9, images=images, state={'qpos': np.array(qpos_list)})
+        # 2. QPos 已在 _build_interpolators 中整段预计算，这里只取一行
+        return FrameData(timestamp=target_time/1e9, images=images, state={'qpos': self.qpos_matrix[index]})
     
+    def get_snapshot_frames(self, fractions: Sequence[float], camera: Optional[str] = None,
+                            episode_idx: Optional[int] = None) -> EpisodeSnapshot:
+        """
+        快速路径：只读取各相机的 MessageIndex (不解压)，每个采样帧从其前一个关键帧开始解码一个 GOP。
+        不解析状态、不建立插值器，也不切换当前轨迹。未建立 Chunk 索引的文件回退到默认实现。
+        """
+        if episode_idx is None or episode_idx == self.current_episode_idx:
+            return super().get_snapshot_frames(fractions, camera)
+        if episode_idx < 0 or episode_idx >= len(self.episode_files):
+            return EpisodeSnapshot.empty()
+        target_file = self.episode_files[episode_idx]
+
+        index = McapChunkIndex(target_file, cache_size=self.chunk_cache_size)
+        try:
+            if not index.open() or not any(ci.message_index_offsets for ci in index.chunk_indexes):
+                return super().get_snapshot_frames(fractions, camera, episode_idx)
+            available = set(index.topics())
+            topics = {std: topic for topic, std in self.camera_map.items() if topic in available}
+            entries = index.build_message_index(list(topics.values()))
+            # 相机按在文件中首次出现的顺序排列，与 set_episode 中 image_keys 的顺序一致
+            order = sorted((std for std in topics if entries.get(topics[std])),
+                           key=lambda std: min((e[1], e[2]) for e in entries[topics[std]]))
+            if not order:
+                return EpisodeSnapshot.empty(str(target_file))
+
+            decoders = {}
+            def fetch(entry) -> bytes:
+                message = index.read_message(entry[1], entry[2])
+                cid = message.channel_id
+                if cid not in decoders:
+                    channel = index.channels[cid]
+                    decoders[cid] = DecoderFactory().decoder_for(channel.message_encoding, index.schemas.get(channel.schema_id))
+                return decoders[cid](message.data).data
+
+            def packets_of(std: str) -> list:
+                """每路相机的包从其第一个关键帧开始，与 set_episode 一致"""
+                cam_entries = entries[topics[std]]
+                first_kf = next((i for i, e in enumerate(cam_entries) if is_h264_keyframe(fetch(e))), None)
+                return cam_entries[first_kf:] if first_kf is not None else []
+
+            # 主时间轴取第一台相机 (image_keys[0])，而不是预览相机，保证帧数与下标和 set_episode 相同
+            timeline = packets_of(order[0])
+            idx = self._snapshot_indices(fractions, len(timeline))
+            if not idx:
+                return EpisodeSnapshot.empty(str(target_file), len(timeline))
+            # 索引只记录 log_time，set_episode 的时间戳是 publish_time，采样帧读出消息头取 publish_time
+            timestamps = [index.read_message(timeline[i][1], timeline[i][2]).publish_time / 1e9 for i in idx]
+
+            def read(cam: str) -> FrameBatch:
+                # 与 get_frame 一致：各相机按自身的第 i 个包取帧
+                packets = timeline if cam == order[0] else packets_of(cam)
+                frames = []
+                for i, timestamp in zip(idx, timestamps):
+                    img = None
+                    if i < len(packets):
+                        # 向前找到最近的关键帧；含 B 帧时第 i 个显示的画面可能在更靠后的包里，
+                        # 因此取出整个 GOP 的压缩包，解码仍在输出第 i 帧后停止
+                        k_pos = i
+                        while k_pos > 0 and not is_h264_keyframe(fetch(packets[k_pos])):
+                            k_pos -= 1
+                        gop = [fetch(packets[k_pos])]
+                        for entry in packets[k_pos + 1:]:
+                            data = fetch(entry)
+                            if is_h264_keyframe(data): break
+                            gop.append(data)
+                        reorder = any(is_h264_bframe(data) for data in gop)
+                        # 解码器末尾 flush 会一次吐出多帧，窗口容纳整个 GOP 以免目标帧被挤出
+                        stream = LazyVideoStream(gop, [0], lambda data: data, window_size=len(gop), reorder=reorder)
+                        img = stream.get(i - k_pos, self.preview_scale)
+                    frames.append(FrameData(timestamp=timestamp, images={cam: img} if img is not None else {}))
+                return FrameBatch.from_frames(idx, frames)
+
+            camera, batch = self._read_snapshot_camera(self._snapshot_cameras(order, camera), read)
+            return EpisodeSnapshot(str(target_file), len(timeline), camera, batch)
+        finally:
+            index.close()
+
     def get_all_sensors(self) -> List[str]:
         """返回当前加载的 episode 中所有的传感器(相机)名称"""
         return self.image_keys
@@ -242,8 +548,33 @@ class DASMCAPAdapter(BaseDatasetReader):
         """返回当前数据集包含的总 episode 数量"""
         return len(self.episode_files)
     
+    def _apply_episode_state(self, state: Dict[str, Any]):
+        super()._apply_episode_state(state)
+        # 池中的视频流可能来自另一个读取器实例，取包回调需要指向当前实例的 chunk_index
+        for stream in self.video_streams.values():
+            stream.fetch = self._fetch_packet
+
+    @staticmethod
+    def _release_episode_state(state: Dict[str, Any]):
+        for stream in state.get("video_streams", {}).values():
+            stream.close()
+        if state.get("chunk_index"): state["chunk_index"].close()
+
     def close(self):
-        self.images_cache.clear()
+        """关闭读取器：当前轨迹放回句柄池后归还对池的使用 (最后一个读取器关闭时池中句柄全部关闭)"""
+        self._close_episode()
+        self._detach_episode_pool()
+
+    def _close_episode(self):
+        """切换轨迹前释放当前轨迹；启用句柄池时句柄移入池中而不是关闭"""
+        self._stash_episode()
+        for stream in self.video_streams.values():
+            stream.close()
+        self.video_streams.clear()
+        if self.chunk_index:
+            self.chunk_index.close()
+            self.chunk_index = None
+        self._packet_decoders = {}
         self.camera_info_cache.clear()
         self.image_keys.clear()
         
@@ -251,4 +582,6 @@ class DASMCAPAdapter(BaseDatasetReader):
         
         if hasattr(self, 'raw_state_data'):
             self.raw_state_data.clear()
-        self.interpolators.clear()
\ No newline at end of file
+        self.interpolators.clear()
+        self.qpos_matrix = np.zeros((0, 0), dtype=np.float32)
+        self.qpos_names = []
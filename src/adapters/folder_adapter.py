@@ -1,14 +1,20 @@
 # src/adapters/folder_adapter.py
+import os
 import re
-import cv2
 import numpy as np
 from pathlib import Path
-from typing import List, Dict, Any, Optional
-from src.core.interface import BaseDatasetReader, FrameData, AdapterConfig
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import List, Dict, Any, Optional, Sequence
+from src.core.interface import BaseDatasetReader, FrameData, FrameBatch, AdapterConfig
 from src.core.registry import AdapterRegistry
+from src.core.frame_cache import FrameCache
+from src.core.image_codec import read_image
 
 @AdapterRegistry.register("RawFolder")
 class FolderAdapter(BaseDatasetReader):
+    supports_concurrent_reads = True
+
     def __init__(self, config: Optional[AdapterConfig] = None):
         super().__init__(config)
         self.root_path = None
@@ -22,6 +28,9 @@ class FolderAdapter(BaseDatasetReader):
         
         extra_opts = getattr(self.config, 'extra_options', {}) or {}
         self.fps = float(extra_opts.get("fps", 30.0))
+        self.decode_workers = int(extra_opts.get("decode_workers", min(8, os.cpu_count() or 4)))
+        self.executor = None
+        self.frame_cache = FrameCache.from_options(extra_opts)
         
         # 2. 轨迹管理
         self.episode_dirs = []
@@ -100,17 +109,53 @@ class FolderAdapter(BaseDatasetReader):
         if index < 0 or index >= len(self.frames): return None
         frame_info = self.frames[index]
         images = {}
+        encoded = {}
         
         keys_to_fetch = specific_cameras if specific_cameras else self.sensors
         
         for std_cam_name in keys_to_fetch:
             if std_cam_name in frame_info['images']:
                 path = frame_info['images'][std_cam_name]
-                img = cv2.imread(path)
+                # 透传模式下直接读取图片文件的原始字节，不解码
+                if self.keep_encoded_images:
+                    with open(path, 'rb') as f: encoded[std_cam_name] = f.read()
+                    continue
+                img = self._cached_image(std_cam_name, index, lambda: self._read_image(path, self.preview_scale))
                 if img is not None: 
-                    images[std_cam_name] = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+                    images[std_cam_name] = img
         
-        return FrameData(timestamp=float(index) / self.fps, images=images, state={})
+        return FrameData(timestamp=float(index) / self.fps, images=images, state={}, encoded_images=encoded or None)
+
+    @staticmethod
+    def _read_image(path: str, scale: int = 1) -> Optional[np.ndarray]:
+        return read_image(path, scale)
+
+    def get_frames(self, indices: Sequence[int], cameras: Optional[List[str]] = None) -> FrameBatch:
+        """
+        批量读取：所有帧的所有相机图片交给线程池并行解码 (cv2 解码时释放 GIL)，与 get_frame 共用帧缓存，
+        重复的下标只解码一次；透传模式走逐帧的默认实现
+        """
+        if self.keep_encoded_images: return super().get_frames(indices, cameras)
+        valid = self._check_indices(indices, len(self.frames)).tolist()
+        keys_to_fetch = cameras if cameras else self.sensors
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=max(1, self.decode_workers))
+
+        futures = {}
+        for idx in dict.fromkeys(valid):
+            for cam in keys_to_fetch:
+                path = self.frames[idx]['images'].get(cam)
+                if path:
+                    loader = partial(self._read_image, path, self.preview_scale)
+                    futures[(cam, idx)] = self.executor.submit(self._cached_image, cam, idx, loader)
+
+        images = {}
+        for cam in keys_to_fetch:
+            decoded = [futures[(cam, idx)].result() if (cam, idx) in futures else None for idx in valid]
+            if any(img is not None for img in decoded):
+                images[cam] = FrameBatch.stack(decoded)
+
+        return FrameBatch(indices=valid, timestamps=np.array(valid, dtype=np.float64) / self.fps, images=images)
     
     def get_current_episode_path(self) -> str:
         if self.episode_dirs and 0 <= self.current_episode_idx < len(self.episode_dirs):
@@ -118,4 +163,6 @@ class FolderAdapter(BaseDatasetReader):
         return None
     
     def close(self):
-        pass
\ No newline at end of file
+        if self.executor:
+            self.executor.shutdown(wait=False)
+            self.executor = None
\ No newline at end of file
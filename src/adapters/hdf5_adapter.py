@@ -1,14 +1,30 @@
 # src/adapters/hdf5_adapter.py
+import time
+import threading
 import h5py
-import cv2
 import numpy as np
-from typing import List, Dict, Any, Optional
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Sequence
 from pathlib import Path
-from src.core.interface import BaseDatasetReader, FrameData, AdapterConfig
+from src.core.interface import BaseDatasetReader, FrameData, FrameBatch, AdapterConfig, EpisodeSnapshot
 from src.core.registry import AdapterRegistry
+from src.core.frame_cache import FrameCache
+from src.core.episode_pool import EpisodeHandlePool
+from src.core.image_codec import decode_image, downscale
+
+@dataclass
+class _RowBlock:
+    """一块连续行的原始数据 (压缩字节或像素数组)，各行在首次访问时按预览倍数解码"""
+    raw: Any
+    decoded: Dict[tuple, Future] = field(default_factory=dict)   # (块内行号, scale) -> 解码结果
 
 @AdapterRegistry.register("HDF5")
 class HDF5Adapter(BaseDatasetReader):
+    supports_concurrent_reads = True
+    _episode_state_attrs = ("file", "_length", "state_arrays")
+
     def __init__(self, config: Optional[AdapterConfig] = None):
         super().__init__(config)
         self.root_path = None
@@ -22,10 +38,23 @@ class HDF5Adapter(BaseDatasetReader):
         
         extra_opts = getattr(self.config, 'extra_options', {}) or {}
         self.length_reference_key = getattr(self.config, 'length_reference_key', None)
+        self.frame_cache = FrameCache.from_options(extra_opts)
+        self.episode_pool = EpisodeHandlePool.from_options(extra_opts)
+        
+        # 图像数据集按块读取：块大小取 HDF5 chunk 行数 (不超过 block_rows)，每块只读取解压一次，
+        # 块内各行在被访问时才解码；并行解码由调用方 (FrameStream 多线程) 提供
+        self.chunk_cache_size = int(extra_opts.get("chunk_cache_size", 4))   # 每个相机缓存的块数
+        self.block_rows = max(1, int(extra_opts.get("block_rows", 16)))      # 每块最多行数
+        self._blocks: "OrderedDict[tuple, Future]" = OrderedDict()   # (h5_path, 块起始行) -> _RowBlock
+        self._block_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.io_stats = self._empty_io_stats()
         
         self.episode_files = [] 
         self.current_episode_idx = 0
         self.image_keys = []
+        # 当前轨迹所有映射状态的整段数据 (set_episode 时每个数据集一次读取)
+        self.state_arrays: Dict[str, np.ndarray] = {}
 
     def _find_dataset_length(self, h5_node) -> int:
         if isinstance(h5_node, h5py.Dataset):
@@ -74,13 +103,24 @@ class HDF5Adapter(BaseDatasetReader):
         if episode_idx < 0 or episode_idx >= len(self.episode_files):
             raise IndexError(f"轨迹索引 {episode_idx} 越界")
             
+        pooled = self._checkout_episode(self.episode_files[episode_idx])
+        self._close_episode()
         self.current_episode_idx = episode_idx
-        self.close()
+        if pooled is not None:
+            self._apply_episode_state(pooled)
+            # 池中的句柄可能来自另一个读取器实例，本实例的相机映射尚未自动探测
+            self._resolve_image_keys()
+            print(f"♻️ [HDF5] 复用已打开的 Episode {episode_idx}: {self._length} 帧")
+            return
         
         target_file = self.episode_files[episode_idx]
         self.file = h5py.File(target_file, 'r')
         self._length = self._find_dataset_length(self.file)
-        
+        self._resolve_image_keys()
+        self._load_states()
+        print(f"🔄 [HDF5] 切换至 Episode {episode_idx}: {self._length} 帧")
+
+    def _resolve_image_keys(self):
         self.image_keys = list(self.camera_map.keys())
         if not self.image_keys:
             if 'observations' in self.file and 'images' in self.file['observations']:
@@ -88,8 +128,23 @@ class HDF5Adapter(BaseDatasetReader):
                 for cam_name in img_grp.keys():
                     self.camera_map[cam_name] = f"observations/images/{cam_name}"
             self.image_keys = list(self.camera_map.keys())
-            
-        print(f"🔄 [HDF5] 切换至 Episode {episode_idx}: {self._length} 帧")
+
+    def _state_paths(self) -> Dict[str, str]:
+        """状态名 -> HDF5 路径：base 直接使用标准名，arm_groups 组合为 "{arm}_{attr}" (例如 left_qpos)"""
+        state_paths = dict(self.base_map)
+        for arm_name, group_cfg in self.arm_groups.items():
+            for attr_name, h5_path in group_cfg.items():
+                state_paths[f"{arm_name}_{attr_name}"] = h5_path
+        return state_paths
+
+    def _load_states(self):
+        """状态数据相对图像很小，整段读入内存，逐帧读取只是数组切片"""
+        self.state_arrays = {}
+        for key, h5_path in self._state_paths().items():
+            if h5_path in self.file:
+                node = self.file[h5_path]
+                if isinstance(node, h5py.Dataset) and node.ndim > 0:
+                    self.state_arrays[key] = node[()]
 
     def get_total_episodes(self) -> int: return len(self.episode_files)
     
@@ -102,6 +157,7 @@ class HDF5Adapter(BaseDatasetReader):
         if index < 0 or index >= self._length: raise IndexError(f"Index {index} out of bounds")
 
         images = {}
+        encoded = {}
         keys_to_fetch = specific_cameras if specific_cameras else self.image_keys
         
         # 1. 加载图像 (保持不变)
@@ -109,43 +165,210 @@ class HDF5Adapter(BaseDatasetReader):
             h5_path = self.camera_map.get(std_cam_name)
             if h5_path and h5_path in self.file:
                 dataset = self.file[h5_path]
-                raw_data = dataset[index] 
-                if dataset.ndim == 1:
-                    buffer = np.frombuffer(raw_data, dtype=np.uint8)
-                    img_data = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
-                    if img_data is not None:
-                        img_data = cv2.cvtColor(img_data, cv2.COLOR_BGR2RGB)
-                else:
-                    img_data = raw_data
-                    if img_data.ndim == 3 and img_data.shape[0] == 3:
-                        img_data = np.transpose(img_data, (1, 2, 0))
+                # 一维数据集存的就是 JPEG/PNG 字节，透传模式下不解码
+                if self.keep_encoded_images and dataset.ndim == 1:
+                    encoded[std_cam_name] = self._block_bytes(h5_path, dataset, index)
+                    continue
+                img_data = self._cached_image(std_cam_name, index, lambda: self._block_image(h5_path, dataset, index))
                 if img_data is not None:
                     images[std_cam_name] = img_data
 
-        # 2. 构建状态数据
-        state_data = {}
-        
-        # --- 修复点 A: 处理 base_map (对应 JSON 中的 "base" 字段) ---
-        for std_state_name, h5_path in self.base_map.items():
-            if h5_path in self.file:
-                 state_data[std_state_name] = self.file[h5_path][index]
+        # 2. 构建状态数据 (base 与 arm_groups 已在 set_episode 时整段预读)
+        state_data = {key: arr[index] for key, arr in self.state_arrays.items()}
 
-        # --- 修复点 B: 处理 arm_groups (对应 JSON 中的 "arm_groups" 字段) ---
-        for arm_name, group_cfg in self.arm_groups.items():
-            # 遍历 group 里的 key，比如 qpos, action 等
-            for attr_name, h5_path in group_cfg.items():
-                if h5_path in self.file:
-                    # 组合 key 名，例如 "left_qpos"
-                    combined_key = f"{arm_name}_{attr_name}"
-                    state_data[combined_key] = self.file[h5_path][index]
+        return FrameData(timestamp=float(index), images=images, state=state_data, encoded_images=encoded or None)
+
+    @staticmethod
+    def _to_image(dataset, raw_data, scale: int = 1) -> Optional[np.ndarray]:
+        """一维数据集视为压缩字节 (JPEG/PNG) 解码为 RGB，多维数据集视为原始像素 (兼容 CHW)"""
+        return HDF5Adapter._decode(dataset.ndim, raw_data, scale)
+
+    @staticmethod
+    def _decode(ndim: int, raw_data, scale: int = 1) -> Optional[np.ndarray]:
+        """scale > 1 时压缩图像在解码阶段直接缩小，原始像素按倍数缩放"""
+        if ndim == 1:
+            return decode_image(raw_data, scale)
+        img_data = raw_data
+        if img_data.ndim == 3 and img_data.shape[0] == 3:
+            img_data = np.transpose(img_data, (1, 2, 0))
+        return downscale(img_data, scale)
+
+    @staticmethod
+    def _empty_io_stats() -> Dict[str, float]:
+        return {"blocks_read": 0, "block_hits": 0, "rows_read": 0, "bytes_read": 0,
+                "read_seconds": 0.0, "images_decoded": 0, "decode_seconds": 0.0}
+
+    def _count(self, **deltas):
+        with self._stats_lock:
+            for k, v in deltas.items(): self.io_stats[k] += v
+
+    def _block_image(self, h5_path: str, dataset, index: int) -> Optional[np.ndarray]:
+        """从块缓存中取一行并解码；同一行同一倍数只解码一次，并发请求等待同一个结果"""
+        scale = self.preview_scale
+        block, start = self._get_block(h5_path, dataset, index)
+        key = (index - start, scale)
+        with self._block_lock:
+            future = block.decoded.get(key)
+            owner = future is None
+            if owner:
+                future = block.decoded[key] = Future()
+        if owner:
+            try: future.set_result(self._decode_timed(dataset.ndim, block.raw[key[0]], scale))
+            except Exception as e: future.set_exception(e)
+        return future.result()
+
+    def _block_bytes(self, h5_path: str, dataset, index: int) -> bytes:
+        """透传模式：同样按块读取，直接取该行的压缩字节"""
+        block, start = self._get_block(h5_path, dataset, index)
+        return np.frombuffer(block.raw[index - start], dtype=np.uint8).tobytes()
+
+    def _block_size(self, dataset) -> int:
+        """按 chunk 对齐，但不超过 block_rows (自动分块的一维数据集 chunk 可能有上千行)"""
+        chunk_rows = dataset.chunks[0] if dataset.chunks else self.block_rows
+        return max(1, min(chunk_rows, self.block_rows))
+
+    def _get_block(self, h5_path: str, dataset, index: int):
+        """
+        返回 (_RowBlock, 块起始行)。未命中时先在 LRU 中放入占位 Future 再在锁外读取磁盘，
+        不同相机/不同块的读取可以并行，同一块的并发请求等待同一次读取。
+        """
+        rows = self._block_size(dataset)
+        start = index - index % rows
+        key = (h5_path, start)
+        with self._block_lock:
+            future = self._blocks.get(key)
+            owner = future is None
+            if owner:
+                future = self._blocks[key] = Future()
+                while len(self._blocks) > max(1, self.chunk_cache_size) * max(1, len(self.image_keys)):
+                    self._blocks.popitem(last=False)
+            else:
+                self._blocks.move_to_end(key)
+        if owner:
+            try:
+                t0 = time.perf_counter()
+                raw_block = dataset[start:min(start + rows, dataset.shape[0])]
+                nbytes = raw_block.nbytes if raw_block.dtype != object else sum(len(x) for x in raw_block)
+                self._count(blocks_read=1, rows_read=len(raw_block), bytes_read=nbytes, read_seconds=time.perf_counter() - t0)
+                future.set_result(_RowBlock(raw_block))
+            except Exception as e:
+                future.set_exception(e)
+                with self._block_lock:
+                    if self._blocks.get(key) is future: del self._blocks[key]
+        else:
+            self._count(block_hits=1)
+        return future.result(), start
+
+    def _decode_timed(self, ndim: int, raw, scale: int = 1) -> Optional[np.ndarray]:
+        t0 = time.perf_counter()
+        img = self._decode(ndim, raw, scale)
+        self._count(images_decoded=1, decode_seconds=time.perf_counter() - t0)
+        return img
+
+    def get_io_stats(self) -> Dict[str, float]:
+        """块读取/解码计数与吞吐，用于调节 chunk_cache_size 与 block_rows"""
+        with self._stats_lock:
+            stats = dict(self.io_stats)
+        lookups = stats["blocks_read"] + stats["block_hits"]
+        stats["block_hit_rate"] = stats["block_hits"] / lookups if lookups else 0.0
+        stats["read_mb_per_s"] = stats["bytes_read"] / 1024 / 1024 / stats["read_seconds"] if stats["read_seconds"] else 0.0
+        # decode_seconds 为各线程累计耗时，这里折算为单线程每秒解码张数
+        stats["decode_fps_per_thread"] = stats["images_decoded"] / stats["decode_seconds"] if stats["decode_seconds"] else 0.0
+        return stats
+
+    @staticmethod
+    def _read_rows(dataset, rows: np.ndarray):
+        """对升序去重后的行号做一次读取：连续区间用切片，否则用 fancy indexing"""
+        if rows[-1] - rows[0] + 1 == len(rows):
+            return dataset[int(rows[0]):int(rows[-1]) + 1]
+        return dataset[rows]
+
+    def get_frames(self, indices: Sequence[int], cameras: Optional[List[str]] = None) -> FrameBatch:
+        """批量读取：每个数据集只发起一次 HDF5 读取；透传模式不解码，走逐帧的默认实现"""
+        if self.file is None: raise RuntimeError("File not loaded")
+        if self.keep_encoded_images: return super().get_frames(indices, cameras)
+        idx = self._check_indices(indices, self._length)
+        if len(idx) == 0: return FrameBatch(indices=[], timestamps=np.zeros(0))
+        rows, inverse = np.unique(idx, return_inverse=True)
+
+        images = {}
+        for std_cam_name in (cameras if cameras else self.image_keys):
+            h5_path = self.camera_map.get(std_cam_name)
+            if h5_path and h5_path in self.file:
+                dataset = self.file[h5_path]
+                block = self._read_rows(dataset, rows)
+                decoded = [self._to_image(dataset, raw, self.preview_scale) for raw in block]
+                images[std_cam_name] = FrameBatch.stack([decoded[i] for i in inverse])
+
+        state_data = {key: arr[idx] for key, arr in self.state_arrays.items()}
+
+        return FrameBatch(indices=idx.tolist(), timestamps=idx.astype(np.float64), images=images, state=state_data)
+
+    def get_snapshot_frames(self, fractions: Sequence[float], camera: Optional[str] = None,
+                            episode_idx: Optional[int] = None) -> EpisodeSnapshot:
+        """另开一个只读句柄，只读取目标相机的几行；不预读状态，也不切换当前轨迹"""
+        if episode_idx is None or episode_idx == self.current_episode_idx:
+            return super().get_snapshot_frames(fractions, camera)
+        if episode_idx < 0 or episode_idx >= len(self.episode_files):
+            return EpisodeSnapshot.empty()
+
+        target_file = self.episode_files[episode_idx]
+        with h5py.File(target_file, 'r') as f:
+            length = self._find_dataset_length(f)
+            camera_map = dict(self.camera_map)
+            if not camera_map and 'observations' in f and 'images' in f['observations']:
+                camera_map = {cam: f"observations/images/{cam}" for cam in f['observations']['images'].keys()}
+            idx = np.asarray(self._snapshot_indices(fractions, length), dtype=np.int64)
+            if len(idx) == 0:
+                return EpisodeSnapshot.empty(str(target_file), length)
+
+            def read(cam: str) -> FrameBatch:
+                batch = FrameBatch(indices=idx.tolist(), timestamps=idx.astype(np.float64))
+                h5_path = camera_map.get(cam)
+                if h5_path and h5_path in f:
+                    dataset = f[h5_path]
+                    # 相机数据集可能比主长度短，超出部分记为缺帧而不是读取越界
+                    rows = np.unique(idx[idx < dataset.shape[0]])
+                    raw_rows = self._read_rows(dataset, rows) if len(rows) else []
+                    # 一维数据集存的就是 JPEG/PNG 字节，透传模式下不解码
+                    if self.keep_encoded_images and dataset.ndim == 1:
+                        by_row = {int(r): np.frombuffer(raw, dtype=np.uint8).tobytes() for r, raw in zip(rows, raw_rows)}
+                        batch.encoded_images[cam] = [by_row.get(int(i)) for i in idx]
+                    else:
+                        by_row = {int(r): self._to_image(dataset, raw, self.preview_scale) for r, raw in zip(rows, raw_rows)}
+                        batch.images[cam] = FrameBatch.stack([by_row.get(int(i)) for i in idx])
+                return batch
+
+            camera, batch = self._read_snapshot_camera(self._snapshot_cameras(list(camera_map.keys()), camera), read)
+        return EpisodeSnapshot(str(target_file), length, camera, batch)
+
+    def get_episode_states(self) -> Dict[str, np.ndarray]:
+        """整条轨迹的状态，一维数据集扩展为 (T, 1)"""
+        return {key: arr.reshape(len(arr), -1) for key, arr in self.state_arrays.items()}
+
+    def get_state_schema(self) -> Dict[str, List[str]]:
+        return {key: [f"{key}_{j}" for j in range(mat.shape[1])] for key, mat in self.get_episode_states().items()}
 
-        return FrameData(timestamp=float(index), images=images, state=state_data)
     def get_current_episode_path(self) -> str:
         if self.episode_files and 0 <= self.current_episode_idx < len(self.episode_files):
             return str(self.episode_files[self.current_episode_idx])
         return None
 
+    @staticmethod
+    def _release_episode_state(state: Dict[str, Any]):
+        if state.get("file"): state["file"].close()
+
     def close(self):
+        """关闭读取器：当前轨迹放回句柄池后归还对池的使用 (最后一个读取器关闭时池中句柄全部关闭)"""
+        self._close_episode()
+        self._detach_episode_pool()
+
+    def _close_episode(self):
+        """切换轨迹前释放当前轨迹；启用句柄池时句柄移入池中而不是关闭"""
+        self._stash_episode()
+        # 正在读取/解码的块由发起请求的线程完成，清空缓存不会让其他线程的等待失败
+        with self._block_lock:
+            self._blocks.clear()
         if self.file:
             self.file.close()
             self.file = None
\ No newline at end of file
@@ -1,13 +1,88 @@
 # src/adapters/lerobot_adapter.py
+import os
+import re
 import json
-import pandas as pd
-import cv2
+import pyarrow as pa
+import pyarrow.parquet as pq
 import numpy as np
-import imageio
+import av
+import threading
 from pathlib import Path
-from typing import List, Dict, Any, Optional
-from src.core.interface import BaseDatasetReader, FrameData, AdapterConfig
+from typing import List, Dict, Any, Optional, Sequence
+from src.core.interface import BaseDatasetReader, FrameData, FrameBatch, AdapterConfig, EpisodeSnapshot
 from src.core.registry import AdapterRegistry
+from src.core.frame_cache import FrameCache
+from src.core.image_codec import decode_image, read_image
+
+class SequentialVideoReader:
+    """
+    基于 PyAV 的单个视频文件读取器，按时间戳取帧并保持解码位置：
+    - 目标帧就是上一次返回的帧 -> 直接返回
+    - 目标在当前位置之后且距离不超过一个 GOP -> 继续向前解码
+    - 否则 (回退或跨越多个 GOP) -> seek 到目标之前最近的关键帧再向前解码
+    顺序播放时每帧只解码一次，首/中/尾随机访问也只需解码一个 GOP。
+    """
+    def __init__(self, path: str, fps: float = 30.0):
+        av.logging.set_level(av.logging.ERROR)
+        self.container = av.open(str(path))
+        self.stream = self.container.streams.video[0]
+        self.stream.thread_type = "AUTO"
+        self.time_base = float(self.stream.time_base)
+        self.start_pts = self.stream.start_time or 0
+        # 半帧时长 (pts 单位) 作为时间戳匹配容差
+        self.tolerance = max(1, int(round(0.5 / float(fps or 30.0) / self.time_base)))
+        # 前向解码上限，初始为 1 秒，观察到真实关键帧间隔后更新为 GOP 长度
+        self.max_forward = int(round(1.0 / self.time_base))
+        self.lock = threading.Lock()
+        self._frames = None
+        self._last_pts = None
+        self._last_image = None
+        self._last_scale = 1
+        self._last_keyframe_pts = None
+
+    def _seek(self, target_pts: int):
+        self.container.seek(max(target_pts, self.start_pts), stream=self.stream, backward=True, any_frame=False)
+        self._frames = self.container.decode(self.stream)
+        self._last_pts = None
+        self._last_keyframe_pts = None
+
+    def get(self, timestamp: float, scale: int = 1) -> Optional[np.ndarray]:
+        """返回视频内时间戳 timestamp (秒，相对视频起点) 处的 RGB 帧，scale > 1 时由 swscale 在转换 RGB 时一并缩小"""
+        target = self.start_pts + int(round(timestamp / self.time_base))
+        with self.lock:
+            if self._last_pts is not None and abs(target - self._last_pts) <= self.tolerance and scale == self._last_scale:
+                return self._last_image
+            if self._frames is None or self._last_pts is None or target < self._last_pts or target - self._last_pts > self.max_forward:
+                self._seek(target)
+
+            last_image = None
+            for frame in self._frames:
+                if frame.pts is None: continue
+                if frame.key_frame:
+                    if self._last_keyframe_pts is not None:
+                        self.max_forward = max(self.max_forward, frame.pts - self._last_keyframe_pts)
+                    self._last_keyframe_pts = frame.pts
+                self._last_pts = frame.pts
+                if frame.pts + self.tolerance < target: continue
+                if scale > 1:
+                    last_image = frame.to_ndarray(format="rgb24", width=-(-frame.width // scale), height=-(-frame.height // scale))
+                else:
+                    last_image = frame.to_ndarray(format="rgb24")
+                break
+            else:
+                # 解码到文件末尾仍未到达目标 (时间戳越界)：不缓存这次未命中，
+                # 同时丢弃解码位置，下次访问 (包括请求最后一帧) 重新 seek
+                self._frames = None
+                self._last_pts = None
+                self._last_image = None
+                return None
+            self._last_image = last_image
+            self._last_scale = scale
+            return last_image
+
+    def close(self):
+        try: self.container.close()
+        except Exception: pass
 
 @AdapterRegistry.register("LeRobot")
 class LeRobotAdapter(BaseDatasetReader):
@@ -15,7 +90,13 @@ class LeRobotAdapter(BaseDatasetReader):
         super().__init__(config)
         self.root_path = None
         self.current_dataset_root = None
-        self.df = None
+        # 当前轨迹的列数据 (pyarrow 内存映射读取，只读需要的列)
+        self._length = 0
+        self.timestamps = None        # (T,) float64，parquet 无 timestamp 列时为 None
+        self.episode_indices = None   # (T,) int64
+        self.frame_indices = None     # (T,) int64
+        self.state_arrays = {}        # std_name -> (T, D) 连续 ndarray
+        self.image_columns = {}       # full_key -> pyarrow ChunkedArray (内嵌图像字节)
         
         # 1. 基础配置标准化
         self.camera_map = getattr(self.config, 'image_keys_map', {}) or {}
@@ -23,13 +104,19 @@ class LeRobotAdapter(BaseDatasetReader):
         self.base_map = getattr(self.config, 'state_keys_map', {}) or {}
         
         extra_opts = getattr(self.config, 'extra_options', {}) or {}
+        self.frame_cache = FrameCache.from_options(extra_opts)
         
         self.fps = 30.0
         self.image_keys = []
         self.full_feature_keys = {}
         self.image_path_tpl = ""
         self.video_path_tpl = ""  
+        self.chunks_size = 1000
         self.cap_cache = {} 
+        # (full_key, episode_index) -> 视频路径 (None 表示不存在)，每个数据集根目录一份
+        self.video_files = {}
+        self.video_offsets = {}       # full_key -> 本轨迹在共享视频中的起始时间 (v3)
+        self._video_walk_index = {}   # dataset_root -> {(相机目录名, episode_index): Path}
         self.version = ""
         self.dorobot_version = "" 
         
@@ -39,6 +126,7 @@ class LeRobotAdapter(BaseDatasetReader):
     def load(self, file_path: str) -> bool:
         self.root_path = Path(file_path)
         self.episodes_meta = []
+        self._video_walk_index = {}
         
         meta_paths = []
         if (self.root_path / "meta" / "info.json").exists():
@@ -54,10 +142,13 @@ class LeRobotAdapter(BaseDatasetReader):
             dataset_root = meta_path.parent.parent
             try:
                 with open(meta_path, 'r') as f: info = json.load(f)
-                parquet_files = sorted(list(dataset_root.rglob("data/**/*.parquet")))
-                if not parquet_files: parquet_files = sorted(list(dataset_root.glob("*.parquet")))
-                for pq in parquet_files:
-                    self.episodes_meta.append({"root": dataset_root, "parquet": pq, "info": info})
+                # v3: 多条轨迹打包在同一个 parquet/mp4 中，优先使用 meta/episodes 的轨迹边界
+                episodes = self._index_from_episodes_meta(dataset_root, info)
+                if not episodes:
+                    parquet_files = sorted(list(dataset_root.rglob("data/**/*.parquet")))
+                    if not parquet_files: parquet_files = sorted(list(dataset_root.glob("*.parquet")))
+                    episodes = [ep for pq_path in parquet_files for ep in self._index_from_parquet(dataset_root, pq_path, info)]
+                self.episodes_meta.extend(episodes)
             except Exception as e:
                 print(f"⚠️ [LeRobot] 读取 {meta_path} 失败: {e}")
 
@@ -66,20 +157,124 @@ class LeRobotAdapter(BaseDatasetReader):
         self.set_episode(0)
         return True
 
+    def _index_from_episodes_meta(self, dataset_root: Path, info: dict) -> List[Dict[str, Any]]:
+        """
+        读取 v3 的 meta/episodes/*.parquet (只取定位相关的列)，为每条轨迹记录：
+        数据文件、文件内行区间 [start, stop)、每个视频的文件与起始时间偏移。
+        """
+        meta_files = sorted((dataset_root / "meta" / "episodes").rglob("*.parquet")) if (dataset_root / "meta" / "episodes").is_dir() else []
+        data_tpl = info.get("data_path", "")
+        video_tpl = info.get("video_path", "") or ""
+        if not meta_files or not data_tpl: return []
+
+        rows = []
+        for meta_file in meta_files:
+            pf = pq.ParquetFile(str(meta_file), memory_map=True)
+            names = pf.schema_arrow.names
+            wanted = [c for c in names if c in ("episode_index", "data/chunk_index", "data/file_index", "dataset_from_index", "dataset_to_index")
+                      or (c.startswith("videos/") and c.rsplit("/", 1)[-1] in ("chunk_index", "file_index", "from_timestamp"))]
+            rows.extend(pf.read(columns=wanted).to_pylist())
+        if not rows or "dataset_from_index" not in rows[0]: return []
+
+        # 同一数据文件内轨迹连续存放，文件首行的全局下标 = 其中最小的 dataset_from_index
+        def data_file(r):
+            return (r.get("data/chunk_index", 0), r.get("data/file_index", 0))
+        file_start = {}
+        for r in rows:
+            key = data_file(r)
+            file_start[key] = min(file_start.get(key, r["dataset_from_index"]), r["dataset_from_index"])
+
+        video_keys = sorted({c.split("/")[1] for c in rows[0] if c.startswith("videos/")})
+        episodes = []
+        for r in sorted(rows, key=lambda r: r["episode_index"]):
+            chunk_idx, file_idx = data_file(r)
+            start = r["dataset_from_index"] - file_start[(chunk_idx, file_idx)]
+            videos = {}
+            for vk in video_keys:
+                if r.get(f"videos/{vk}/file_index") is None or not video_tpl: continue
+                path = dataset_root / video_tpl.format(video_key=vk, chunk_index=r.get(f"videos/{vk}/chunk_index", 0),
+                                                       file_index=r[f"videos/{vk}/file_index"])
+                videos[vk] = (path, float(r.get(f"videos/{vk}/from_timestamp") or 0.0))
+            episodes.append({
+                "root": dataset_root, "info": info, "episode_index": int(r["episode_index"]),
+                "parquet": dataset_root / data_tpl.format(chunk_index=chunk_idx, file_index=file_idx),
+                "row_range": (start, start + r["dataset_to_index"] - r["dataset_from_index"]),
+                "videos": videos,
+            })
+        return episodes
+
+    # v2.x 约定每个数据文件只含一条轨迹 (data/chunk-000/episode_000000.parquet)，按文件名识别，load 时无需打开
+    _SINGLE_EPISODE_FILE = re.compile(r"episode_\d+\.parquet$")
+
+    def _index_from_parquet(self, dataset_root: Path, parquet_path: Path, info: dict) -> List[Dict[str, Any]]:
+        """
+        无 episodes 元数据时切分轨迹。v2.x 单轨迹文件直接整文件作为一条轨迹；
+        其他文件只读 footer 中 episode_index 的 row group min/max 统计，
+        仅当某个 row group 内跨越多条轨迹 (或缺少统计) 时才读取 episode_index 列。
+        """
+        entry = {"root": dataset_root, "parquet": parquet_path, "info": info}
+        if self._SINGLE_EPISODE_FILE.search(parquet_path.name): return [entry]
+        try:
+            pf = pq.ParquetFile(str(parquet_path), memory_map=True)
+            names = pf.schema_arrow.names
+            if "episode_index" not in names: return [entry]
+            bounds = self._episode_bounds_from_stats(pf.metadata, names.index("episode_index"))
+            if bounds is None:
+                ep_col = self._column_to_numpy(pf.read(columns=["episode_index"]).column("episode_index"))
+                if len(ep_col) == 0: return [entry]
+                cuts = [0] + (np.flatnonzero(np.diff(ep_col)) + 1).tolist() + [len(ep_col)]
+                bounds = [(int(ep_col[a]), a, b) for a, b in zip(cuts[:-1], cuts[1:])]
+        except Exception:
+            return [entry]
+        if len(bounds) <= 1: return [entry]
+        return [dict(entry, episode_index=ep, row_range=(a, b)) for ep, a, b in bounds]
+
+    @staticmethod
+    def _episode_bounds_from_stats(metadata, column_idx: int) -> Optional[List[tuple]]:
+        """
+        由 row group 统计得到 [(episode_index, start, stop), ...]；
+        每个 row group 都只含一条轨迹 (min == max) 时相邻且相同的 row group 合并，否则返回 None。
+        """
+        bounds, offset = [], 0
+        for rg in range(metadata.num_row_groups):
+            group = metadata.row_group(rg)
+            stats = group.column(column_idx).statistics
+            if stats is None or not stats.has_min_max or stats.min != stats.max: return None
+            ep, n = int(stats.min), group.num_rows
+            if bounds and bounds[-1][0] == ep and bounds[-1][2] == offset:
+                bounds[-1] = (ep, bounds[-1][1], offset + n)
+            elif n:
+                bounds.append((ep, offset, offset + n))
+            offset += n
+        return bounds
+
     def set_episode(self, episode_idx: int):
         if episode_idx < 0 or episode_idx >= len(self.episodes_meta): return
         self.current_episode_idx = episode_idx
         self.close() 
         
+        ep_meta = self._select_episode_meta(episode_idx)
+        self._read_columns(ep_meta["parquet"], ep_meta.get("row_range"))
+        print(f"🔄 [LeRobot] 切换至 Episode {episode_idx}, 帧数: {self._length}")
+
+    def _select_episode_meta(self, episode_idx: int) -> Dict[str, Any]:
+        """按 info.json 设置当前轨迹的元信息 (fps、路径模板、相机映射、视频文件)，不读取 parquet"""
         ep_meta = self.episodes_meta[episode_idx]
         self.current_dataset_root = ep_meta["root"]
-        parquet_path = ep_meta["parquet"]
         info = ep_meta["info"]
         
         self.version = info.get("codebase_version", "v2.1")
         self.dorobot_version = info.get("dorobot_dataset_version", "")
         self.fps = info.get("fps", 30.0)
         self.image_path_tpl = info.get("image_path", "")
+        self.video_path_tpl = info.get("video_path", "") or ""
+        self.chunks_size = int(info.get("chunks_size", 1000) or 1000)
+        self.video_files = {}
+        # v3 共享视频: 预先登记本轨迹对应的视频文件与在其中的起始时间
+        self.video_offsets = {}
+        for video_key, (video_path, offset) in ep_meta.get("videos", {}).items():
+            self.video_files[(video_key, ep_meta["episode_index"])] = video_path
+            self.video_offsets[video_key] = offset
         
         features = info.get("features", {})
         self.image_keys = []
@@ -95,68 +290,278 @@ class LeRobotAdapter(BaseDatasetReader):
                     short_name = key.split(".")[-1]
                     self.image_keys.append(short_name)
                     self.full_feature_keys[short_name] = key
-                
-        self.df = pd.read_parquet(parquet_path)
-        print(f"🔄 [LeRobot] 切换至 Episode {episode_idx}, 帧数: {len(self.df)}")
+        return ep_meta
+
+    def _read_columns(self, parquet_path: Path, row_range: Optional[tuple] = None, rows: Optional[Sequence[int]] = None):
+        """
+        以内存映射方式打开 parquet，只读取索引列、映射的状态列和内嵌图像列。
+        状态列转换为连续的 (T, D) 数组，逐帧读取只是一次行切片。
+        row_range=(start, stop) 时只读取与该行区间重叠的 row group。
+        rows 为区间内的行号时只读取包含这些行的 row group，结果按 rows 的顺序排列。
+        """
+        pf = pq.ParquetFile(str(parquet_path), memory_map=True)
+        names = set(pf.schema_arrow.names)
+        state_cols = {std: col for std, col in self._state_mapping().items() if col in names}
+        image_cols = [k for k in dict.fromkeys(self.full_feature_keys.values()) if k in names]
+        columns = [c for c in ["timestamp", "episode_index", "frame_index"] if c in names]
+        columns = list(dict.fromkeys(columns + list(state_cols.values()) + image_cols))
+        if row_range is None and rows is None:
+            table = pf.read(columns=columns)
+        elif rows is None:
+            start, stop = row_range
+            groups, offset, first_row = [], 0, None
+            for rg in range(pf.metadata.num_row_groups):
+                n = pf.metadata.row_group(rg).num_rows
+                if offset < stop and offset + n > start:
+                    groups.append(rg)
+                    if first_row is None: first_row = offset
+                offset += n
+            table = pf.read_row_groups(groups, columns=columns).slice(start - (first_row or 0), stop - start)
+        else:
+            start = row_range[0] if row_range else 0
+            wanted = [start + int(r) for r in rows]
+            # 选中 row group 拼接后，每个目标行在结果表中的位置
+            groups, positions, offset, table_offset = [], {}, 0, 0
+            for rg in range(pf.metadata.num_row_groups):
+                n = pf.metadata.row_group(rg).num_rows
+                hits = [w for w in wanted if offset <= w < offset + n]
+                if hits:
+                    groups.append(rg)
+                    positions.update({w: table_offset + w - offset for w in hits})
+                    table_offset += n
+                offset += n
+            table = pf.read_row_groups(groups, columns=columns).take(pa.array([positions[w] for w in wanted], type=pa.int64()))
+
+        self._length = table.num_rows
+        self.timestamps = self._column_to_numpy(table.column("timestamp")).astype(np.float64) if "timestamp" in names else None
+        self.episode_indices = self._column_to_numpy(table.column("episode_index")).astype(np.int64) if "episode_index" in names else None
+        self.frame_indices = self._column_to_numpy(table.column("frame_index")).astype(np.int64) if "frame_index" in names else None
+        self.state_arrays = {std: self._column_to_numpy(table.column(col)) for std, col in state_cols.items()}
+        self.image_columns = {k: table.column(k) for k in image_cols}
+
+    @staticmethod
+    def _column_to_numpy(column: "pa.ChunkedArray") -> np.ndarray:
+        """标量列 -> (T,)；定长 list 列 -> (T, D)；变长 list 列退化为 object 数组"""
+        arr = column.combine_chunks()
+        if pa.types.is_fixed_size_list(arr.type) and arr.null_count == 0:
+            return np.ascontiguousarray(arr.flatten().to_numpy(zero_copy_only=False).reshape(len(arr), arr.type.list_size))
+        if (pa.types.is_list(arr.type) or pa.types.is_large_list(arr.type)) and arr.null_count == 0:
+            lengths = arr.value_lengths().to_numpy(zero_copy_only=False)
+            if len(lengths) and (lengths == lengths[0]).all():
+                return np.ascontiguousarray(arr.flatten().to_numpy(zero_copy_only=False).reshape(len(arr), int(lengths[0])))
+            values = np.empty(len(arr), dtype=object)
+            values[:] = [np.asarray(v) for v in arr.to_pylist()]
+            return values
+        return arr.to_numpy(zero_copy_only=False)
 
     def get_total_episodes(self) -> int: return len(self.episodes_meta)
-    def get_length(self) -> int: return len(self.df) if self.df is not None else 0
+    def get_length(self) -> int: return self._length
     def get_all_sensors(self) -> List[str]: return self.image_keys
 
     def get_frame(self, index: int, specific_cameras: Optional[List[str]] = None) -> FrameData:
-        if self.df is None or index >= len(self.df): return None
-        row = self.df.iloc[index]
-        images = {}
-        
-        ep_idx = int(row["episode_index"])
-        frame_idx = int(row["frame_index"])
+        if index < 0 or index >= self._length: return None
         keys_to_fetch = specific_cameras if specific_cameras else self.image_keys
+        encoded = {} if self.keep_encoded_images else None
+        images = self._load_images(index, keys_to_fetch, encoded)
+
+        # 状态读取适配：直接对预先转换好的数组做行切片
+        state = {std_name: np.asarray(arr[index]) for std_name, arr in self.state_arrays.items()}
+
+        timestamp = float(self.timestamps[index]) if self.timestamps is not None else index / self.fps
+        return FrameData(timestamp=timestamp, images=images, state=state, encoded_images=encoded or None)
+
+    def get_episode_states(self) -> Dict[str, np.ndarray]:
+        """整条轨迹的状态列 (set_episode 时已转换为连续数组)，标量列扩展为 (T, 1)；变长列不支持"""
+        return {std: arr.reshape(len(arr), -1) for std, arr in self.state_arrays.items() if arr.dtype != object}
+
+    def get_state_schema(self) -> Dict[str, List[str]]:
+        return {std: [f"{std}_{j}" for j in range(mat.shape[1])] for std, mat in self.get_episode_states().items()}
+
+    def _state_mapping(self) -> Dict[str, str]:
+        return self.base_map if self.base_map else {"action": "action", "qpos": "observation.state"}
+
+    def _load_images(self, index: int, keys_to_fetch: List[str], encoded: Optional[Dict[str, bytes]] = None) -> Dict[str, np.ndarray]:
+        """encoded 不为 None 时，源数据已是压缩图像的相机把原始字节放入 encoded，不做解码"""
+        images = {}
+        ep_idx = int(self.episode_indices[index]) if self.episode_indices is not None else 0
+        frame_idx = int(self.frame_indices[index]) if self.frame_indices is not None else index
         
         for short_name in keys_to_fetch:
             full_key = self.full_feature_keys.get(short_name)
             if not full_key: continue
-            
-            img_loaded = False
-            
-            # 策略1: 检查 Parquet 数据列中是否本身就存了 raw bytes（针对无图床的情况）
-            if full_key in row and isinstance(row[full_key], bytes):
-                img_data = cv2.imdecode(np.frombuffer(row[full_key], np.uint8), cv2.IMREAD_COLOR)
-                if img_data is not None:
-                    images[short_name] = cv2.cvtColor(img_data, cv2.COLOR_BGR2RGB)
-                    img_loaded = True
-
-            # 策略2: 基于模版组装图片路径
-            if not img_loaded and self.image_path_tpl:
-                for key_variant in [short_name, full_key]:
-                    rel_path = self.image_path_tpl.format(image_key=key_variant, episode_index=ep_idx, frame_index=frame_idx)
-                    full_path = self.current_dataset_root / rel_path
-                    if full_path.exists():
-                        img = cv2.imread(str(full_path))
-                        if img is not None:
-                            images[short_name] = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-                            img_loaded = True
-                            break
-            
-            # 策略3: 加载本地压缩视频帧
-            if not img_loaded:
-                video_files = list(self.current_dataset_root.rglob(f"**/{full_key}/*episode_{ep_idx:06d}.mp4"))
-                if video_files:
-                    video_path = video_files[0]
-                    try:
-                        reader = self.cap_cache.get(str(video_path))
-                        if not reader:
-                            reader = imageio.get_reader(str(video_path), 'ffmpeg')
-                            self.cap_cache[str(video_path)] = reader
-                        images[short_name] = reader.get_data(frame_idx)
-                    except Exception:
-                        pass
-
-        # 状态读取适配
-        state_mapping = self.base_map if self.base_map else {"action": "action", "qpos": "observation.state"}
-        state = {std_name: np.array(row[df_col]) for std_name, df_col in state_mapping.items() if df_col in row}
-
-        return FrameData(timestamp=float(row.get("timestamp", index / self.fps)), images=images, state=state)
+            if encoded is not None:
+                data = self._load_encoded(index, short_name, full_key, ep_idx, frame_idx)
+                if data is not None:
+                    encoded[short_name] = data
+                    continue
+            # 轨迹内行号作为帧缓存 key，与 _frame_cache_scope (文件 + 行区间) 组合后唯一
+            img = self._cached_image(short_name, index, lambda: self._load_camera(index, short_name, full_key, ep_idx, frame_idx))
+            if img is not None:
+                images[short_name] = img
+        return images
+
+    def _load_encoded(self, index: int, short_name: str, full_key: str, ep_idx: int, frame_idx: int) -> Optional[bytes]:
+        """内嵌在 parquet 中的图像字节或图片文件的原始内容；视频帧返回 None"""
+        column = self.image_columns.get(full_key)
+        raw = column[index].as_py() if column is not None else None
+        if isinstance(raw, bytes): return raw
+        if self.image_path_tpl:
+            for key_variant in [short_name, full_key]:
+                full_path = self.current_dataset_root / self.image_path_tpl.format(image_key=key_variant, episode_index=ep_idx, frame_index=frame_idx)
+                if full_path.exists():
+                    return full_path.read_bytes()
+        return None
+
+    def _load_camera(self, index: int, short_name: str, full_key: str, ep_idx: int, frame_idx: int) -> Optional[np.ndarray]:
+        # 策略1: 检查 Parquet 数据列中是否本身就存了 raw bytes（针对无图床的情况），只取这一行
+        column = self.image_columns.get(full_key)
+        raw = column[index].as_py() if column is not None else None
+        if isinstance(raw, bytes):
+            img_data = decode_image(raw, self.preview_scale)
+            if img_data is not None:
+                return img_data
+
+        # 策略2: 基于模版组装图片路径
+        if self.image_path_tpl:
+            for key_variant in [short_name, full_key]:
+                rel_path = self.image_path_tpl.format(image_key=key_variant, episode_index=ep_idx, frame_index=frame_idx)
+                full_path = self.current_dataset_root / rel_path
+                if full_path.exists():
+                    img = read_image(full_path, self.preview_scale)
+                    if img is not None:
+                        return img
         
+        # 策略3: 加载本地压缩视频帧，按 parquet 的 timestamp 精确定位 (无该列时按 frame_index / fps)
+        video_path = self._resolve_video(full_key, ep_idx)
+        if video_path is not None:
+            try:
+                reader = self.cap_cache.get(str(video_path))
+                if not reader:
+                    reader = SequentialVideoReader(str(video_path), self.fps)
+                    self.cap_cache[str(video_path)] = reader
+                timestamp = float(self.timestamps[index]) if self.timestamps is not None else frame_idx / self.fps
+                return reader.get(timestamp + self.video_offsets.get(full_key, 0.0), self.preview_scale)
+            except Exception:
+                pass
+        return None
+
+    def _resolve_video(self, full_key: str, ep_idx: int) -> Optional[Path]:
+        """
+        视频路径解析，结果按 (相机, 轨迹) 缓存，逐帧读取只是一次字典查询。
+        优先用 info.json 的 video_path 模板直接拼出路径，失败时回退到整个数据集只遍历一次的索引。
+        """
+        key = (full_key, ep_idx)
+        if key in self.video_files:
+            return self.video_files[key]
+
+        video_path = None
+        if self.video_path_tpl:
+            try:
+                candidate = self.current_dataset_root / self.video_path_tpl.format(
+                    episode_chunk=ep_idx // self.chunks_size, video_key=full_key, episode_index=ep_idx)
+                if candidate.exists(): video_path = candidate
+            except (KeyError, IndexError, ValueError):
+                pass
+        if video_path is None:
+            video_path = self._video_walk(self.current_dataset_root).get(key)
+
+        self.video_files[key] = video_path
+        return video_path
+
+    def _video_walk(self, dataset_root: Path) -> Dict[tuple, Path]:
+        """等价于原先的 rglob("**/{full_key}/*episode_{ep:06d}.mp4")，但每个数据集只遍历一次"""
+        index = self._video_walk_index.get(dataset_root)
+        if index is None:
+            index = {}
+            pattern = re.compile(r"episode_(\d{6})\.mp4$")
+            for root_path, dirs, files in os.walk(dataset_root):
+                dirs.sort()
+                parent = os.path.basename(root_path)
+                for f in sorted(files):
+                    m = pattern.search(f)
+                    if m: index.setdefault((parent, int(m.group(1))), Path(root_path) / f)
+            self._video_walk_index[dataset_root] = index
+        return index
+
+    def get_frames(self, indices: Sequence[int], cameras: Optional[List[str]] = None) -> FrameBatch:
+        """批量读取：状态数组一次 fancy indexing 得到 (N, D)，图像逐帧加载；透传模式走逐帧的默认实现"""
+        if self.keep_encoded_images: return super().get_frames(indices, cameras)
+        rows = self._check_indices(indices, self._length)
+        if len(rows) == 0: return FrameBatch(indices=[], timestamps=np.zeros(0))
+        valid = rows.tolist()
+        keys_to_fetch = cameras if cameras else self.image_keys
+
+        state = {}
+        for std_name, arr in self.state_arrays.items():
+            state[std_name] = arr[rows] if arr.dtype != object else FrameBatch.stack(list(arr[rows]))
+
+        per_frame = [self._load_images(i, keys_to_fetch) for i in valid]
+        cams = list(dict.fromkeys(k for imgs in per_frame for k in imgs))
+        images = {cam: FrameBatch.stack([imgs.get(cam) for imgs in per_frame]) for cam in cams}
+
+        if self.timestamps is not None:
+            timestamps = self.timestamps[rows]
+        else:
+            timestamps = rows.astype(np.float64) / self.fps
+        return FrameBatch(indices=valid, timestamps=timestamps, images=images, state=state)
+        
+    def get_snapshot_frames(self, fractions: Sequence[float], camera: Optional[str] = None,
+                            episode_idx: Optional[int] = None) -> EpisodeSnapshot:
+        """
+        只读取采样行所在的 row group (不读整条轨迹的状态/图像列)，视频帧 seek 到最近关键帧解码。
+        读取在一个共享元数据的临时读取器上完成，不切换当前轨迹。
+        """
+        if episode_idx is None or episode_idx == self.current_episode_idx:
+            return super().get_snapshot_frames(fractions, camera)
+        if episode_idx < 0 or episode_idx >= len(self.episodes_meta):
+            return EpisodeSnapshot.empty()
+
+        snap = LeRobotAdapter(self.config)
+        snap.preview_scale = self.preview_scale
+        snap.episodes_meta = self.episodes_meta
+        snap._video_walk_index = self._video_walk_index
+        snap.current_episode_idx = episode_idx
+        try:
+            ep_meta = snap._select_episode_meta(episode_idx)
+            row_range = ep_meta.get("row_range")
+            if row_range:
+                length = row_range[1] - row_range[0]
+            else:
+                length = pq.ParquetFile(str(ep_meta["parquet"]), memory_map=True).metadata.num_rows
+            idx = self._snapshot_indices(fractions, length)
+            if not idx:
+                return EpisodeSnapshot.empty(snap.get_current_episode_path(), length)
+            full_keys = dict(snap.full_feature_keys)
+
+            def read(cam: str) -> FrameBatch:
+                # 只保留目标相机，_read_columns 不会读取其他相机的内嵌图像列
+                snap.full_feature_keys = {cam: full_keys[cam]}
+                snap._read_columns(ep_meta["parquet"], row_range, rows=idx)
+                frames = []
+                for pos, i in enumerate(idx):
+                    ep = int(snap.episode_indices[pos]) if snap.episode_indices is not None else 0
+                    frame_idx = int(snap.frame_indices[pos]) if snap.frame_indices is not None else i
+                    # 与 get_frame 一致：透传模式下已是压缩图像的帧直接取原始字节
+                    data = snap._load_encoded(pos, cam, full_keys[cam], ep, frame_idx) if self.keep_encoded_images else None
+                    img = snap._load_camera(pos, cam, full_keys[cam], ep, frame_idx) if data is None else None
+                    timestamp = float(snap.timestamps[pos]) if snap.timestamps is not None else i / snap.fps
+                    frames.append(FrameData(timestamp=timestamp, images={cam: img} if img is not None else {},
+                                            encoded_images={cam: data} if data is not None else None))
+                return FrameBatch.from_frames(idx, frames)
+
+            camera, batch = self._read_snapshot_camera(self._snapshot_cameras(snap.image_keys, camera), read)
+            return EpisodeSnapshot(snap.get_current_episode_path(), length, camera, batch)
+        finally:
+            snap.close()
+
+    def _frame_cache_scope(self) -> Optional[str]:
+        # 多条轨迹可能共用同一个数据集根目录或同一个 parquet，以文件 + 行区间区分
+        if self.episodes_meta and 0 <= self.current_episode_idx < len(self.episodes_meta):
+            ep_meta = self.episodes_meta[self.current_episode_idx]
+            row_range = ep_meta.get("row_range")
+            return f"{ep_meta['parquet']}#{row_range[0]}" if row_range else str(ep_meta["parquet"])
+        return None
+
     def get_current_episode_path(self) -> str:
         return str(self.current_dataset_root) if self.dorobot_version and self.current_dataset_root else None
             
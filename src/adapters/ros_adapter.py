@@ -2,16 +2,24 @@
 from pathlib import Path
 import numpy as np
 import cv2
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence
 
 from mcap.reader import make_reader
 from rosbags.highlevel import AnyReader
 from rosbags.typesys import Stores, get_typestore
-from src.core.interface import BaseDatasetReader, FrameData, AdapterConfig
+from src.core.interface import BaseDatasetReader, FrameData, FrameBatch, AdapterConfig, EpisodeSnapshot
+from src.core.mcap_index import McapChunkIndex
 from src.core.registry import AdapterRegistry
+from src.core.episode_pool import EpisodeHandlePool
+from src.core.image_codec import decode_image, downscale
 
 @AdapterRegistry.register("ROS")
 class RosAdapter(BaseDatasetReader):
+    _episode_state_attrs = ("reader", "is_mcap", "chunk_index", "mcap_messages", "topic_times",
+                            "topic_offsets", "image_topics", "timestamps", "_length")
+
+    MATCH_POLICIES = ("nearest", "latest")
+
     def __init__(self, config: Optional[AdapterConfig] = None):
         super().__init__(config)
         self.root_path = None
@@ -25,10 +33,28 @@ class RosAdapter(BaseDatasetReader):
         
         extra_opts = getattr(self.config, 'extra_options', {}) or {}
         self.ignore_topics = extra_opts.get("ignore_topics", [])
+        # 帧匹配策略: 时间窗口 (毫秒) 内每个相机取一条消息，"nearest" 取离目标时间最近的一条，
+        # "latest" 取窗口内时间最晚的一条。旧名称 "window" 实际效果即 latest (每个相机只保留一张图)，作为别名保留
+        self.match_window_ns = int(float(extra_opts.get("match_window_ms", 50)) * 10**6)
+        self.match_policy = extra_opts.get("match_policy", "nearest")
+        if self.match_policy == "window":
+            print("⚠️ [ROS] match_policy=\"window\" 已更名为 \"latest\" (窗口内最新的一条)")
+            self.match_policy = "latest"
+        if self.match_policy not in self.MATCH_POLICIES:
+            print(f"⚠️ [ROS] 未知的 match_policy={self.match_policy}，使用 nearest")
+            self.match_policy = "nearest"
+        # 懒加载模式: 只读 MCAP Summary/Chunk 索引，按需解压 Chunk (LRU 缓存 chunk_cache_size 个)
+        self.lazy_mcap = bool(extra_opts.get("lazy_mcap", False))
+        self.chunk_cache_size = int(extra_opts.get("chunk_cache_size", 8))
+        self.chunk_index: Optional[McapChunkIndex] = None
+        self.episode_pool = EpisodeHandlePool.from_options(extra_opts)
         
         self.image_topics = []
         self.timestamps = []
         self.mcap_messages = []
+        # MCAP 时间索引: topic -> 有序时间戳数组 / 该 topic 在 mcap_messages 中的起始偏移
+        self.topic_times: Dict[str, np.ndarray] = {}
+        self.topic_offsets: Dict[str, int] = {}
         self.typestore = get_typestore(Stores.ROS2_HUMBLE)
         self._length = 0
         
@@ -53,20 +79,30 @@ class RosAdapter(BaseDatasetReader):
 
     def set_episode(self, episode_idx: int):
         if episode_idx < 0 or episode_idx >= len(self.episode_files): return
+        pooled = self._checkout_episode(self.episode_files[episode_idx])
+        self._close_episode()
         self.current_episode_idx = episode_idx
-        self.close()
+        if pooled is not None:
+            self._apply_episode_state(pooled)
+            print(f"♻️ [ROS] 复用已解析的数据包 {episode_idx}: {self._length} 帧")
+            return
         
         target_file = self.episode_files[episode_idx]
         str_path = str(target_file.absolute())
         
         self.mcap_messages = []
+        self.topic_times = {}
+        self.topic_offsets = {}
         self.image_topics = []
         self.timestamps = []
         self._length = 0
         all_found_topics = {}
 
         try:
-            if target_file.suffix.lower() == '.mcap':
+            if target_file.suffix.lower() == '.mcap' and self.lazy_mcap and self._load_mcap_index(target_file):
+                self.is_mcap = True
+                self._build_time_index()
+            elif target_file.suffix.lower() == '.mcap':
                 self.is_mcap = True
                 with open(str_path, "rb") as f:
                     reader = make_reader(f)
@@ -77,8 +113,9 @@ class RosAdapter(BaseDatasetReader):
                             all_found_topics[topic_name] = msg_type
                         
                         if 'image' in topic_name.lower() or 'image' in msg_type.lower():
-                            self.mcap_messages.append({'topic': topic_name, 'publish_time': message.publish_time, 'data': message.data, 'msgtype': msg_type})
+                            self.mcap_messages.append({'topic': topic_name, 'log_time': message.log_time, 'data': message.data, 'msgtype': msg_type})
                 self.image_topics = [t for t in all_found_topics.keys() if 'image' in t.lower()]
+                self._build_time_index()
             else:
                 self.is_mcap = False
                 self.reader = AnyReader([target_file], default_typestore=self.typestore)
@@ -86,18 +123,13 @@ class RosAdapter(BaseDatasetReader):
                 self.image_topics = [c.topic for c in self.reader.connections if 'Image' in c.msgtype]
 
             # 应用过滤与 Config 的映射关系
-            if self.ignore_topics:
-                self.image_topics = [t for t in self.image_topics if not any(kw in t.lower() for kw in self.ignore_topics)]
-
-            if self.camera_map:
-                target_topics = list(self.camera_map.values())
-                self.image_topics = [t for t in self.image_topics if t in target_topics or f"/{t}" in target_topics]
+            self.image_topics = self._filter_image_topics(self.image_topics)
 
             if not self.image_topics: return
             
             primary = self.image_topics[0]
             if self.is_mcap:
-                self.timestamps = sorted([m['publish_time'] for m in self.mcap_messages if m['topic'] == primary])
+                self.timestamps = self.topic_times.get(primary, np.array([], dtype=np.int64))
             else:
                 conns = [c for c in self.reader.connections if c.topic == primary]
                 self.timestamps = sorted([ts for _, ts, _ in self.reader.messages(connections=conns)])
@@ -105,7 +137,74 @@ class RosAdapter(BaseDatasetReader):
             self._length = len(self.timestamps)
         except Exception as e:
             print(f"🚨 [ROS 警告] 轨迹加载失败: {e}")
-            self.close()
+            self._close_episode()
+
+    def _filter_image_topics(self, topics: List[str]) -> List[str]:
+        if self.ignore_topics:
+            topics = [t for t in topics if not any(kw in t.lower() for kw in self.ignore_topics)]
+        if self.camera_map:
+            target_topics = list(self.camera_map.values())
+            topics = [t for t in topics if t in target_topics or f"/{t}" in target_topics]
+        return topics
+
+    def _load_mcap_index(self, target_file: Path) -> bool:
+        """懒加载: 仅登记每条图像消息所在的 Chunk 与偏移，不读取图像内容"""
+        index = McapChunkIndex(target_file, cache_size=self.chunk_cache_size)
+        if not index.open(): return False
+        if not any(ci.message_index_offsets for ci in index.chunk_indexes):
+            print(f"⚠️ [ROS] {target_file.name} 缺少 MessageIndex，回退为全量读取")
+            index.close()
+            return False
+
+        all_found_topics = index.topics()
+        image_topics = [t for t, msg_type in all_found_topics.items() if 'image' in t.lower() or 'image' in msg_type.lower()]
+        for topic, entries in index.build_message_index(image_topics).items():
+            msg_type = all_found_topics[topic]
+            for log_time, chunk_idx, offset in entries:
+                # Chunk 索引只记录 log_time；全量读取与快照快速路径同样以 log_time 作为时间轴 (.bag 的记录时间亦即 log time)
+                self.mcap_messages.append({'topic': topic, 'log_time': log_time, 'chunk': chunk_idx, 'offset': offset, 'msgtype': msg_type})
+        self.image_topics = [t for t in all_found_topics.keys() if 'image' in t.lower()]
+        self.chunk_index = index
+        return True
+
+    def _message_payload(self, m: Dict[str, Any]) -> bytes:
+        if 'data' in m: return m['data']
+        return self.chunk_index.read_message(m['chunk'], m['offset']).data
+
+    def _build_time_index(self):
+        """按 (topic, 时间) 排序消息，并为每个 topic 建立有序时间戳数组与偏移量"""
+        self.mcap_messages.sort(key=lambda m: (m['topic'], m['log_time']))
+        self.topic_times = {}
+        self.topic_offsets = {}
+        start = 0
+        for i in range(1, len(self.mcap_messages) + 1):
+            if i == len(self.mcap_messages) or self.mcap_messages[i]['topic'] != self.mcap_messages[start]['topic']:
+                topic = self.mcap_messages[start]['topic']
+                self.topic_times[topic] = np.array([m['log_time'] for m in self.mcap_messages[start:i]], dtype=np.int64)
+                self.topic_offsets[topic] = start
+                start = i
+
+    def _lookup_messages(self, topic: str, target_time: int) -> List[Dict[str, Any]]:
+        """O(log N) 查找 topic 在目标时间附近的消息 (searchsorted)，按 match_policy 至多返回一条"""
+        times = self.topic_times.get(topic)
+        if times is None: return []
+        pos = self._match_position(times, target_time)
+        return [] if pos is None else [self.mcap_messages[self.topic_offsets[topic] + pos]]
+
+    def _match_position(self, times: np.ndarray, target_time: int) -> Optional[int]:
+        """在有序时间戳数组中按 match_policy 选出与 target_time 匹配的下标，窗口内没有消息时返回 None"""
+        if len(times) == 0: return None
+        window = self.match_window_ns
+
+        if self.match_policy == "latest":
+            lo = int(np.searchsorted(times, target_time - window, side='right'))
+            hi = int(np.searchsorted(times, target_time + window, side='left'))
+            return hi - 1 if hi > lo else None
+
+        pos = int(np.searchsorted(times, target_time))
+        candidates = [i for i in (pos - 1, pos) if 0 <= i < len(times)]
+        best = min(candidates, key=lambda i: abs(int(times[i]) - target_time))
+        return best if abs(int(times[best]) - target_time) < window else None
 
     def get_total_episodes(self) -> int: return len(self.episode_files)
     def get_length(self) -> int: return self._length
@@ -125,8 +224,8 @@ class RosAdapter(BaseDatasetReader):
 
     def get_frame(self, index: int, specific_cameras: Optional[List[str]] = None) -> FrameData:
         if index < 0 or index >= self._length: return None
-        target_time = self.timestamps[index]
-        window = 50 * 10**6
+        target_time = int(self.timestamps[index])
+        window = self.match_window_ns
         images = {}
 
         keys_to_fetch = specific_cameras if specific_cameras else self.get_all_sensors()
@@ -138,46 +237,143 @@ class RosAdapter(BaseDatasetReader):
         else:
             allowed_topics = [t for t in self.image_topics if t.lstrip('/') in keys_to_fetch]
 
+        encoded = {}
         if self.is_mcap:
-            for m in self.mcap_messages:
-                if m['topic'] in allowed_topics and abs(m['publish_time'] - target_time) < window:
+            for topic in dict.fromkeys(allowed_topics):
+                for m in self._lookup_messages(topic, target_time):
                     try:
-                        msg = self.typestore.deserialize_cdr(m['data'], m['msgtype'])
+                        msg = self.typestore.deserialize_cdr(self._message_payload(m), m['msgtype'])
+                        if self.keep_encoded_images and hasattr(msg, 'format'):
+                            encoded[self._get_standard_cam_name(m['topic'])] = bytes(msg.data)
+                            continue
                         img = self._process_ros_msg(msg)
                         if img is not None: images[self._get_standard_cam_name(m['topic'])] = img
                     except Exception: pass
         else:
             conns = [c for c in self.reader.connections if c.topic in allowed_topics]
+            best_rank = {}
             for conn, ts, rawdata in self.reader.messages(connections=conns, start=target_time-window, stop=target_time+window):
+                # 每个 topic 只保留一条: nearest 取 |dt| 最小，latest 取时间最晚
+                dt = abs(ts - target_time)
+                if dt >= window: continue
+                rank = dt if self.match_policy == "nearest" else -ts
+                if conn.topic in best_rank and rank >= best_rank[conn.topic]: continue
                 try:
                     msg = self.reader.deserialize(rawdata, conn.msgtype)
+                    # CompressedImage 的 data 就是 JPEG/PNG 字节，透传模式下不解码
+                    if self.keep_encoded_images and hasattr(msg, 'format'):
+                        encoded[self._get_standard_cam_name(conn.topic)] = bytes(msg.data)
+                        best_rank[conn.topic] = rank
+                        continue
                     img = self._process_ros_msg(msg)
-                    if img is not None: images[self._get_standard_cam_name(conn.topic)] = img
+                    if img is not None:
+                        images[self._get_standard_cam_name(conn.topic)] = img
+                        best_rank[conn.topic] = rank
                 except Exception: pass
         
-        return FrameData(timestamp=float(target_time)/1e9, images=images, state={})
+        return FrameData(timestamp=float(target_time)/1e9, images=images, state={}, encoded_images=encoded or None)
+
+    def get_snapshot_frames(self, fractions: Sequence[float], camera: Optional[str] = None,
+                            episode_idx: Optional[int] = None) -> EpisodeSnapshot:
+        """
+        MCAP 快速路径：只读 Summary 与主时间轴/目标相机两个 topic 的 MessageIndex，
+        再解压采样帧所在的 Chunk，不遍历整个数据包，也不切换当前轨迹。
+        .bag 或未建立 Chunk 索引的 MCAP 回退到默认实现。
+        """
+        if episode_idx is None or episode_idx == self.current_episode_idx:
+            return super().get_snapshot_frames(fractions, camera)
+        if episode_idx < 0 or episode_idx >= len(self.episode_files):
+            return EpisodeSnapshot.empty()
+        target_file = self.episode_files[episode_idx]
+        if target_file.suffix.lower() != '.mcap':
+            return super().get_snapshot_frames(fractions, camera, episode_idx)
+
+        index = McapChunkIndex(target_file, cache_size=2)
+        try:
+            if not index.open() or not any(ci.message_index_offsets for ci in index.chunk_indexes):
+                return super().get_snapshot_frames(fractions, camera, episode_idx)
+            all_found_topics = index.topics()
+            image_topics = self._filter_image_topics([t for t in all_found_topics if 'image' in t.lower()])
+            if not image_topics:
+                return EpisodeSnapshot.empty(str(target_file))
+
+            names = {self._get_standard_cam_name(t): t for t in image_topics}
+            primary = image_topics[0]
+            times = np.array([e[0] for e in index.build_message_index([primary]).get(primary, [])], dtype=np.int64)
+            idx = self._snapshot_indices(fractions, len(times))
+            if not idx:
+                return EpisodeSnapshot.empty(str(target_file), len(times))
+
+            def read(cam: str) -> FrameBatch:
+                cam_topic = names[cam]
+                cam_entries = index.build_message_index([cam_topic]).get(cam_topic, [])
+                cam_times = np.array([e[0] for e in cam_entries], dtype=np.int64)
+                frames = []
+                for i in idx:
+                    target_time = int(times[i])
+                    img, data = None, None
+                    best = self._match_position(cam_times, target_time)
+                    if best is not None:
+                        _, chunk_idx, offset = cam_entries[best]
+                        try:
+                            msg = self.typestore.deserialize_cdr(index.read_message(chunk_idx, offset).data, all_found_topics[cam_topic])
+                            # CompressedImage 的 data 就是 JPEG/PNG 字节，透传模式下不解码
+                            if self.keep_encoded_images and hasattr(msg, 'format'):
+                                data = bytes(msg.data)
+                            else:
+                                img = self._process_ros_msg(msg)
+                        except Exception: pass
+                    frames.append(FrameData(timestamp=target_time / 1e9, images={cam: img} if img is not None else {}, state={},
+                                            encoded_images={cam: data} if data is not None else None))
+                return FrameBatch.from_frames(idx, frames)
+
+            camera, batch = self._read_snapshot_camera(self._snapshot_cameras(list(names.keys()), camera), read)
+            return EpisodeSnapshot(str(target_file), len(times), camera, batch)
+        finally:
+            index.close()
 
     def _process_ros_msg(self, msg) -> np.ndarray:
+        """CompressedImage 按 preview_scale 缩小解码，原始 Image 转换后再缩放"""
         try:
-            img_raw = np.frombuffer(msg.data, dtype=np.uint8)
             if hasattr(msg, 'format'):
-                frame = cv2.imdecode(img_raw, cv2.IMREAD_COLOR)
-                return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) if frame is not None else None
-            h, w = msg.height, msg.width
-            encoding = getattr(msg, 'encoding', 'rgb8').lower()
-            if '16' in encoding: img_raw = np.frombuffer(msg.data, dtype=np.uint16)
-            if 'bayer' in encoding: return cv2.cvtColor(img_raw.reshape(h, w), cv2.COLOR_BayerBG2RGB)
-            elif 'rgb' in encoding: return img_raw.reshape(h, w, 3)
-            elif 'bgr' in encoding: return cv2.cvtColor(img_raw.reshape(h, w, 3), cv2.COLOR_BGR2RGB)
-            elif 'mono' in encoding: return img_raw.reshape(h, w)
-            else: return img_raw.reshape(h, w, -1)
+                return decode_image(msg.data, self.preview_scale)
+            return downscale(self._raw_ros_image(msg), self.preview_scale)
         except: return None
 
+    @staticmethod
+    def _raw_ros_image(msg) -> np.ndarray:
+        img_raw = np.frombuffer(msg.data, dtype=np.uint8)
+        h, w = msg.height, msg.width
+        encoding = getattr(msg, 'encoding', 'rgb8').lower()
+        if '16' in encoding: img_raw = np.frombuffer(msg.data, dtype=np.uint16)
+        if 'bayer' in encoding: return cv2.cvtColor(img_raw.reshape(h, w), cv2.COLOR_BayerBG2RGB)
+        elif 'rgb' in encoding: return img_raw.reshape(h, w, 3)
+        elif 'bgr' in encoding: return cv2.cvtColor(img_raw.reshape(h, w, 3), cv2.COLOR_BGR2RGB)
+        elif 'mono' in encoding: return img_raw.reshape(h, w)
+        else: return img_raw.reshape(h, w, -1)
+
     def get_current_episode_path(self) -> str:
         if self.episode_files and 0 <= self.current_episode_idx < len(self.episode_files): return str(self.episode_files[self.current_episode_idx])
         return None
 
+    @staticmethod
+    def _release_episode_state(state: Dict[str, Any]):
+        if state.get("chunk_index"): state["chunk_index"].close()
+        if state.get("reader"):
+            try: state["reader"].close()
+            except: pass
+
     def close(self):
+        """关闭读取器：当前轨迹放回句柄池后归还对池的使用 (最后一个读取器关闭时池中句柄全部关闭)"""
+        self._close_episode()
+        self._detach_episode_pool()
+
+    def _close_episode(self):
+        """切换轨迹前释放当前轨迹；启用句柄池时句柄移入池中而不是关闭"""
+        self._stash_episode()
+        if self.chunk_index:
+            self.chunk_index.close()
+            self.chunk_index = None
         if self.reader:
             try: self.reader.close()
             except: pass
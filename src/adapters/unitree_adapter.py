@@ -1,14 +1,17 @@
 # src/adapters/unitree_adapter.py
 import json
 import numpy as np
-import cv2
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 from src.core.interface import BaseDatasetReader, FrameData, AdapterConfig
 from src.core.registry import AdapterRegistry
+from src.core.frame_cache import FrameCache
+from src.core.image_codec import read_image
 
 @AdapterRegistry.register("Unitree")
 class UnitreeAdapter(BaseDatasetReader):
+    supports_concurrent_reads = True
+
     def __init__(self, config: Optional[AdapterConfig] = None):
         super().__init__(config)
         self.root_path = None
@@ -20,6 +23,9 @@ class UnitreeAdapter(BaseDatasetReader):
         self.arm_groups = getattr(self.config, 'arm_groups', {}) or {}
         self.base_map = getattr(self.config, 'state_keys_map', {}) or {}
         
+        extra_opts = getattr(self.config, 'extra_options', {}) or {}
+        self.frame_cache = FrameCache.from_options(extra_opts)
+        
         self.fps = 30.0
         self.image_keys = []
         
@@ -97,8 +103,8 @@ class UnitreeAdapter(BaseDatasetReader):
                     if rel_path:
                         fp = self.current_dir / rel_path
                         if fp.exists():
-                            img = cv2.imread(str(fp))
-                            if img is not None: images[std_cam_name] = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+                            img = self._cached_image(std_cam_name, index, lambda: self._read_image(fp, self.preview_scale))
+                            if img is not None: images[std_cam_name] = img
 
         state = {}
         try:
@@ -118,6 +124,10 @@ class UnitreeAdapter(BaseDatasetReader):
 
         return FrameData(timestamp=frame_dict.get("idx", index)/self.fps, images=images, state=state)
     
+    @staticmethod
+    def _read_image(fp: Path, scale: int = 1) -> Optional[np.ndarray]:
+        return read_image(fp, scale)
+
     def get_current_episode_path(self) -> str:
         if self.episode_files and 0 <= self.current_episode_idx < len(self.episode_files):
             return str(self.episode_files[self.current_episode_idx].parent)
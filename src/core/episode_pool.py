@@ -0,0 +1,142 @@
+# src/core/episode_pool.py
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+
+def estimate_nbytes(obj: Any, _depth: int = 0) -> int:
+    """粗略估计已解析轨迹状态占用的内存 (数组/字节/容器递归求和，对象可提供 nbytes 属性)"""
+    if obj is None or _depth > 4: return 0
+    if isinstance(obj, np.ndarray): return obj.nbytes
+    if isinstance(obj, (bytes, bytearray, memoryview)): return len(obj)
+    if isinstance(obj, str): return len(obj)
+    if isinstance(obj, dict): return sum(estimate_nbytes(v, _depth + 1) for v in obj.values())
+    if isinstance(obj, (list, tuple, set)): return sum(estimate_nbytes(v, _depth + 1) for v in obj)
+    nbytes = getattr(obj, "nbytes", None)
+    return int(nbytes) if isinstance(nbytes, (int, np.integer)) else 0
+
+
+def empty_like(value: Any) -> Any:
+    """状态移入池后给适配器属性换上的空值，避免 close() 原地清空池中的对象"""
+    if isinstance(value, bool): return False
+    if isinstance(value, (int, float)): return type(value)(0)
+    if isinstance(value, np.ndarray): return np.zeros((0,) * max(1, value.ndim), dtype=value.dtype)
+    if isinstance(value, OrderedDict): return OrderedDict()
+    if isinstance(value, dict): return {}
+    if isinstance(value, list): return []
+    return None
+
+
+class EpisodeHandlePool:
+    """
+    已打开/已解析轨迹的 LRU 池 (文件句柄、MCAP 索引、解码流、预读状态等)。
+    适配器切换轨迹或关闭时把当前轨迹的状态 checkin 到池中，再次访问同一轨迹时 checkout 直接复用，
+    不再重新打开与解析文件。checkout 是独占的：取出后即从池中移除，同一份句柄不会被两个读取器同时使用。
+    按条目数与估算内存双重上限淘汰，被淘汰的条目调用其 release 回调关闭句柄。
+    使用池的读取器通过 attach/detach 登记，最后一个读取器 close() 后池中剩余的句柄全部关闭，不会保持打开到进程退出。
+    """
+    _shared: Optional["EpisodeHandlePool"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_entries: int = 4, max_mb: float = 1024):
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        # key -> (state, nbytes, release)
+        self._entries: "OrderedDict[Hashable, Tuple[Dict[str, Any], int, Callable]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._owners = 0
+
+    @classmethod
+    def shared(cls, max_entries: int, max_mb: float) -> "EpisodeHandlePool":
+        """进程内共享的池，HDF5/ROS/DASMCAP 读取器共用；取各方请求中的最大上限"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls(max_entries, max_mb)
+            else:
+                cls._shared.max_entries = max(cls._shared.max_entries, int(max_entries))
+                cls._shared.max_bytes = max(cls._shared.max_bytes, int(max_mb * 1024 * 1024))
+            return cls._shared
+
+    @classmethod
+    def from_options(cls, extra_options: Optional[Dict[str, Any]]) -> Optional["EpisodeHandlePool"]:
+        """读取 extra_options["episode_pool_size"] / ["episode_pool_mb"]，未配置或 <= 0 时不启用"""
+        opts = extra_options or {}
+        size = int(opts.get("episode_pool_size", 0) or 0)
+        if size <= 0: return None
+        return cls.shared(size, float(opts.get("episode_pool_mb", 1024)))
+
+    def attach(self):
+        """登记一个使用池的读取器"""
+        with self._lock:
+            self._owners += 1
+
+    def detach(self):
+        """读取器关闭时调用；没有读取器在使用时关闭池中全部句柄"""
+        with self._lock:
+            self._owners = max(0, self._owners - 1)
+            idle = self._owners == 0
+        if idle: self.clear()
+
+    def checkout(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.current_bytes -= entry[1]
+            return entry[0]
+
+    def checkin(self, key: Hashable, state: Dict[str, Any], release: Callable[[Dict[str, Any]], None]):
+        nbytes = estimate_nbytes(state)
+        evicted = []
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+                evicted.append(old)
+            if nbytes > self.max_bytes:
+                evicted.append((state, nbytes, release))
+            else:
+                self._entries[key] = (state, nbytes, release)
+                self.current_bytes += nbytes
+                while self._entries and (len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes):
+                    _, entry = self._entries.popitem(last=False)
+                    self.current_bytes -= entry[1]
+                    evicted.append(entry)
+        # 关闭句柄可能较慢，在锁外进行
+        for entry_state, _, entry_release in evicted:
+            self._release(entry_state, entry_release)
+
+    @staticmethod
+    def _release(state: Dict[str, Any], release: Callable[[Dict[str, Any]], None]):
+        try: release(state)
+        except Exception as e: print(f"⚠️ [EpisodePool] 释放轨迹句柄失败: {e}")
+
+    def clear(self):
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+            self.current_bytes = 0
+        for state, _, release in entries:
+            self._release(state, release)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "size_mb": self.current_bytes / 1024 / 1024,
+                "max_entries": self.max_entries,
+                "max_mb": self.max_bytes / 1024 / 1024,
+                "owners": self._owners,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,8 +1,12 @@
 # src/core/factory.py
 import json
+import os
+import stat
+import threading
+from collections import OrderedDict
 from typing import Optional
 from pathlib import Path
-from typing import Tuple, Dict, Any
+from typing import Tuple, Dict, Any, List
 import src.adapters
 from src.core.registry import AdapterRegistry
 from src.core.interface import BaseDatasetReader, AdapterConfig
@@ -33,35 +37,114 @@ class ReaderFactory:
                 return False
         return True
 
+    # detect_type 的结果缓存 (LRU): 路径 -> (目录 mtime_ns, 依赖路径, 依赖路径 mtime_ns, 类型)。
+    # 依赖路径是分类时查看过的子目录 (meta/、各子目录、data/ 下遍历过的目录、colors/)，
+    # 以及决定分类的标志文件 (自身与各子目录的 meta/info.json、子目录的 data.json)。
+    # 目录本身或任一依赖目录内增删文件后 mtime 变化，缓存自动失效；标志文件按是否存在比较，
+    # 不受目录 mtime 精度影响。限制：在 mtime 精度较粗的文件系统上，与上次探测同一时间刻内
+    # 在 data/、colors/ 中新增的普通文件 (parquet/jpg) 可能察觉不到，需要 clear_type_cache()
+    _type_cache: "OrderedDict[str, Tuple[int, Tuple[str, ...], Tuple[int, ...], str]]" = OrderedDict()
+    _type_cache_lock = threading.Lock()
+    TYPE_CACHE_SIZE = 4096
+
+    @classmethod
+    def clear_type_cache(cls):
+        with cls._type_cache_lock:
+            cls._type_cache.clear()
+
     @staticmethod
-    def detect_type(path: Path) -> str:
+    def _type_by_extension(name: str) -> str:
+        ext = os.path.splitext(name)[1].lower()
+        if ext in ['.h5', '.hdf5']: return "HDF5"
+        if ext in ['.bag', '.mcap']: return "ROS"
+        if ext == '.parquet': return "LeRobot"
+        return "Unknown"
+
+    @classmethod
+    def detect_type(cls, path: Path, entries: Optional[List[os.DirEntry]] = None) -> str:
         """
         🚀 完美还原你原本的物理层级探测逻辑！
         这个方法供 src/core/inspector.py 扫描目录时使用。
+        目录只用 os.scandir 列一次，所有判断都基于这份列表；调用方已列过目录时可通过 entries 传入。
         """
-        if path.is_dir():
-            if (path / "data.json").exists(): return "Unitree"
-            if (path / "meta" / "info.json").exists(): return "LeRobot"
-            if (path / "metadata.yaml").exists(): return "ROS"
-            
-            has_loose_files = list(path.glob("*.hdf5")) or list(path.glob("*.h5")) or list(path.glob("*.bag")) or list(path.glob("*.mcap"))
-            if not has_loose_files:
-                if list(path.glob("*/meta/info.json")): return "LeRobot"
-                if list(path.glob("*/data.json")): return "Unitree"
-                if (path / "data").is_dir():
-                    try:
-                        next((path / "data").rglob("*.parquet"))
-                        return "LeRobot"
-                    except StopIteration: pass
+        path = Path(path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            st = None
+        if st is None or not stat.S_ISDIR(st.st_mode):
+            return cls._type_by_extension(path.name)
+
+        key = str(path)
+        with cls._type_cache_lock:
+            cached = cls._type_cache.get(key)
+            if cached is not None: cls._type_cache.move_to_end(key)
+        if cached is not None and cached[0] == st.st_mtime_ns and tuple(map(cls._mtime_ns, cached[1])) == cached[2]:
+            return cached[3]
+
+        if entries is None:
+            try:
+                with os.scandir(path) as it: entries = list(it)
+            except OSError:
+                return "Unknown"
+        deps: List[str] = []
+        dtype = cls._classify_dir(path, entries, deps)
+        deps = tuple(dict.fromkeys(deps))
+        with cls._type_cache_lock:
+            cls._type_cache[key] = (st.st_mtime_ns, deps, tuple(map(cls._mtime_ns, deps)), dtype)
+            cls._type_cache.move_to_end(key)
+            while len(cls._type_cache) > cls.TYPE_CACHE_SIZE:
+                cls._type_cache.popitem(last=False)
+        return dtype
+
+    @staticmethod
+    def _mtime_ns(path: str) -> int:
+        try: return os.stat(path).st_mtime_ns
+        except OSError: return -1
+
+    @staticmethod
+    def _classify_dir(path: Path, entries: List[os.DirEntry], deps: Optional[List[str]] = None) -> str:
+        """
+        与原先多次 glob 的判断顺序完全一致，仅在需要时才查看子目录。
+        deps 不为 None 时追加判断过程中查看过的子目录路径，供缓存校验。
+        """
+        deps = deps if deps is not None else []
+        names = {e.name for e in entries}
+        subdirs = [e for e in entries if e.is_dir()]
+        
+        def has_ext(*exts):
+            # 与 glob("*.ext") 一致：大小写敏感
+            return any(n.endswith(exts) for n in names)
+
+        def sub_names(d) -> set:
+            deps.append(str(d))
+            try: return set(os.listdir(d))
+            except OSError: return set()
+
+        def has_info_json(d) -> bool:
+            info = os.path.join(d, "meta", "info.json")
+            deps.extend((os.path.join(d, "meta"), info))
+            return os.path.exists(info)
+
+        if "data.json" in names: return "Unitree"
+        if "meta" in names and has_info_json(str(path)): return "LeRobot"
+        if "metadata.yaml" in names: return "ROS"
+        
+        if not has_ext(".hdf5", ".h5", ".bag", ".mcap"):
+            listings = [(d, sub_names(d.path)) for d in subdirs]
+            for d in subdirs:
+                deps.extend((os.path.join(d.path, "meta", "info.json"), os.path.join(d.path, "data.json")))
+            if any("meta" in sn and has_info_json(d.path) for d, sn in listings): return "LeRobot"
+            if any("data.json" in sn for _, sn in listings): return "Unitree"
+            if "data" in names and (path / "data").is_dir():
+                for root, _, files in os.walk(path / "data"):
+                    deps.append(root)
+                    if any(f.endswith(".parquet") for f in files): return "LeRobot"
                     
-            if list(path.glob("*.hdf5")) or list(path.glob("*.h5")): return "HDF5"
-            if list(path.glob("*.bag")) or list(path.glob("*.mcap")): return "ROS"
-            if list(path.glob("*.jpg")) or list(path.glob("*.png")) or list(path.glob("colors/*.jpg")): return "RawFolder"
-        else:
-            ext = path.suffix.lower()
-            if ext in ['.h5', '.hdf5']: return "HDF5"
-            if ext in ['.bag', '.mcap']: return "ROS"
-            if ext == '.parquet': return "LeRobot"
+        if has_ext(".hdf5", ".h5"): return "HDF5"
+        if has_ext(".bag", ".mcap"): return "ROS"
+        if has_ext(".jpg", ".png"): return "RawFolder"
+        if "colors" in names and any(n.endswith(".jpg") for n in sub_names(path / "colors")): return "RawFolder"
         
         return "Unknown"
 
@@ -0,0 +1,107 @@
+# src/core/frame_cache.py
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import numpy as np
+
+
+class FrameCache:
+    """
+    解码后图像的 LRU 缓存，按字节预算淘汰。
+    key 约定为 (轨迹路径, 相机名, 帧索引, 预览缩放倍数)，value 为解码后的 ndarray (只读)。
+    来回拖动进度条时重复访问的帧直接从内存返回，不再重新读盘/解码。
+    """
+    _shared: Optional["FrameCache"] = None
+    _shared_lock = threading.Lock()
+    # 进程内共享缓存的预算上限 (MB)，配置值再大也按此截断
+    MAX_SHARED_MB: float = 2048
+
+    def __init__(self, max_mb: float = 512):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, max_mb: float) -> "FrameCache":
+        """
+        进程内共享的缓存实例，多个适配器共用同一份预算。
+        预算取最近一次请求的值并截断到 MAX_SHARED_MB，调小时立即淘汰超出部分。
+        """
+        max_mb = min(float(max_mb), cls.MAX_SHARED_MB)
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls(max_mb)
+            else:
+                cls._shared.resize(max_mb)
+            return cls._shared
+
+    def resize(self, max_mb: float):
+        with self._lock:
+            self.max_bytes = int(max_mb * 1024 * 1024)
+            self._evict()
+
+    def _evict(self):
+        """按 LRU 淘汰到预算以内，调用方持有 _lock"""
+        while self.current_bytes > self.max_bytes and self._data:
+            _, evicted = self._data.popitem(last=False)
+            self.current_bytes -= evicted.nbytes
+
+    @classmethod
+    def from_options(cls, extra_options: Optional[Dict[str, Any]]) -> Optional["FrameCache"]:
+        """读取 extra_options["frame_cache_mb"]，未配置或 <= 0 时不启用缓存"""
+        max_mb = float((extra_options or {}).get("frame_cache_mb", 0) or 0)
+        return cls.shared(max_mb) if max_mb > 0 else None
+
+    def get(self, key: Hashable) -> Optional[np.ndarray]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Optional[np.ndarray]):
+        if value is None: return
+        value = np.asarray(value)
+        size = value.nbytes
+        # 单帧超过整个预算时不缓存，避免把其他帧全部挤出去
+        if size > self.max_bytes: return
+        # 缓存的数组会被多次返回，设为只读防止调用方原地修改
+        value.flags.writeable = False
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None: self.current_bytes -= old.nbytes
+            self._data[key] = value
+            self.current_bytes += size
+            self._evict()
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Optional[np.ndarray]]) -> Optional[np.ndarray]:
+        value = self.get(key)
+        if value is None:
+            value = loader()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "size_mb": self.current_bytes / 1024 / 1024,
+                "max_mb": self.max_bytes / 1024 / 1024,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,68 @@
+# src/core/frame_stream.py
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from src.core.interface import BaseDatasetReader, FrameData
+
+
+class FrameStream:
+    """
+    顺序播放用的后台预取帧迭代器。
+    在线程池中提前读取/解码后续 depth 帧，按原顺序产出 (index, FrameData)，
+    让磁盘读取 + 解码与调用方的 Rerun 推送重叠执行。
+
+    用法:
+        with FrameStream(reader, depth=16, workers=4) as stream:
+            for i, frame in stream:
+                viz.log_frame(frame, i)
+    """
+    def __init__(self, reader: BaseDatasetReader, indices: Optional[Sequence[int]] = None,
+                 depth: int = 8, workers: int = 2, cameras: Optional[List[str]] = None):
+        self.reader = reader
+        self.indices = list(indices) if indices is not None else list(range(reader.get_length()))
+        self.depth = max(1, int(depth))
+        # 非线程安全的 Reader 只允许一个后台线程，仍然可以与调用方的推送重叠
+        if not getattr(reader, "supports_concurrent_reads", False):
+            workers = 1
+        self.workers = max(1, int(workers))
+        self.cameras = cameras
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = deque()
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def _read(self, index: int) -> FrameData:
+        return self.reader.get_frame(index, self.cameras) if self.cameras else self.reader.get_frame(index)
+
+    def __iter__(self) -> Iterator[Tuple[int, FrameData]]:
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="FrameStream")
+        todo = iter(self.indices)
+        try:
+            for index in todo:
+                self._pending.append((index, self._executor.submit(self._read, index)))
+                if len(self._pending) >= self.depth: break
+            while self._pending:
+                index, future = self._pending.popleft()
+                # 取走一帧的同时补充一帧，队列长度维持在 depth
+                nxt = next(todo, None)
+                if nxt is not None:
+                    self._pending.append((nxt, self._executor.submit(self._read, nxt)))
+                yield index, future.result()
+        finally:
+            self.close()
+
+    def close(self):
+        for _, future in self._pending:
+            future.cancel()
+        self._pending.clear()
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
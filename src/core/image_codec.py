@@ -0,0 +1,35 @@
+# src/core/image_codec.py
+from typing import Optional, Union
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from src.core.interface import normalize_scale
+
+# 预览缩放倍数 -> OpenCV 解码标志。JPEG 在 IDCT 阶段直接输出 1/2、1/4、1/8 尺寸，
+# 解码耗时与内存随之下降；PNG 等格式由 OpenCV 解码后再缩小
+_REDUCED_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+def decode_image(data: Union[bytes, np.ndarray], scale: int = 1) -> Optional[np.ndarray]:
+    """解码 JPEG/PNG 字节为 RGB，scale > 1 时按倍数缩小解码"""
+    img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), _REDUCED_FLAGS[normalize_scale(scale)])
+    return cv2.cvtColor(img, cv2.COLOR_BGR2RGB) if img is not None else None
+
+def read_image(path: Union[str, Path], scale: int = 1) -> Optional[np.ndarray]:
+    """读取图片文件为 RGB，scale > 1 时按倍数缩小解码"""
+    img = cv2.imread(str(path), _REDUCED_FLAGS[normalize_scale(scale)])
+    return cv2.cvtColor(img, cv2.COLOR_BGR2RGB) if img is not None else None
+
+def downscale(img: Optional[np.ndarray], scale: int = 1) -> Optional[np.ndarray]:
+    """已是原始像素的图像 (HDF5 数组、ROS Image) 按倍数缩小，尺寸取整方式与 IMREAD_REDUCED_* 一致"""
+    scale = normalize_scale(scale)
+    if img is None or scale == 1: return img
+    h, w = img.shape[:2]
+    size = (max(1, -(-w // scale)), max(1, -(-h // scale)))
+    return cv2.resize(img, size, interpolation=cv2.INTER_AREA)
@@ -1,49 +1,271 @@
 # src/core/inspector.py
 import os
+import json
 from pathlib import Path
+from typing import Callable, Optional
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
 from collections import defaultdict
 from src.core.factory import ReaderFactory
-import pandas as pd
 
 class DatasetInspector:
-    def __init__(self, root_dir: str):
+    # 扫描结果持久化到数据集根目录下，重复扫描时只重新探测 mtime 变化过的目录
+    INDEX_FILENAME = ".robocoin_scan_index.json"
+    INDEX_VERSION = 2
+    DIR_TYPES = ("Unitree", "LeRobot", "RawFolder")
+    FILE_TYPES = ("HDF5", "ROS")
+
+    def __init__(self, root_dir: str, use_index: bool = True, index_path: Optional[str] = None,
+                 workers: int = 8, use_processes: bool = False,
+                 progress_callback: Optional[Callable[[int, int, str], None]] = None):
         self.root = Path(root_dir)
         self.report = []
         self.stats = defaultdict(int)
         self.grouped_datasets = defaultdict(list)  # 按类型存储有效数据集
         self.dominant_type = None
+        
+        self.use_index = use_index
+        self.index_path = Path(index_path) if index_path else self.root / self.INDEX_FILENAME
+        # 与上一次扫描相比的变化: added / removed / modified 为数据集路径列表
+        self.changes = {"added": [], "removed": [], "modified": []}
+        self.dirs_rescanned = 0
+        self.dirs_reused = 0
+        
+        # 并行扫描：每个目录的探测是一个任务，网络盘上 stat/glob 延迟可以重叠
+        # use_processes=True 时使用进程池 (本地盘 CPU 密集时更快)
+        self.workers = max(1, int(workers))
+        self.use_processes = use_processes
+        # progress_callback(已完成目录数, 已发现目录数, 当前目录相对路径)，在调用 scan 的线程中回调
+        self.progress_callback = progress_callback
 
-    def scan(self):
+    def scan(self, force: bool = False):
+        """
+        扫描目录。use_index 时读取上次的索引，目录 mtime 未变化则直接复用其探测结果，
+        只对新增/变化的目录调用 ReaderFactory.detect_type。force=True 时忽略旧索引全量重扫。
+        """
         print(f"🕵️‍♂️ 正在扫描目录: {self.root}")
+        old_dirs = {} if (force or not self.use_index) else self._load_index()
+        old_records = {r["path"]: r for entry in old_dirs.values() for r in entry["records"]}
 
-        for root_path, dirs, files in os.walk(self.root):
-            current_path = Path(root_path)
+        new_dirs = self._walk(old_dirs)
 
-            if any(part.startswith('.') for part in current_path.parts):
-                continue
+        records = sorted((r for entry in new_dirs.values() for r in entry["records"]), key=lambda r: r["path"])
+        for record in records:
+            self.stats[record["type"]] += 1
+            self._add_record(Path(record["path"]), record["type"])
+
+        if old_dirs:
+            new_paths = {r["path"] for r in records}
+            self.changes = {
+                "added": [r["path"] for r in records if r["path"] not in old_records],
+                "removed": sorted(p for p in old_records if p not in new_paths),
+                "modified": [r["path"] for r in records if r["path"] in old_records
+                             and self._record_key(r) != self._record_key(old_records[r["path"]])],
+            }
+            print(f"♻️ 增量扫描: 复用 {self.dirs_reused} 个目录，重新探测 {self.dirs_rescanned} 个目录；"
+                  f"新增 {len(self.changes['added'])}，删除 {len(self.changes['removed'])}，修改 {len(self.changes['modified'])}")
+        else:
+            self.changes = {"added": [r["path"] for r in records], "removed": [], "modified": []}
+
+        if self.use_index:
+            self._save_index(new_dirs)
+
+    @staticmethod
+    def _record_key(record: dict) -> tuple:
+        return record["size"], record["mtime"], record.get("episodes")
+
+    def _walk(self, old_dirs: dict) -> dict:
+        """
+        以目录为单位把探测任务分发到线程池/进程池，子目录在父目录完成后提交。
+        结果按相对路径存入字典，最终排序合并，与任务完成顺序无关。
+        """
+        pool_cls = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+        new_dirs = {}
+        with pool_cls(max_workers=self.workers) as executor:
+            pending = {executor.submit(_visit_dir, str(self.root), old_dirs.get(".")): "."}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    rel = pending.pop(future)
+                    entry, reused = future.result()
+                    if entry is None: continue
+                    new_dirs[rel] = entry
+                    if reused: self.dirs_reused += 1
+                    else: self.dirs_rescanned += 1
+                    for name in entry["subdirs"]:
+                        sub_rel = name if rel == "." else f"{rel}/{name}"
+                        pending[executor.submit(_visit_dir, str(self.root / sub_rel), old_dirs.get(sub_rel))] = sub_rel
+                    if self.progress_callback:
+                        self.progress_callback(len(new_dirs), len(new_dirs) + len(pending), rel)
+        return new_dirs
+
+    @classmethod
+    def _visit(cls, path: Path, cached: Optional[dict]):
+        """处理单个目录，返回 (entry, 是否复用了旧索引)；目录不可访问时 entry 为 None"""
+        try:
+            dir_mtime = os.stat(path).st_mtime
+        except OSError:
+            return None, False
+
+        if cached is not None and cached["mtime"] == dir_mtime:
+            # 目录项未增删：沿用上次的类型与子目录，只对已知数据集重新 stat 以发现内容修改
+            records = [r for r in (cls._refresh_record(r) for r in cached["records"]) if r is not None]
+            return {"mtime": dir_mtime, "subdirs": cached["subdirs"], "records": records}, True
+        return cls._probe_dir(path, dir_mtime), False
 
-            dtype = ReaderFactory.detect_type(current_path)
+    @classmethod
+    def _probe_dir(cls, path: Path, dir_mtime: float) -> dict:
+        # 目录只列一次，同一份列表同时用于类型探测和散落文件的分类
+        try:
+            with os.scandir(path) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            entries = []
+        dtype = ReaderFactory.detect_type(path, entries=entries)
 
-            # 策略 A: 结构化数据集或图片文件夹，自身闭环
-            if dtype in ("Unitree", "LeRobot", "RawFolder"):
-                self.stats[dtype] += 1
-                self._add_record(current_path, dtype)
-                
-                # 💡 修复点：无论是这三种哪一个，都不要再往下遍历它的子目录了
-                dirs[:] = []
+        # 策略 A: 结构化数据集或图片文件夹，自身闭环，不再往下遍历它的子目录
+        if dtype in cls.DIR_TYPES:
+            return {"mtime": dir_mtime, "subdirs": [], "records": [cls._make_record(path, dtype)]}
+
+        # 策略 B: 处理散落的文件 (HDF5 / ROS)
+        records, subdirs = [], []
+        for e in entries:
+            if e.name.startswith("."): continue
+            if e.is_dir():
+                # 与 os.walk 一致：不跟随指向目录的软链接
+                if not e.is_symlink(): subdirs.append(e.name)
                 continue
+            file_dtype = ReaderFactory._type_by_extension(e.name)
+            if file_dtype in cls.FILE_TYPES:
+                records.append(cls._make_record(Path(e.path), file_dtype))
+        return {"mtime": dir_mtime, "subdirs": subdirs, "records": records}
+
+    @classmethod
+    def _make_record(cls, path: Path, dtype: str) -> dict:
+        st = os.stat(path)
+        if path.is_file():
+            return {"path": str(path), "type": dtype, "size": st.st_size, "mtime": st.st_mtime,
+                    "episodes": cls._count_episodes(path, dtype)}
+        # 目录型数据集：只 stat 决定大小与轨迹数的文件/目录 (不遍历视频等大目录)，
+        # 记录它们的 mtime 作为签名，重扫时任何一个变化 (含子目录内增删文件) 即判定为修改
+        files = cls._signature(path, dtype)
+        return {"path": str(path), "type": dtype,
+                "size": sum(size for _, size in files.values()),
+                "mtime": max([st.st_mtime] + [mtime for mtime, _ in files.values()]),
+                "episodes": cls._count_episodes(path, dtype), "files": files}
+
+    @classmethod
+    def _refresh_record(cls, record: dict) -> Optional[dict]:
+        path = Path(record["path"])
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if path.is_file():
+            if st.st_mtime == record["mtime"] and st.st_size == record["size"]:
+                return record
+            return cls._make_record(path, record["type"])
+        for rel, (mtime, _) in record.get("files", {}).items():
+            try:
+                if os.stat(path / rel).st_mtime != mtime: break
+            except OSError:
+                break
+        else:
+            if "files" in record: return record
+        return cls._make_record(path, record["type"])
+
+    @staticmethod
+    def _signature(path: Path, dtype: str) -> dict:
+        """
+        目录型数据集的签名: 相对路径 -> [mtime, size]。
+        包含目录本身 (增删文件会改变目录 mtime) 与其中的元数据/数据文件 (原地改写只改变文件 mtime)：
+          LeRobot: meta/info.json、meta/episodes*、data/ 下的 parquet 及其所在目录 (多仓库时逐个子仓库)
+          Unitree: 各轨迹目录及其 data.json
+          RawFolder: 目录本身及一级子目录 (colors/ 等)
+        """
+        files = {}
+        def add(p: Path, recurse: bool = False):
+            try: st = os.stat(p)
+            except OSError: return
+            is_dir = os.path.isdir(p)
+            files[os.path.relpath(p, path)] = [st.st_mtime, 0 if is_dir else st.st_size]
+            if not (is_dir and recurse): return
+            try:
+                with os.scandir(p) as it:
+                    children = [Path(e.path) for e in it if not e.name.startswith(".")]
+            except OSError:
+                return
+            for child in children: add(child, recurse)
+
+        add(path)
+        if dtype == "LeRobot":
+            roots = [path] if (path / "meta" / "info.json").exists() else sorted(p.parent.parent for p in path.glob("*/meta/info.json"))
+            for root in roots:
+                add(root)
+                add(root / "meta")
+                add(root / "meta" / "info.json")
+                for episodes in sorted((root / "meta").glob("episodes*")): add(episodes, recurse=True)
+                add(root / "data", recurse=True)
+        elif dtype == "Unitree":
+            for data_json in sorted(path.glob("*/data.json")):
+                add(data_json.parent)
+                add(data_json)
+            add(path / "data.json")
+        else:
+            try:
+                with os.scandir(path) as it:
+                    for e in it:
+                        if e.is_dir() and not e.name.startswith("."): add(Path(e.path))
+            except OSError:
+                pass
+        return files
+
+    @staticmethod
+    def _count_episodes(path: Path, dtype: str) -> int:
+        """不打开数据文件的轻量轨迹数估计"""
+        try:
+            if dtype == "LeRobot":
+                infos = [path / "meta" / "info.json"] if (path / "meta" / "info.json").exists() else sorted(path.glob("*/meta/info.json"))
+                total = 0
+                for info_path in infos:
+                    with open(info_path, "r", encoding="utf-8") as f:
+                        total += int(json.load(f).get("total_episodes", 0))
+                return total
+            if dtype == "Unitree" and not (path / "data.json").exists():
+                return len(list(path.glob("*/data.json")))
+        except (OSError, ValueError):
+            pass
+        return 1
+
+    def _load_index(self) -> dict:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != self.INDEX_VERSION or data.get("root") != str(self.root):
+            return {}
+        return data.get("dirs", {})
+
+    def _save_index(self, dirs: dict):
+        # 原地覆盖写入：替换/新建文件会改变根目录 mtime，导致下次根目录总被判定为已变化
+        created = not self.index_path.exists()
+        try:
+            self._write_index(dirs)
+            if created and "." in dirs and self.index_path.parent == self.root:
+                root_mtime = os.stat(self.root).st_mtime
+                dirs["."]["mtime"] = root_mtime
+                # 根目录本身就是目录型数据集时，其签名里的根目录 mtime 同样要更新
+                for record in dirs["."]["records"]:
+                    if record["path"] == str(self.root) and "." in record.get("files", {}):
+                        record["files"]["."][0] = root_mtime
+                self._write_index(dirs)
+        except OSError as e:
+            print(f"⚠️ 扫描索引写入失败 (只读目录?)，下次将全量扫描: {e}")
+
+    def _write_index(self, dirs: dict):
+        with open(self.index_path, "w", encoding="utf-8") as f:
+            json.dump({"version": self.INDEX_VERSION, "root": str(self.root), "dirs": dirs}, f, ensure_ascii=False)
 
-            # 策略 B: 处理散落的文件 (HDF5 / ROS)
-            for f in files:
-                if f.startswith("."): continue
-                
-                file_path = current_path / f
-                file_dtype = ReaderFactory.detect_type(file_path)
-                
-                if file_dtype in ("HDF5", "ROS"):
-                    self.stats[file_dtype] += 1
-                    self._add_record(file_path, file_dtype)
-                    
     def _add_record(self, path, dtype):
         info = {
             "name": path.name,
@@ -77,6 +299,7 @@ class DatasetInspector:
         return True
 
     def _print_problems(self):
+        import pandas as pd  # 仅打印报告时需要，避免扫描入口启动时加载 pandas
         df = pd.DataFrame(self.report)
         problems = df[df['status'].str.contains("Unknown|Corrupt|❌|⚠️")]
         if not problems.empty:
@@ -87,4 +310,9 @@ class DatasetInspector:
         all_paths = []
         for paths in self.grouped_datasets.values():
             all_paths.extend(paths)
-        return sorted(all_paths)
\ No newline at end of file
+        return sorted(all_paths)
+
+
+def _visit_dir(path: str, cached: Optional[dict]):
+    """模块级入口，便于进程池 pickle"""
+    return DatasetInspector._visit(Path(path), cached)
\ No newline at end of file
@@ -1,8 +1,23 @@
 # src/core/interface.py
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Optional, Union, Sequence, Callable, Tuple
 from dataclasses import dataclass, field
 import numpy as np
+from src.core.episode_pool import empty_like
+
+# 预览缩放档位 (边长缩小倍数)，与 image_codec 中 OpenCV 的 IMREAD_REDUCED_* 一一对应。
+# normalize_scale 放在这里而不是 image_codec，导入接口层 (factory/inspector) 时不加载 OpenCV
+PREVIEW_SCALES = (1, 2, 4, 8)
+
+def normalize_scale(scale) -> int:
+    """
+    preview_scale 约定为边长缩小倍数 1/2/4/8 (其他值就近取不超过它的档位)；
+    也接受 0.5 / 0.25 / 0.125 这样的比例写法。
+    """
+    try: scale = float(scale or 1)
+    except (TypeError, ValueError): return 1
+    if 0 < scale < 1: scale = 1.0 / scale
+    return max(s for s in PREVIEW_SCALES if s <= max(1.0, scale + 1e-6))
 
 @dataclass
 class AdapterConfig:
@@ -37,13 +52,109 @@ class FrameData:
     # 机器人状态: 比如关节角、末端位姿 (根据需要拓展)
     state: Optional[Dict[str, Any]] = None
     camera_info: Optional[Dict[str, Any]] = None  # 摄像头内参等信息
+    # 源数据本身就是压缩图像 (JPEG/PNG) 且读取器开启 keep_encoded_images 时，这里保存原始字节，
+    # 对应相机不再解码，不出现在 images 中
+    encoded_images: Optional[Dict[str, bytes]] = None
+
+@dataclass
+class FrameBatch:
+    """
+    批量读取的多帧数据 (get_frames 的返回值)。
+    indices 与请求的下标逐位置一致 (不去重、不丢弃)，每个相机 / 状态沿第 0 轴堆叠为 (N, ...) 数组。
+    若某个相机在部分帧缺失或分辨率不一致，则退化为长度 N 的列表 (缺失处为 None)。
+    读取器开启 keep_encoded_images 时，保留了源压缩字节的帧放在 encoded_images (长度 N 的列表)，
+    对应位置在 images 中为 None。
+    """
+    indices: List[int]
+    timestamps: np.ndarray
+    images: Dict[str, Any] = field(default_factory=dict)
+    state: Dict[str, Any] = field(default_factory=dict)
+    encoded_images: Dict[str, List[Optional[bytes]]] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    @classmethod
+    def empty(cls) -> "FrameBatch":
+        return cls(indices=[], timestamps=np.zeros(0))
+
+    def image_at(self, camera: str, pos: int) -> Tuple[Optional[np.ndarray], Optional[bytes]]:
+        """第 pos 帧该相机的 (解码图像, 源压缩字节)，至多一个不为 None"""
+        images, encoded = self.images.get(camera), self.encoded_images.get(camera)
+        return (images[pos] if images is not None else None), (encoded[pos] if encoded is not None else None)
+
+    def has_images(self, camera: str) -> bool:
+        """该相机是否至少有一帧图像 (解码图像或压缩字节)"""
+        return any(img is not None for img in self.images.get(camera, [])) or \
+            any(data is not None for data in self.encoded_images.get(camera, []))
+
+    @staticmethod
+    def stack(values: List[Any]) -> Any:
+        """形状一致时堆叠为 ndarray，否则保留为列表"""
+        if values and all(v is not None for v in values):
+            arrays = [np.asarray(v) for v in values]
+            if all(a.shape == arrays[0].shape for a in arrays):
+                return np.stack(arrays)
+        return list(values)
+
+    @classmethod
+    def from_frames(cls, indices: Sequence[int], frames: List[Optional["FrameData"]]) -> "FrameBatch":
+        """由逐帧读取的结果组装，保持与 indices 逐位置对应；读取失败 (None) 的帧图像/状态为 None，时间戳为 NaN"""
+        frames = list(frames)
+        valid = [f for f in frames if f is not None]
+        cams = list(dict.fromkeys(k for f in valid for k in f.images))
+        state_keys = list(dict.fromkeys(k for f in valid for k in (f.state or {})))
+        encoded_cams = list(dict.fromkeys(k for f in valid for k in (f.encoded_images or {})))
+        return cls(
+            indices=[int(i) for i in indices],
+            timestamps=np.array([f.timestamp if f is not None else np.nan for f in frames], dtype=np.float64),
+            images={cam: cls.stack([f.images.get(cam) if f is not None else None for f in frames]) for cam in cams},
+            state={k: cls.stack([(f.state or {}).get(k) if f is not None else None for f in frames]) for k in state_keys},
+            encoded_images={cam: [(f.encoded_images or {}).get(cam) if f is not None else None for f in frames] for cam in encoded_cams},
+        )
+
+@dataclass
+class EpisodeSnapshot:
+    """
+    get_snapshot_frames 的返回值：一条轨迹按比例采样的少数几帧 (审核预览用)。
+    batch 中只包含一个相机 (camera)，无图像时 camera 为 None。
+    与 get_frame 一样遵循读取器的 keep_encoded_images：源数据已是 JPEG/PNG 时图像在 batch.encoded_images 中。
+    """
+    episode_path: Optional[str]
+    length: int
+    camera: Optional[str]
+    batch: FrameBatch
+
+    @classmethod
+    def empty(cls, episode_path: Optional[str] = None, length: int = 0) -> "EpisodeSnapshot":
+        return cls(episode_path, length, None, FrameBatch.empty())
 
 class BaseDatasetReader(ABC):
     """
     数据读取器的抽象基类 (Interface)
     """
+    # get_frame 能否被多个线程同时调用 (FrameStream 据此决定预取线程数)
+    supports_concurrent_reads: bool = False
+    # 为 True 时 get_frame 对源数据已是 JPEG/PNG 的相机直接返回压缩字节 (FrameData.encoded_images)，
+    # 跳过解码，供 Rerun 以 EncodedImage 透传；不支持的适配器忽略此开关
+    keep_encoded_images: bool = False
+    _preview_scale: int = 1
+
     def __init__(self, config: Optional[AdapterConfig] = None):
         self.config = config
+        # 预览缩放倍数 (1/2/4/8)：审核、对比预览等不需要原分辨率的场景在解码阶段直接输出缩小的图像。
+        # 可由 extra_options["preview_scale"] 配置，也可由调用方在读取前直接设置该属性
+        extra_opts = getattr(config, 'extra_options', {}) or {}
+        self.preview_scale = extra_opts.get("preview_scale", 1)
+
+    @property
+    def preview_scale(self) -> int:
+        return self._preview_scale
+
+    @preview_scale.setter
+    def preview_scale(self, scale):
+        # 赋值时即归一化到 1/2/4/8，帧缓存 key 与实际解码倍数始终一致 (例如传入 3 按 2 解码与缓存)
+        self._preview_scale = normalize_scale(scale)
 
     @abstractmethod
     def load(self, file_path: str) -> bool:
@@ -64,12 +175,87 @@ class BaseDatasetReader(ABC):
         pass
 
     @abstractmethod
-    def get_frame(self, index: int) -> FrameData:
+    def get_frame(self, index: int, specific_cameras: Optional[List[str]] = None) -> FrameData:
         """
         根据索引随机读取一帧数据。
         实现懒加载：在这里才真正去磁盘读图片/解码。
         """
         pass
+
+    def get_frames(self, indices: Sequence[int], cameras: Optional[List[str]] = None) -> FrameBatch:
+        """
+        批量读取多帧。默认逐帧调用 get_frame；
+        支持连续读取/并行解码的适配器可重写此方法 (keep_encoded_images 开启时不需要解码，可直接回到默认实现)。
+        所有实现遵循同一约定：任一下标越界抛出 IndexError；返回的 batch.indices 与 indices 逐位置一致。
+        """
+        idx = self._check_indices(indices, self.get_length())
+        frames = [self.get_frame(int(i), cameras) for i in idx]
+        return FrameBatch.from_frames(idx, frames)
+
+    @staticmethod
+    def _check_indices(indices: Sequence[int], length: int) -> np.ndarray:
+        """get_frames 的下标校验：转为 int64 数组，越界时抛出 IndexError"""
+        idx = np.asarray(list(indices), dtype=np.int64).reshape(-1)
+        if len(idx) and (idx.min() < 0 or idx.max() >= length):
+            raise IndexError(f"Indices out of bounds [0, {length})")
+        return idx
+    
+    # 选择预览主视角时优先匹配的相机名关键词 (全局视角)
+    PRIMARY_CAMERA_KEYWORDS: Tuple[str, ...] = ('head', 'front', 'top')
+
+    @classmethod
+    def pick_primary_camera(cls, cameras: Sequence[str]) -> Optional[str]:
+        """优先返回名字里带全局视角关键词的相机，否则兜底用第一个"""
+        for cam in cameras:
+            if any(kw in cam.lower() for kw in cls.PRIMARY_CAMERA_KEYWORDS):
+                return cam
+        return cameras[0] if cameras else None
+
+    @classmethod
+    def _snapshot_cameras(cls, cameras: Sequence[str], camera: Optional[str] = None) -> List[str]:
+        """快照候选相机的尝试顺序：指定的相机 (存在时)，其次主视角，再依次是其余相机"""
+        cameras = list(cameras)
+        head = [c for c in (camera, cls.pick_primary_camera(cameras)) if c in cameras]
+        return list(dict.fromkeys(head + cameras))
+
+    @staticmethod
+    def _read_snapshot_camera(cameras: Sequence[str], read) -> Tuple[Optional[str], FrameBatch]:
+        """
+        按顺序对候选相机调用 read(camera) -> FrameBatch，返回第一个至少有一帧图像的相机；
+        全部没有图像时返回首选相机与其结果 (避免坏相机让整条轨迹的预览变空)
+        """
+        first = None
+        for cam in cameras:
+            batch = read(cam)
+            if batch.has_images(cam): return cam, batch
+            if first is None: first = (cam, batch)
+        return first or (None, FrameBatch.empty())
+
+    @staticmethod
+    def _snapshot_indices(fractions: Sequence[float], length: int) -> List[int]:
+        """比例 -> 帧下标，0.5 对应 length // 2，1.0 对应最后一帧"""
+        if length <= 0: return []
+        return [min(length - 1, max(0, int(f * length))) for f in fractions]
+
+    def get_snapshot_frames(self, fractions: Sequence[float], camera: Optional[str] = None,
+                            episode_idx: Optional[int] = None) -> EpisodeSnapshot:
+        """
+        读取轨迹中按比例 (0.0 ~ 1.0) 采样的几帧，只取一个相机：优先 camera，否则自动选主视角，
+        所选相机在采样帧上没有图像时依次尝试其余相机。episode_idx 越界时返回空快照。
+        默认实现切换到 episode_idx 后调用 get_frames；能够只读取这几帧的适配器会重写，
+        在不完整加载轨迹、也不改变当前轨迹的情况下完成 (例如 MCAP/MP4 跳到关键帧、HDF5/Parquet 只读几行)。
+        """
+        if episode_idx is not None and episode_idx != getattr(self, "current_episode_idx", None):
+            if not 0 <= episode_idx < self.get_total_episodes():
+                return EpisodeSnapshot.empty()
+            self.set_episode(episode_idx)
+        length = self.get_length()
+        indices = self._snapshot_indices(fractions, length)
+        if not indices:
+            return EpisodeSnapshot.empty(self.get_current_episode_path(), length)
+        cameras = self._snapshot_cameras(self.get_all_sensors(), camera)
+        camera, batch = self._read_snapshot_camera(cameras, lambda cam: self.get_frames(indices, [cam]))
+        return EpisodeSnapshot(self.get_current_episode_path(), length, camera, batch)
     
     @abstractmethod
     def get_total_episodes(self) -> int:
@@ -93,6 +279,85 @@ class BaseDatasetReader(ABC):
         """释放文件句柄"""
         pass
 
+    def _frame_cache_scope(self) -> Optional[str]:
+        """帧缓存 key 中标识当前轨迹的部分，默认使用轨迹路径"""
+        return self.get_current_episode_path()
+
+    def _cached_image(self, camera: str, index: int, loader: Callable[[], Optional[np.ndarray]]) -> Optional[np.ndarray]:
+        """
+        经由帧缓存读取一张图像。适配器在 extra_options 中配置 frame_cache_mb 后
+        会设置 self.frame_cache，未启用时直接调用 loader。
+        """
+        cache = getattr(self, "frame_cache", None)
+        if cache is None: return loader()
+        return cache.get_or_load(self._frame_cache_key(camera, index), loader)
+
+    def _frame_cache_key(self, camera: str, index: int) -> tuple:
+        # 不同预览缩放倍数下的同一帧分别缓存
+        return (self._frame_cache_scope(), camera, int(index), self.preview_scale)
+
+    # 启用轨迹句柄池 (extra_options["episode_pool_size"]) 时，描述一条已解析轨迹的全部属性名
+    _episode_state_attrs: tuple = ()
+    _episode_pool_attached: bool = False
+
+    def _episode_pool_key(self, episode_path) -> tuple:
+        return (type(self).__name__, repr(self.config), str(episode_path))
+
+    def _stash_episode(self) -> bool:
+        """
+        把当前轨迹的句柄/索引移入句柄池 (不关闭)，属性换成空值。
+        适配器在关闭当前轨迹 (_close_episode) 的开头调用，之后原有的释放逻辑只会作用在空值上。
+        """
+        pool = getattr(self, "episode_pool", None)
+        if pool is None or not self._episode_state_attrs or self.get_length() <= 0: return False
+        key = self._episode_pool_key(self.get_current_episode_path())
+        state = {attr: getattr(self, attr) for attr in self._episode_state_attrs}
+        for attr, value in state.items():
+            setattr(self, attr, empty_like(value))
+        pool.checkin(key, state, self._release_episode_state)
+        return True
+
+    def _checkout_episode(self, episode_path) -> Optional[Dict[str, Any]]:
+        """
+        从句柄池独占取出目标轨迹。set_episode 应在 close() 之前调用，
+        避免随后 checkin 当前轨迹时把目标轨迹淘汰掉。
+        """
+        pool = getattr(self, "episode_pool", None)
+        if pool is None or not self._episode_state_attrs: return None
+        if not self._episode_pool_attached:
+            pool.attach()
+            self._episode_pool_attached = True
+        return pool.checkout(self._episode_pool_key(episode_path))
+
+    def _detach_episode_pool(self):
+        """
+        读取器最终 close() 时调用 (切换轨迹不调用)：归还对共享句柄池的使用，
+        最后一个读取器关闭后池中的句柄随之关闭。之后再次 set_episode 会重新登记。
+        """
+        if not self._episode_pool_attached: return
+        self._episode_pool_attached = False
+        self.episode_pool.detach()
+
+    def _apply_episode_state(self, state: Dict[str, Any]):
+        for attr, value in state.items():
+            setattr(self, attr, value)
+
+    @staticmethod
+    def _release_episode_state(state: Dict[str, Any]):
+        """句柄池淘汰条目时调用，关闭其中的文件句柄；由使用句柄池的适配器重写 (静态方法，池中不持有读取器实例)"""
+        pass
+
+    def get_episode_states(self) -> Dict[str, np.ndarray]:
+        """
+        返回当前轨迹整段的状态数据, key=状态名, value=(T, D) 数组。
+        用于轨迹绘图和统计，避免逐帧调用 get_frame。不支持的适配器返回空字典。
+        """
+        return {}
+
+    def get_state_schema(self) -> Dict[str, List[str]]:
+        """返回 get_episode_states 中每个状态矩阵各列的名称"""
+        return {}
+
     @abstractmethod
     def get_current_episode_path(self) -> str:
         """返回当前轨迹隔离的物理目录/文件路径"""
@@ -0,0 +1,158 @@
+# src/core/mcap_index.py
+import io
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Iterator
+
+from mcap.data_stream import ReadDataStream
+from mcap.reader import make_reader
+from mcap.records import Chunk, Message, MessageIndex, Opcode
+from mcap.stream_reader import get_chunk_data_stream
+
+
+class McapChunkIndex:
+    """
+    基于 MCAP Summary / Chunk Index 的懒加载读取器。
+    load 阶段只读取文件尾部的 Summary 与每个 Chunk 的 MessageIndex (不解压)，
+    真正的消息内容在访问时按 Chunk 读取解压，并用一个小 LRU 缓存已解压的 Chunk。
+    """
+    def __init__(self, file_path, cache_size: int = 8):
+        self.file_path = Path(file_path)
+        self.cache_size = max(1, int(cache_size))
+        self._file = None
+        self.chunk_indexes = []
+        self.channels = {}      # channel_id -> Channel
+        self.schemas = {}       # schema_id -> Schema
+        self._chunk_cache: "OrderedDict[int, bytes]" = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # 文件句柄与 LRU 在多线程解码时共享，读取时加锁
+        self._lock = threading.RLock()
+
+    def open(self) -> bool:
+        """读取 Summary。文件未建立索引 (无 Chunk Index) 或 Summary 损坏时返回 False，由调用方回退全量读取"""
+        self._file = open(self.file_path, "rb")
+        try:
+            summary = make_reader(self._file).get_summary()
+        except Exception as e:
+            print(f"⚠️ [MCAP] 读取 {self.file_path.name} 的 Summary 失败: {e}")
+            self.close()
+            return False
+        if summary is None or not summary.chunk_indexes:
+            self.close()
+            return False
+        self.chunk_indexes = sorted(summary.chunk_indexes, key=lambda c: c.message_start_time)
+        self.channels = dict(summary.channels)
+        self.schemas = dict(summary.schemas)
+        return True
+
+    def topics(self) -> Dict[str, str]:
+        """topic -> schema 名称"""
+        result = {}
+        for channel in self.channels.values():
+            schema = self.schemas.get(channel.schema_id)
+            result[channel.topic] = schema.name if schema else "Unknown"
+        return result
+
+    def channel_ids(self, topics) -> Dict[int, str]:
+        wanted = set(topics)
+        return {cid: ch.topic for cid, ch in self.channels.items() if ch.topic in wanted}
+
+    def build_message_index(self, topics) -> Dict[str, List[Tuple[int, int, int]]]:
+        """
+        读取每个 Chunk 后面的 MessageIndex 记录 (无需解压 Chunk)。
+        返回 topic -> [(log_time, chunk_idx, offset), ...]，按 log_time 排序。
+        """
+        wanted = self.channel_ids(topics)
+        result: Dict[str, List[Tuple[int, int, int]]] = {t: [] for t in wanted.values()}
+        for chunk_idx, ci in enumerate(self.chunk_indexes):
+            if not any(cid in ci.message_index_offsets for cid in wanted): continue
+            for index in self._read_message_indexes(ci):
+                topic = wanted.get(index.channel_id)
+                if topic is None: continue
+                result[topic].extend((log_time, chunk_idx, offset) for log_time, offset in index.records)
+        for entries in result.values():
+            entries.sort()
+        return result
+
+    def _read_message_indexes(self, ci) -> List[MessageIndex]:
+        if ci.message_index_length == 0: return []
+        with self._lock:
+            self._file.seek(ci.chunk_start_offset + ci.chunk_length)
+            raw = self._file.read(ci.message_index_length)
+        stream = ReadDataStream(io.BytesIO(raw))
+        indexes = []
+        while stream.count < ci.message_index_length:
+            opcode = stream.read1()
+            length = stream.read8()
+            if opcode == Opcode.MESSAGE_INDEX:
+                indexes.append(MessageIndex.read(stream))
+            else:
+                stream.read(length)
+        return indexes
+
+    def _get_chunk_data(self, chunk_idx: int) -> bytes:
+        with self._lock:
+            return self._load_chunk_data(chunk_idx)
+
+    def _load_chunk_data(self, chunk_idx: int) -> bytes:
+        data = self._chunk_cache.get(chunk_idx)
+        if data is not None:
+            self._chunk_cache.move_to_end(chunk_idx)
+            self.cache_hits += 1
+            return data
+
+        self.cache_misses += 1
+        ci = self.chunk_indexes[chunk_idx]
+        # chunk_length 包含 1 字节 opcode 与 8 字节长度前缀
+        self._file.seek(ci.chunk_start_offset + 9)
+        chunk = Chunk.read(ReadDataStream(io.BytesIO(self._file.read(ci.chunk_length - 9))))
+        stream, length = get_chunk_data_stream(chunk)
+        data = stream.read(length)
+
+        self._chunk_cache[chunk_idx] = data
+        while len(self._chunk_cache) > self.cache_size:
+            self._chunk_cache.popitem(last=False)
+        return data
+
+    def read_message(self, chunk_idx: int, offset: int) -> Message:
+        """读取指定 Chunk 内偏移处的一条 Message 记录"""
+        data = self._get_chunk_data(chunk_idx)
+        stream = ReadDataStream(io.BytesIO(data[offset:]))
+        opcode = stream.read1()
+        length = stream.read8()
+        if opcode != Opcode.MESSAGE:
+            raise ValueError(f"Chunk {chunk_idx} 偏移 {offset} 处不是 Message 记录")
+        return Message.read(stream, length)
+
+    def iter_messages(self, topics=None) -> Iterator[Tuple[str, int, int, Message]]:
+        """按 Chunk 顺序遍历消息，产出 (topic, chunk_idx, offset, Message)，只解压包含目标 topic 的 Chunk"""
+        wanted = self.channel_ids(topics) if topics is not None else {cid: ch.topic for cid, ch in self.channels.items()}
+        for chunk_idx, ci in enumerate(self.chunk_indexes):
+            if ci.message_index_offsets and not any(cid in ci.message_index_offsets for cid in wanted): continue
+            data = self._get_chunk_data(chunk_idx)
+            stream = ReadDataStream(io.BytesIO(data))
+            while stream.count < len(data):
+                offset = stream.count
+                opcode = stream.read1()
+                length = stream.read8()
+                if opcode != Opcode.MESSAGE:
+                    stream.read(length)
+                    continue
+                message = Message.read(stream, length)
+                topic = wanted.get(message.channel_id)
+                if topic is not None:
+                    yield topic, chunk_idx, offset, message
+
+    @property
+    def nbytes(self) -> int:
+        """LRU 中已解压 Chunk 占用的字节数"""
+        return sum(len(data) for data in self._chunk_cache.values())
+
+    def close(self):
+        self._chunk_cache.clear()
+        if self._file:
+            try: self._file.close()
+            except: pass
+            self._file = None
@@ -1,7 +1,10 @@
-from typing import Type, Dict, Any
+import importlib
+from typing import Type, Dict, Any, List
 
 class AdapterRegistry:
     _registry: Dict[str, Type] = {}
+    # 懒注册: name -> 模块路径，首次 get_class 时才 import (避免启动时加载 h5py/av/mcap 等重依赖)
+    _lazy: Dict[str, str] = {}
 
     @classmethod
     def register(cls, name: str):
@@ -10,8 +13,19 @@ class AdapterRegistry:
             return adapter_cls
         return decorator
 
+    @classmethod
+    def register_lazy(cls, name: str, module_path: str):
+        """按模块路径登记适配器，模块被导入时由其中的 @register 完成真正注册"""
+        cls._lazy[name] = module_path
+
+    @classmethod
+    def names(cls) -> List[str]:
+        return sorted(set(cls._registry) | set(cls._lazy))
+
     @classmethod
     def get_class(cls, name: str) -> Type:
+        if name not in cls._registry and name in cls._lazy:
+            importlib.import_module(cls._lazy[name])
         if name not in cls._registry:
             raise ValueError(f"未注册的 Adapter 类型: {name}")
         return cls._registry[name]
\ No newline at end of file
@@ -1,6 +1,8 @@
 # src/core/reviewer.py
 import time
 import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import rerun as rr
 import rerun.blueprint as rrb
@@ -8,13 +10,18 @@ from pynput import keyboard
 from src.core.factory import ReaderFactory
 
 class DatasetReviewer:
-    def __init__(self, visualizer, rule_name=None):
+    def __init__(self, visualizer, rule_name=None, prefetch: bool = True, snapshot_cache_size: int = 16,
+                 preview_scale: int = 1):
         """
         :param visualizer: RerunVisualizer 实例
         :param rule_name: 数据解析规则名称
+        :param prefetch: 显示当前轨迹后，在后台预先准备下一条/上一条轨迹的快照
+        :param snapshot_cache_size: 缓存的快照数量
+        :param preview_scale: 快照解码缩小倍数 (1/2/4/8)，审核只需判断内容，不需要原分辨率
         """
         self.viz = visualizer
         self.rule_name = rule_name
+        self.preview_scale = preview_scale
         self.lock = threading.Lock()
         self.bad_datasets = [] 
         self.current_idx = 0            # 当前数据集文件夹的索引
@@ -27,6 +34,20 @@ class DatasetReviewer:
         self.dataset_paths = []
         self.is_running = False
         self.needs_refresh = False
+        
+        # 快照缓存: (数据集索引, Episode 索引) -> 已读取好的首/中/尾帧与元信息
+        self.snapshot_cache_size = max(1, int(snapshot_cache_size))
+        self.snapshots: "OrderedDict[tuple, dict]" = OrderedDict()
+        self.snapshot_lock = threading.Lock()
+        self.episode_counts = {}        # 数据集索引 -> Episode 数量 (前台或后台加载过即可知)
+        self.current_episode_path = None
+        
+        # 后台预取: 单个工作线程 + 代号 (generation)，每次翻页代号递增，旧任务在各步骤之间自行退出
+        self.prefetch = prefetch
+        self._prefetch_executor = None
+        self._prefetch_futures = []
+        self._generation = 0
+        self._prefetch_readers: "OrderedDict[str, object]" = OrderedDict()   # 仅由工作线程访问
 
     def start_review(self, dataset_paths: list):
         """
@@ -70,6 +91,7 @@ class DatasetReviewer:
             pass
         finally:
             listener.stop()
+            self._stop_prefetch()
             if self.current_reader:
                 self.current_reader.close()
 
@@ -85,6 +107,7 @@ class DatasetReviewer:
                 self.current_reader.close()
                 
             self.current_reader = ReaderFactory.get_reader(path, rule_name=self.rule_name)
+            if self.current_reader: self._configure_reader(self.current_reader)
             if self.current_reader and self.current_reader.load(path):
                 self.current_path = path
                 # 调用你新增的 get_total_episodes()
@@ -94,6 +117,24 @@ class DatasetReviewer:
                     self.total_episodes = 1
             else:
                 self.total_episodes = 1
+            if path in self.dataset_paths:
+                self.episode_counts[self.dataset_paths.index(path)] = self.total_episodes
+
+    def _configure_reader(self, reader):
+        """快照解码缩小倍数；可视化器为透传模式时读取器保留源压缩字节"""
+        reader.preview_scale = self.preview_scale
+        reader.keep_encoded_images = self.viz.passthrough
+
+    def _enter_dataset(self, idx: int):
+        """
+        切换到另一个数据集。若后台预取已经知道它的 Episode 数，则不在按键线程里加载 Reader，
+        只有在快照未命中需要前台读取时才加载。
+        """
+        self.current_idx = idx
+        if idx in self.episode_counts:
+            self.total_episodes = self.episode_counts[idx]
+        else:
+            self._load_reader(self.dataset_paths[idx])
 
     def _on_key_release(self, key):
         if not self.is_running:
@@ -118,8 +159,7 @@ class DatasetReviewer:
                     self.needs_refresh = True
                 # 2. 如果当前文件夹的 Episode 到底了，切换到下一个文件夹
                 elif self.current_idx < len(self.dataset_paths) - 1:
-                    self.current_idx += 1
-                    self._load_reader(self.dataset_paths[self.current_idx])
+                    self._enter_dataset(self.current_idx + 1)
                     self.current_ep_idx = 0
                     self.needs_refresh = True
                 else:
@@ -132,8 +172,7 @@ class DatasetReviewer:
                     self.needs_refresh = True
                 # 2. 否则回到上一个文件夹的最后一个 Episode
                 elif self.current_idx > 0:
-                    self.current_idx -= 1
-                    self._load_reader(self.dataset_paths[self.current_idx])
+                    self._enter_dataset(self.current_idx - 1)
                     self.current_ep_idx = max(0, self.total_episodes - 1)
                     self.needs_refresh = True
                 else:
@@ -148,8 +187,9 @@ class DatasetReviewer:
 
     def _get_actual_path(self):
         """获取当前轨迹的路径，如果不支持隔离，则回滚到根目录"""
-        path = None
-        if self.current_reader and hasattr(self.current_reader, 'get_current_episode_path'):
+        # 当前显示的快照记录了它的轨迹路径 (Reader 可能尚未在前台加载)
+        path = self.current_episode_path
+        if path is None and self.current_reader and hasattr(self.current_reader, 'get_current_episode_path'):
             path = self.current_reader.get_current_episode_path()
         
         # 如果 path 是 None (比如 LeRobot)，就返回 self.current_path
@@ -174,6 +214,10 @@ class DatasetReviewer:
             print(f"\n👌 [取消标记]: {name}")
 
     def _refresh_view(self):
+        snapshot = self._get_snapshot(self.current_idx, self.current_ep_idx)
+        # 不支持按轨迹隔离的格式 (如 LeRobot) 回退到数据集根目录
+        self.current_episode_path = (snapshot.get("episode_path") if snapshot else None) or self.dataset_paths[self.current_idx]
+
         actual_path = self._get_actual_path()
         if actual_path is None:
             print("\n⚠️ [警告]: 当前数据格式不支持物理隔离，将使用根目录显示。")
@@ -184,7 +228,8 @@ class DatasetReviewer:
         # 实时终端打印进度: 增加 Episode 提示
         print(f"\r[Dir: {self.current_idx+1}/{len(self.dataset_paths)} | Ep: {self.current_ep_idx+1}/{self.total_episodes}] 审核中: {name} | 状态: {status_icon}    ", end="", flush=True)
 
-        self._show_dataset_snapshot()
+        self._show_dataset_snapshot(snapshot)
+        self._schedule_prefetch()
 
     def _setup_review_layout(self):
         blueprint = rrb.Blueprint(
@@ -201,63 +246,167 @@ class DatasetReviewer:
         )
         rr.send_blueprint(blueprint)
 
-    def _show_dataset_snapshot(self):
-        rr.log("review", rr.Clear(recursive=True))
+    def _get_snapshot(self, d_idx: int, ep_idx: int):
+        """优先使用后台预取好的快照，未命中时在前台读取"""
+        key = (d_idx, ep_idx)
+        with self.snapshot_lock:
+            snapshot = self.snapshots.get(key)
+            if snapshot is not None:
+                self.snapshots.move_to_end(key)
+                return snapshot
+
+        path = self.dataset_paths[d_idx]
+        if self.current_path != path or self.current_reader is None:
+            self._load_reader(path)
         with self.lock:
             reader = self.current_reader
-            if not reader:
-                rr.log("review/info", rr.TextDocument(f"❌ Load Failed: {self.current_path}"))
-                return
+            if not reader or self.current_path != path:
+                return None
+            snapshot = self._build_snapshot(reader, path, ep_idx)
+        self._store_snapshot(key, snapshot)
+        return snapshot
 
-            try:
-                # 调用你新增的方法：切换 Episode
-                if hasattr(reader, 'set_episode'):
-                    reader.set_episode(self.current_ep_idx)
+    def _store_snapshot(self, key: tuple, snapshot: dict):
+        with self.snapshot_lock:
+            self.snapshots[key] = snapshot
+            self.snapshots.move_to_end(key)
+            while len(self.snapshots) > self.snapshot_cache_size:
+                self.snapshots.popitem(last=False)
 
-                length = reader.get_length()
-                if length == 0:
-                    rr.log("review/info", rr.TextDocument(f"⚠️ Empty Episode"))
-                    return
+    @staticmethod
+    def _build_snapshot(reader, dataset_path: str, ep_idx: int) -> dict:
+        """读取指定 Episode 首/中/尾三帧的主视角画面，结果与 Reader 无关，可跨线程缓存"""
+        snapshot = {"dataset_path": dataset_path, "episode_path": None, "length": 0, "images": {},
+                    "reader_type": type(reader).__name__, "total_episodes": 1}
+        try:
+            if hasattr(reader, 'get_total_episodes'):
+                snapshot["total_episodes"] = reader.get_total_episodes()
 
-                indices = {
-                    "0_start": 0,
-                    "1_mid": length // 2,
-                    "2_end": length - 1
-                }
+            # 适配器只读取这三帧 (主视角由适配器按 head/front/top 偏好选择)，不完整加载轨迹
+            snap = reader.get_snapshot_frames((0.0, 0.5, 1.0), episode_idx=ep_idx)
+            snapshot["episode_path"] = snap.episode_path
+            snapshot["length"] = snap.length
+            if snap.camera is None or not snap.batch.has_images(snap.camera):
+                return snapshot
 
-                actual_path = self._get_actual_path()
-                status_text = "🔴 **BAD DATA**" if actual_path in self.bad_datasets else "🟢 **GOOD DATA**"
-                
-                # Info 面板丰富显示层级
-                info_text = f"# {Path(actual_path).name}\n\n"
-                info_text += f"**Dataset Dir**: {Path(self.current_path).name}\n"
-                info_text += f"**Episode**: {self.current_ep_idx + 1} / {self.total_episodes}\n"
-                info_text += f"**Frames**: {length}\n"
-                info_text += f"**Type**: {type(reader).__name__}\n"
-                info_text += f"**Status**: {status_text}\n"
-                info_text += "\n---\n**Controls**:\n[→] Next | [←] Prev | [B] Mark Bad | [Esc] Quit"
-                
-                rr.log("review/info", rr.TextDocument(info_text, media_type="text/markdown"))
+            # 透传模式下源数据已是 JPEG/PNG 的帧保留原始字节，显示时直接转发，不解码再重新编码
+            for prefix, pos in zip(["0_start", "1_mid", "2_end"], range(len(snap.batch))):
+                snapshot["images"][prefix] = snap.batch.image_at(snap.camera, pos)
+        except Exception as e:
+            snapshot["error"] = str(e)
+        return snapshot
 
-                for prefix, idx in indices.items():
-                    frame = reader.get_frame(idx)
-                    if not frame.images:
-                        continue
-                    
-                    # --- 恢复偏好选择逻辑 ---
-                    # 策略：优先找名字里带 'head', 'front', 'top', 'chest' 等全局视角的相机
-                    primary_cam = None
-                    for cam in frame.images.keys():
-                        if any(kw in cam.lower() for kw in ['head', 'front', 'top',]):
-                            primary_cam = cam
-                            break
-                    
-                    # 如果没找到带特定关键词的，就兜底用第一个相机
-                    if not primary_cam:
-                        primary_cam = list(frame.images.keys())[0]
-                        
-                    # 只 Log 这一个主视角的画面，并且直接盖在 review/{prefix} 节点上
-                    rr.log(f"review/{prefix}", rr.Image(frame.images[primary_cam]))
-
-            except Exception as e:
-                pass
\ No newline at end of file
+    def _show_dataset_snapshot(self, snapshot):
+        rr.log("review", rr.Clear(recursive=True))
+        if not snapshot:
+            rr.log("review/info", rr.TextDocument(f"❌ Load Failed: {self.dataset_paths[self.current_idx]}"))
+            return
+
+        length = snapshot["length"]
+        if length == 0:
+            rr.log("review/info", rr.TextDocument(f"⚠️ Empty Episode"))
+            return
+
+        actual_path = self._get_actual_path() or snapshot["dataset_path"]
+        status_text = "🔴 **BAD DATA**" if actual_path in self.bad_datasets else "🟢 **GOOD DATA**"
+        
+        # Info 面板丰富显示层级
+        info_text = f"# {Path(actual_path).name}\n\n"
+        info_text += f"**Dataset Dir**: {Path(snapshot['dataset_path']).name}\n"
+        info_text += f"**Episode**: {self.current_ep_idx + 1} / {self.total_episodes}\n"
+        info_text += f"**Frames**: {length}\n"
+        info_text += f"**Type**: {snapshot['reader_type']}\n"
+        info_text += f"**Status**: {status_text}\n"
+        info_text += "\n---\n**Controls**:\n[→] Next | [←] Prev | [B] Mark Bad | [Esc] Quit"
+        
+        rr.log("review/info", rr.TextDocument(info_text, media_type="text/markdown"))
+
+        for prefix, (img, encoded) in snapshot["images"].items():
+            if img is None and encoded is None:
+                continue
+            # 只 Log 这一个主视角的画面，并且直接盖在 review/{prefix} 节点上
+            self.viz.log_image(f"review/{prefix}", img, encoded)
+
+    # ------------------------------------------------------------------
+    # 后台预取
+    # ------------------------------------------------------------------
+    def _neighbor(self, d_idx: int, ep_idx: int, step: int):
+        """按翻页规则计算相邻轨迹；上一个数据集的 Episode 数未知时返回 (d_idx, None) 表示其最后一条"""
+        if step > 0:
+            if ep_idx < self.episode_counts.get(d_idx, 1) - 1: return (d_idx, ep_idx + 1)
+            if d_idx < len(self.dataset_paths) - 1: return (d_idx + 1, 0)
+        else:
+            if ep_idx > 0: return (d_idx, ep_idx - 1)
+            if d_idx > 0:
+                count = self.episode_counts.get(d_idx - 1)
+                return (d_idx - 1, count - 1 if count else None)
+        return None
+
+    def _schedule_prefetch(self):
+        """当前轨迹显示完毕后调用：作废旧任务，预取下一条与上一条 (下一条优先)"""
+        if not self.prefetch: return
+        self._generation += 1
+        gen = self._generation
+        for future in self._prefetch_futures:
+            future.cancel()
+        if self._prefetch_executor is None:
+            self._prefetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ReviewPrefetch")
+        targets = [self._neighbor(self.current_idx, self.current_ep_idx, step) for step in (1, -1)]
+        self._prefetch_futures = [self._prefetch_executor.submit(self._prefetch_task, gen, t) for t in targets if t]
+
+    def _prefetch_task(self, gen: int, target: tuple):
+        d_idx, ep_idx = target
+        if gen != self._generation: return
+        with self.snapshot_lock:
+            if ep_idx is not None and (d_idx, ep_idx) in self.snapshots: return
+        try:
+            path = self.dataset_paths[d_idx]
+            reader = self._get_prefetch_reader(path, d_idx)
+            if reader is None or gen != self._generation: return
+            if ep_idx is None:
+                ep_idx = max(0, self.episode_counts.get(d_idx, 1) - 1)
+                with self.snapshot_lock:
+                    if (d_idx, ep_idx) in self.snapshots: return
+            snapshot = self._build_snapshot(reader, path, ep_idx)
+            # 读取失败的不缓存，留给前台重试；用户在读取期间已经翻走时结果仍然有效，照常缓存
+            if "error" not in snapshot:
+                self._store_snapshot((d_idx, ep_idx), snapshot)
+        except Exception:
+            pass
+
+    def _get_prefetch_reader(self, path: str, d_idx: int):
+        """后台专用的 Reader (与前台实例分离，避免并发访问同一个文件句柄)，最多保留两个"""
+        reader = self._prefetch_readers.get(path)
+        if reader is not None:
+            self._prefetch_readers.move_to_end(path)
+            return reader
+        reader = ReaderFactory.get_reader(path, rule_name=self.rule_name)
+        if reader: self._configure_reader(reader)
+        if not reader or not reader.load(path):
+            return None
+        self.episode_counts.setdefault(d_idx, reader.get_total_episodes() if hasattr(reader, 'get_total_episodes') else 1)
+        self._prefetch_readers[path] = reader
+        while len(self._prefetch_readers) > 2:
+            _, old = self._prefetch_readers.popitem(last=False)
+            old.close()
+        return reader
+
+    def _stop_prefetch(self):
+        """
+        退出时不等待正在进行的预取：代号递增后旧任务在下一步自行返回，
+        后台读取器交给工作线程在最后一个任务里关闭 (仍只由工作线程访问，不会关掉正在读取的句柄)
+        """
+        self._generation += 1
+        for future in self._prefetch_futures:
+            future.cancel()
+        self._prefetch_futures = []
+        if self._prefetch_executor:
+            self._prefetch_executor.submit(self._close_prefetch_readers)
+            self._prefetch_executor.shutdown(wait=False)
+            self._prefetch_executor = None
+
+    def _close_prefetch_readers(self):
+        for reader in self._prefetch_readers.values():
+            try: reader.close()
+            except Exception: pass
+        self._prefetch_readers.clear()
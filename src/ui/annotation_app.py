@@ -2,12 +2,15 @@ import sys
 import os
 import json
 import time
+import queue
+import threading
 import tkinter as tk
 from tkinter import filedialog
 import streamlit as st
 import rerun as rr
 import rerun.blueprint as rrb
 from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
 
 # 确保能找到 src
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
@@ -16,8 +19,9 @@ from src.core.inspector import DatasetInspector
 from src.core.organizer import DatasetOrganizer
 from src.core.reviewer import DatasetReviewer
 from src.core.factory import ReaderFactory
+from src.core.frame_stream import FrameStream
 from src.core.config_generator import ConfigGenerator
-from src.ui.rerun_visualizer import RerunVisualizer
+from src.ui.rerun_visualizer import RerunVisualizer, IMAGE_ENCODINGS, DEFAULT_IMAGE_ENCODING, log_image
 
 # 页面配置
 st.set_page_config(page_title="RoboCoin Annotation Tool", layout="wide")
@@ -254,41 +258,84 @@ def setup_comparison_layout(sample_names, cameras):
     blueprint = rrb.Blueprint(rrb.Horizontal(*columns), collapse_panels=True)
     rr.send_blueprint(blueprint)
 
-def run_parallel_preview(sample_paths, rule_name=None):
-    temp_reader = ReaderFactory.get_reader(sample_paths[0], rule_name=rule_name)
-    temp_reader.load(sample_paths[0])
-    cameras = temp_reader.get_all_sensors()
+def _load_preview_reader(path, rule_name=None, image_encoding=DEFAULT_IMAGE_ENCODING, preview_scale=1):
+    """在后台线程中创建并加载一个样本读取器，失败时返回 None"""
+    try:
+        r = ReaderFactory.get_reader(path, rule_name=rule_name)
+        if not r.load(path): return None
+        r.keep_encoded_images = image_encoding == "passthrough"
+        r.preview_scale = preview_scale
+        return r
+    except Exception as e:
+        print(f"⚠️ [Preview] 样本加载失败 {path}: {e}")
+        return None
+
+def _produce_sample_frames(s_idx, reader, out_queue, stop):
+    """单个样本的生产线程：按顺序解码帧放入共享队列，结束 (或出错) 时放入 (s_idx, None, None)"""
+    try:
+        with FrameStream(reader, depth=16, workers=2) as stream:
+            for i, frame in stream:
+                while not stop.is_set():
+                    try:
+                        out_queue.put((s_idx, i, frame), timeout=0.2)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set(): return
+    except Exception as e:
+        print(f"⚠️ [Preview] 样本 {s_idx} 读取中断: {e}")
+    finally:
+        out_queue.put((s_idx, None, None))
+
+def run_parallel_preview(sample_paths, rule_name=None, image_encoding=DEFAULT_IMAGE_ENCODING, jpeg_quality=80, preview_scale=1):
+    # 1. 并发加载全部样本 (DASMCAP/ROS 等 load 阶段需要建索引、解码，串行时耗时叠加)
+    with ThreadPoolExecutor(max_workers=len(sample_paths), thread_name_prefix="PreviewLoad") as pool:
+        loaded = list(pool.map(lambda p: _load_preview_reader(p, rule_name, image_encoding, preview_scale), sample_paths))
+    samples = [(s_idx, r) for s_idx, r in enumerate(loaded) if r is not None]
+    if not samples:
+        st.error("❌ 样本读取器全部加载失败。")
+        return
+
+    cameras = samples[0][1].get_all_sensors()
     print(f"DEBUG: Cameras detected for preview: {cameras}")  # 调试输出，确认相机列表
     rr.init("RoboCoin_Preview", spawn=True)
     setup_comparison_layout([os.path.basename(p) for p in sample_paths], cameras)
-    temp_reader.close()
-    
     rr.log("preview", rr.Clear(recursive=True))
-    
-    readers = []
-    max_len = 0
-    for p in sample_paths:
-        r = ReaderFactory.get_reader(p, rule_name=rule_name)
-        r.load(p)
-        readers.append(r)
-        if r.get_length() > max_len: 
-            max_len = r.get_length()
-    
+    for s_idx, _ in samples:
+        rr.log(f"preview/sample_{s_idx}/info", rr.TextDocument(f"### {os.path.basename(sample_paths[s_idx])}"))
+
+    # 2. 每个样本一个生产线程独立解码，主线程统一推送 Rerun；各帧带自己的 frame_idx，样本之间无需步调一致
+    total = sum(r.get_length() for _, r in samples)
+    frames_queue = queue.Queue(maxsize=64)
+    stop = threading.Event()
+    producers = [threading.Thread(target=_produce_sample_frames, args=(s_idx, r, frames_queue, stop),
+                                  name=f"PreviewSample{s_idx}", daemon=True) for s_idx, r in samples]
+    for t in producers: t.start()
+
     progress_bar = st.progress(0, text="正在同步播放视频流...")
-    for i in range(max_len):
-        rr.set_time_sequence("frame_idx", i)
-        for s_idx, r in enumerate(readers):
-            if i >= r.get_length(): continue
-            frame = r.get_frame(i)
-            for cam, img in frame.images.items():
-                rr.log(f"preview/sample_{s_idx}/{cam}", rr.Image(img))
-            if i == 0:
-                rr.log(f"preview/sample_{s_idx}/info", rr.TextDocument(f"### {os.path.basename(sample_paths[s_idx])}"))
-        
-        if i % 10 == 0 or i == max_len - 1:
-            progress_bar.progress((i + 1) / max_len, text=f"播放进度: {i+1}/{max_len} 帧")
-            
-    for r in readers: r.close()
+    logged, running = 0, len(producers)
+    try:
+        while running:
+            s_idx, i, frame = frames_queue.get()
+            if i is None:
+                running -= 1
+                continue
+            logged += 1
+            if frame is not None:
+                rr.set_time_sequence("frame_idx", i)
+                for cam, img in frame.images.items():
+                    log_image(f"preview/sample_{s_idx}/{cam}", img, encoding=image_encoding, jpeg_quality=jpeg_quality)
+                for cam, data in (frame.encoded_images or {}).items():
+                    log_image(f"preview/sample_{s_idx}/{cam}", encoded=data, encoding=image_encoding, jpeg_quality=jpeg_quality)
+            if logged % 10 == 0 or logged == total:
+                progress_bar.progress(min(1.0, logged / max(1, total)), text=f"播放进度: {logged}/{total} 帧")
+    finally:
+        stop.set()
+        # 生产线程可能阻塞在满队列上，先排空再等待退出
+        while any(t.is_alive() for t in producers):
+            try: frames_queue.get(timeout=0.1)
+            except queue.Empty: pass
+        for _, r in samples: r.close()
     progress_bar.empty()
     st.success("✅ 预览播放完成，请在 Rerun 窗口查看。")
 
@@ -327,6 +374,22 @@ def main():
         
         # 存入 session_state (选了 Auto 就设为 None，交给 Factory 内部处理)
         st.session_state['active_rule'] = None if selected_rule_ui == "自动探测 (Auto-Detect)" else selected_rule_ui
+
+        encoding_labels = {"passthrough": "透传源压缩图像 (推荐)", "jpeg": "JPEG 压缩", "raw": "原始 RGB"}
+        st.session_state['image_encoding'] = st.selectbox(
+            "🖼️ Rerun 图像传输",
+            options=list(IMAGE_ENCODINGS)[::-1],
+            index=list(IMAGE_ENCODINGS)[::-1].index(DEFAULT_IMAGE_ENCODING),
+            format_func=lambda k: encoding_labels.get(k, k),
+            help="原始 RGB 带宽与 Rerun 内存占用最大；透传模式对已是 JPEG/PNG 的源数据不解码直接发送，其余图像按 JPEG 压缩。"
+        )
+        if st.session_state['image_encoding'] != "raw":
+            st.session_state['jpeg_quality'] = st.slider("JPEG 质量", min_value=30, max_value=100, value=80, step=5)
+        st.session_state['preview_scale'] = st.select_slider(
+            "🔍 审核/预览分辨率", options=[1, 2, 4, 8], value=2,
+            format_func=lambda s: "原分辨率" if s == 1 else f"1/{s}",
+            help="在解码阶段直接缩小图像 (JPEG 缩小解码 / 视频解码端缩放)，降低审核与对比预览的 CPU 和内存占用。透传模式下直接转发的源压缩图像不经过解码，保持原分辨率。"
+        )
         col1, col2 = st.columns([4, 1])
         with col1:
             vocab_input = st.text_input("Schema 配置文件 (JSON):", value=st.session_state['vocab_path'])
@@ -384,8 +447,15 @@ def main():
                     
                     # 执行原有的扫描逻辑
                     with st.spinner("正在扫描数据集..."):
-                        inspector = DatasetInspector(target_dir)
+                        scan_bar = st.progress(0, text="正在扫描目录...")
+                        def _on_scan_progress(done, total, rel):
+                            scan_bar.progress(done / max(total, 1), text=f"已扫描 {done}/{total} 个目录: {rel}")
+                        inspector = DatasetInspector(target_dir, progress_callback=_on_scan_progress)
                         inspector.scan()
+                        scan_bar.empty()
+                        changes = inspector.changes
+                        if inspector.dirs_reused and any(changes.values()):
+                            st.info(f"♻️ 增量扫描：新增 {len(changes['added'])}，删除 {len(changes['removed'])}，修改 {len(changes['modified'])} 个数据")
                         if inspector.check_consistency():
                             st.session_state['grouped_datasets'] = inspector.grouped_datasets
                             st.session_state['valid_paths'] = inspector.get_all_valid_paths()
@@ -469,8 +539,10 @@ def main():
 
             if st.button("🚀 启动人工审核 (Rerun)"):
                 with st.spinner("请在弹出的 Rerun 窗口中操作 (使用键盘 N/P 切换, B 标记异常, Q/Esc 退出)..."):
-                    viz = RerunVisualizer("RoboCoin_Review")
-                    reviewer = DatasetReviewer(viz, rule_name=st.session_state.get('active_rule'))
+                    viz = RerunVisualizer("RoboCoin_Review", image_encoding=st.session_state.get('image_encoding', DEFAULT_IMAGE_ENCODING),
+                                          jpeg_quality=st.session_state.get('jpeg_quality', 80))
+                    reviewer = DatasetReviewer(viz, rule_name=st.session_state.get('active_rule'),
+                                               preview_scale=st.session_state.get('preview_scale', 2))
                     print("DEBUG: valid_paths before review:", valid_paths)  # 调试输出，确认传入的路径列表
                     bad_datasets = reviewer.start_review(valid_paths)
 
@@ -504,7 +576,9 @@ def main():
                     if len(valid_paths) > 1: indices.append(len(valid_paths)-1)
                     if len(valid_paths) > 2: indices.insert(1, len(valid_paths)//2)
                     sample_paths = [valid_paths[i] for i in indices]
-                    run_parallel_preview(sample_paths, st.session_state.get('active_rule'))
+                    run_parallel_preview(sample_paths, st.session_state.get('active_rule'),
+                                         st.session_state.get('image_encoding', DEFAULT_IMAGE_ENCODING), st.session_state.get('jpeg_quality', 80),
+                                         st.session_state.get('preview_scale', 2))
 
     # ==========================================
     # TAB 2: 元数据标注 (生成 YAML)
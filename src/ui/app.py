@@ -1,22 +1,34 @@
 # src/app.py
 import time
 from src.core.factory import ReaderFactory
-from src.ui.rerun_visualizer import RerunVisualizer
+from src.core.frame_stream import FrameStream
+from src.ui.rerun_visualizer import DEFAULT_IMAGE_ENCODING, RerunVisualizer
 
-def run_viewer(file_path: str):
+def run_viewer(file_path: str, image_encoding: str = DEFAULT_IMAGE_ENCODING, jpeg_quality: int = 80):
     # 1. 获取 Reader (解耦：App 不知道它是 HDF5 还是 MCAP)
     reader = ReaderFactory.get_reader(file_path)
     if not reader.load(file_path):
         return
 
     # 2. 初始化 Visualizer (预留了 UI 布局)
-    viz = RerunVisualizer()
+    viz = RerunVisualizer(image_encoding=image_encoding, jpeg_quality=jpeg_quality)
+    # 透传模式下源数据已是 JPEG/PNG 的相机不解码，直接把压缩字节交给 Rerun
+    reader.keep_encoded_images = viz.passthrough
 
     # 3. 数据流式推送
     print(f"正在同步数据到 Rerun...")
-    for i in range(reader.get_length()):
-        frame = reader.get_frame(i)
-        viz.log_frame(frame, i)
+    # 整条轨迹的状态矩阵可直接取得时，逐帧只推图像，状态在最后按列一次性发送
+    states = reader.get_episode_states()
+    timestamps = []
+    # 后台线程预取解码，与 Rerun 推送并行
+    with FrameStream(reader, depth=16, workers=4) as stream:
+        for i, frame in stream:
+            viz.log_frame(frame, i, log_state=not states)
+            timestamps.append(frame.timestamp)
+    if states:
+        viz.log_states(states, timestamps)
+    # 数据已全部推送，关闭读取器释放文件句柄 (包括句柄池中的)
+    reader.close()
     
     print("同步完成！请在 Rerun 窗口查看。")
     # 保持进程不退出，否则 Rerun 窗口可能会关闭
@@ -1,14 +1,67 @@
 # src/ui/rerun_visualizer.py
+import cv2
 import rerun as rr
 import rerun.blueprint as rrb
 import numpy as np
-from typing import List
+from typing import Dict, List, Optional, Sequence
 from src.core.interface import FrameData
 
+# 图像传输策略:
+#   raw         - 原始 RGB 数组 (rr.Image)，带宽最大
+#   jpeg        - 以 jpeg_quality 压缩后发送 (rr.EncodedImage)
+#   passthrough - 源数据已是 JPEG/PNG 时直接转发原始字节，不解码也不重新编码；其余图像按 jpeg 处理
+IMAGE_ENCODINGS = ("raw", "jpeg", "passthrough")
+# 查看器、审核、预览与 .rrd 导出共用的默认策略
+DEFAULT_IMAGE_ENCODING = "passthrough"
+
+def guess_media_type(data: bytes) -> Optional[str]:
+    """根据文件头识别压缩图像格式，无法识别时返回 None"""
+    if data[:3] == b"\xff\xd8\xff": return "image/jpeg"
+    if data[:8] == b"\x89PNG\r\n\x1a\n": return "image/png"
+    return None
+
+def to_rerun_image(img: Optional[np.ndarray] = None, encoded: Optional[bytes] = None,
+                   encoding: str = DEFAULT_IMAGE_ENCODING, jpeg_quality: int = 80):
+    """按传输策略把一张图像转换为 Rerun 的 Image / EncodedImage"""
+    if encoded is not None:
+        media_type = guess_media_type(encoded)
+        if media_type is not None:
+            return rr.EncodedImage(contents=encoded, media_type=media_type)
+        # 无法识别的格式在本地解码后按策略发送
+        img = cv2.imdecode(np.frombuffer(encoded, np.uint8), cv2.IMREAD_COLOR)
+        if img is None: return None
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    if img is None: return None
+    # JPEG 只支持 8 位灰度/RGB，深度图等其他格式保持原样
+    if encoding == "raw" or img.dtype != np.uint8 or not (img.ndim == 2 or (img.ndim == 3 and img.shape[2] in (1, 3))):
+        return rr.Image(img)
+    bgr = cv2.cvtColor(img, cv2.COLOR_RGB2BGR) if img.ndim == 3 and img.shape[2] == 3 else img
+    ok, buf = cv2.imencode(".jpg", bgr, [cv2.IMWRITE_JPEG_QUALITY, int(jpeg_quality)])
+    return rr.EncodedImage(contents=buf.tobytes(), media_type="image/jpeg") if ok else rr.Image(img)
+
+def log_image(entity_path: str, img: Optional[np.ndarray] = None, encoded: Optional[bytes] = None,
+              encoding: str = DEFAULT_IMAGE_ENCODING, jpeg_quality: int = 80, recording: Optional[rr.RecordingStream] = None):
+    archetype = to_rerun_image(img, encoded, encoding, jpeg_quality)
+    if archetype is not None:
+        rr.log(entity_path, archetype, recording=recording)
+
 class RerunVisualizer:
-    def __init__(self, app_name: str = "RoboCoin_Viewer"):
+    def __init__(self, app_name: str = "RoboCoin_Viewer", image_encoding: str = DEFAULT_IMAGE_ENCODING, jpeg_quality: int = 80,
+                 spawn: bool = True, recording: Optional[rr.RecordingStream] = None):
+        """
+        :param image_encoding: 图像传输策略，见 IMAGE_ENCODINGS
+        :param jpeg_quality: jpeg 压缩质量 (1-100)
+        :param spawn: 是否启动 Rerun Viewer 窗口 (无界面环境传 False)
+        :param recording: 写入指定的 RecordingStream (例如 rec.save(...) 导出 .rrd)，不使用全局录制也不初始化
+        """
+        if image_encoding not in IMAGE_ENCODINGS:
+            raise ValueError(f"未知的图像传输策略: {image_encoding}，可选 {IMAGE_ENCODINGS}")
         self.app_name = app_name
-        rr.init(self.app_name, spawn=True)
+        self.image_encoding = image_encoding
+        self.jpeg_quality = int(jpeg_quality)
+        self.recording = recording
+        if recording is None:
+            rr.init(self.app_name, spawn=spawn)
         # 注意：这里不再自动调用 _setup_blueprint
         # 我们等待外部传入相机列表后再初始化布局
 
@@ -38,27 +91,70 @@ class RerunVisualizer:
                     *cam_views, 
                     grid_columns=2 if len(camera_names) > 1 else 1 # 如果相机多，就双列显示
                 ),
-                # 下半部分：关节状态
-                rrb.TimeSeriesView(name="Joint States", origin="world/robot/qpos"),
+                # 下半部分：关节状态 (log_states 按状态名分别写在 world/robot/{状态名} 下)
+                rrb.TimeSeriesView(name="Joint States", origin="world/robot"),
                 row_shares=[3, 1] # 相机占 3 份高度，波形图占 1 份
             ),
             collapse_panels=True
         )
         
         # 发送布局给 Rerun Viewer
-        rr.send_blueprint(blueprint)
+        rr.send_blueprint(blueprint, recording=self.recording)
 
-    def log_frame(self, frame: FrameData, frame_idx: int):
-        """将标准数据帧推送到 Rerun"""
-        rr.set_time_sequence("frame_idx", frame_idx)
-        rr.set_time_seconds("log_time", frame.timestamp)
+    def log_frame(self, frame: FrameData, frame_idx: int, log_state: bool = True):
+        """
+        将标准数据帧推送到 Rerun (逐帧，用于实时流)。
+        整条轨迹的状态已经通过 log_states 批量发送时传 log_state=False，只推送图像。
+        """
+        rr.set_time_sequence("frame_idx", frame_idx, recording=self.recording)
+        rr.set_time_seconds("log_time", frame.timestamp, recording=self.recording)
 
-        # 动态 Log 所有相机
+        # 动态 Log 所有相机 (透传模式下部分相机只有压缩字节)
         for cam_name, img in frame.images.items():
-            rr.log(f"world/camera/{cam_name}", rr.Image(img))
+            self.log_image(f"world/camera/{cam_name}", img)
+        for cam_name, data in (frame.encoded_images or {}).items():
+            self.log_image(f"world/camera/{cam_name}", encoded=data)
 
         # Log 关节状态
-        if frame.state and 'qpos' in frame.state:
+        if log_state and frame.state and 'qpos' in frame.state:
             qpos = frame.state['qpos']
             for i, val in enumerate(qpos):
-                rr.log(f"world/robot/qpos/j{i}", rr.Scalars(val))
\ No newline at end of file
+                rr.log(f"world/robot/qpos/j{i}", rr.Scalars(val), recording=self.recording)
+
+    @property
+    def passthrough(self) -> bool:
+        """读取器是否应保留源压缩字节 (调用方据此设置 reader.keep_encoded_images)"""
+        return self.image_encoding == "passthrough"
+
+    def log_image(self, entity_path: str, img: Optional[np.ndarray] = None, encoded: Optional[bytes] = None):
+        """按本实例的传输策略发送一张图像"""
+        log_image(entity_path, img, encoded, self.image_encoding, self.jpeg_quality, self.recording)
+
+    def log_states(self, states: Dict[str, np.ndarray], timestamps: Sequence[float],
+                   frame_indices: Optional[Sequence[int]] = None):
+        """
+        按列批量发送整条轨迹的状态: states 为 {状态名: (T, D) 矩阵}，timestamps 为 (T,) 秒。
+        每个关节一次 rr.send_columns，写入 world/robot/{状态名}/j{i} (qpos 与 log_frame 的路径相同)，
+        代替 T x D 次 rr.log 调用。
+        状态行数与帧数不一致时 (例如 HDF5 中 qpos 比图像多一行) 按较短者截断并给出警告。
+        """
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        frame_indices = np.arange(len(timestamps)) if frame_indices is None else np.asarray(frame_indices, dtype=np.int64)
+        for key, matrix in states.items():
+            matrix = np.asarray(matrix, dtype=np.float64)
+            if matrix.ndim == 1: matrix = matrix.reshape(-1, 1)
+            if matrix.ndim != 2 or matrix.shape[1] == 0:
+                print(f"⚠️ [Rerun] 状态 {key} 形状 {matrix.shape} 无法按列发送，已跳过")
+                continue
+            n = min(len(matrix), len(timestamps))
+            if n != len(matrix) or n != len(timestamps):
+                print(f"⚠️ [Rerun] 状态 {key} 有 {len(matrix)} 行，帧数为 {len(timestamps)}，按 {n} 行截断发送")
+            if n == 0: continue
+            indexes = [
+                rr.TimeColumn("frame_idx", sequence=frame_indices[:n]),
+                rr.TimeColumn("log_time", timestamp=timestamps[:n]),
+            ]
+            matrix = matrix[:n]
+            for i in range(matrix.shape[1]):
+                rr.send_columns(f"world/robot/{key}/j{i}", indexes=indexes, columns=rr.Scalars.columns(scalars=matrix[:, i]),
+                                recording=self.recording)
@@ -0,0 +1,191 @@
+# src/ui/rrd_exporter.py
+"""
+无界面批量导出 .rrd 录制文件。
+离线把任意格式数据集的轨迹一次性解码并写入 Rerun 录制，审核人员之后直接用 `rerun xxx.rrd` 打开，
+无需源数据与重新解码。导出按 (数据集, 轨迹) 拆分任务交给进程池并行执行。
+
+用法:
+    python -m src.ui.rrd_exporter /data/ds1 /data/ds2 -o /data/rrd --per episode --workers 4
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import rerun as rr
+
+from src.core.factory import ReaderFactory
+from src.core.frame_stream import FrameStream
+from src.core.interface import BaseDatasetReader
+from src.ui.rerun_visualizer import DEFAULT_IMAGE_ENCODING, IMAGE_ENCODINGS, RerunVisualizer
+
+@dataclass
+class ExportOptions:
+    image_encoding: str = DEFAULT_IMAGE_ENCODING
+    jpeg_quality: int = 80
+    preview_scale: int = 1
+    rule_name: Optional[str] = None
+    app_id: str = "RoboCoin_Viewer"
+
+@dataclass
+class ExportTask:
+    dataset_path: str
+    output_path: str
+    # None 表示整个数据集的全部轨迹写入同一个 .rrd
+    episode_idx: Optional[int] = None
+
+# 每个工作进程内按数据集路径复用已加载的读取器，同一数据集的多条轨迹不重复 load
+_worker_readers: Dict[str, BaseDatasetReader] = {}
+
+def _create_reader(dataset_path: str, options: ExportOptions) -> Optional[BaseDatasetReader]:
+    """创建并加载读取器；格式无法识别或加载失败时返回 None"""
+    try:
+        reader = ReaderFactory.get_reader(dataset_path, rule_name=options.rule_name)
+    except ValueError as e:
+        print(f"⚠️ [Exporter] 无法识别的数据集 {dataset_path}: {e}")
+        return None
+    if reader is None: return None
+    try:
+        if reader.load(dataset_path): return reader
+    except Exception as e:
+        print(f"⚠️ [Exporter] 加载数据集失败 {dataset_path}: {e}")
+    try: reader.close()
+    except Exception: pass
+    return None
+
+def _open_reader(dataset_path: str, options: ExportOptions) -> BaseDatasetReader:
+    reader = _worker_readers.get(dataset_path)
+    if reader is not None: return reader
+    reader = _create_reader(dataset_path, options)
+    if reader is None:
+        raise RuntimeError(f"无法加载数据集: {dataset_path}")
+    reader.keep_encoded_images = options.image_encoding == "passthrough"
+    reader.preview_scale = options.preview_scale
+    _worker_readers[dataset_path] = reader
+    return reader
+
+def _stream_episode(reader: BaseDatasetReader, viz: RerunVisualizer, offset: int = 0) -> int:
+    """把读取器当前轨迹写入录制，frame_idx 从 offset 开始，返回帧数"""
+    states = reader.get_episode_states()
+    timestamps = []
+    with FrameStream(reader, depth=16, workers=4) as stream:
+        for i, frame in stream:
+            viz.log_frame(frame, offset + i, log_state=not states)
+            timestamps.append(frame.timestamp)
+    if states:
+        viz.log_states(states, timestamps, frame_indices=np.arange(offset, offset + len(timestamps)))
+    return len(timestamps)
+
+def export_task(task: ExportTask, options: ExportOptions) -> Tuple[str, int]:
+    """导出一个 .rrd 文件 (在工作进程中执行)，返回 (输出路径, 帧数)"""
+    reader = _open_reader(task.dataset_path, options)
+    Path(task.output_path).parent.mkdir(parents=True, exist_ok=True)
+
+    # 每个输出文件独立的 RecordingStream，不占用全局录制，也不启动 Viewer
+    rec = rr.RecordingStream(options.app_id, recording_id=task.output_path)
+    rec.save(task.output_path)
+    viz = RerunVisualizer(options.app_id, options.image_encoding, options.jpeg_quality, recording=rec)
+    viz.setup_layout(reader.get_all_sensors())
+
+    episodes = [task.episode_idx] if task.episode_idx is not None else range(reader.get_total_episodes())
+    total = 0
+    try:
+        for ep_idx in episodes:
+            reader.set_episode(ep_idx)
+            if task.episode_idx is None:
+                # 整数据集模式下轨迹首尾相接，在每条轨迹起点标注来源
+                rec.set_time_sequence("frame_idx", total)
+                rec.log("world/episode", rr.TextDocument(f"### Episode {ep_idx}\n{reader.get_current_episode_path()}",
+                                                         media_type=rr.MediaType.MARKDOWN))
+            total += _stream_episode(reader, viz, offset=total)
+    finally:
+        rec.flush()
+        rec.disconnect()
+    return task.output_path, total
+
+def _output_names(dataset_paths: List[str]) -> Dict[str, Path]:
+    """
+    数据集路径 -> 输出相对名。取所有数据集父目录的公共根，保留其下的相对路径 (文件去掉后缀)，
+    例如 /d/a/data 与 /d/b/data 分别得到 a/data 与 b/data，叶子目录同名时不会互相覆盖。
+    """
+    resolved = {p: Path(p).resolve() for p in dataset_paths}
+    root = Path(os.path.commonpath([str(r.parent) for r in resolved.values()]))
+    names = {}
+    for p, r in resolved.items():
+        rel = r.relative_to(root)
+        names[p] = rel.with_suffix("") if r.is_file() else rel
+    return names
+
+def plan_tasks(dataset_paths: List[str], output_dir: str, per: str, options: ExportOptions) -> List[ExportTask]:
+    """
+    per="episode": 每条轨迹一个文件 output_dir/<数据集相对名>/episode_000000.rrd
+    per="dataset": 每个数据集一个文件 output_dir/<数据集相对名>.rrd
+    无法识别/加载的数据集跳过；两个任务会写到同一个输出文件时抛出 ValueError，不开始导出。
+    """
+    out = Path(output_dir)
+    dataset_paths = list(dict.fromkeys(dataset_paths))
+    names = _output_names(dataset_paths) if dataset_paths else {}
+    tasks = []
+    for path in dataset_paths:
+        name = names[path]
+        reader = _create_reader(path, options)
+        if reader is None:
+            print(f"⚠️ [Exporter] 跳过无法加载的数据集: {path}")
+            continue
+        count = reader.get_total_episodes()
+        reader.close()
+        if per == "dataset":
+            tasks.append(ExportTask(path, str(out / f"{name}.rrd")))
+            continue
+        for ep_idx in range(count):
+            tasks.append(ExportTask(path, str(out / name / f"episode_{ep_idx:06d}.rrd"), ep_idx))
+
+    owners: Dict[str, str] = {}
+    for task in tasks:
+        other = owners.setdefault(task.output_path, task.dataset_path)
+        if other != task.dataset_path:
+            raise ValueError(f"输出文件冲突: {other} 与 {task.dataset_path} 都会写入 {task.output_path}")
+    return tasks
+
+def export_datasets(dataset_paths: List[str], output_dir: str, per: str = "episode",
+                    workers: int = 4, options: Optional[ExportOptions] = None) -> List[Tuple[str, int]]:
+    options = options or ExportOptions()
+    tasks = plan_tasks(dataset_paths, output_dir, per, options)
+    print(f"📦 [Exporter] 共 {len(tasks)} 个录制文件，{workers} 个进程")
+    results = []
+    start = time.time()
+    # 按数据集顺序提交，同一进程连续处理同一数据集时可复用读取器
+    with ProcessPoolExecutor(max_workers=max(1, int(workers))) as pool:
+        futures = {pool.submit(export_task, task, options): task for task in tasks}
+        for done, future in enumerate(as_completed(futures), 1):
+            task = futures[future]
+            try:
+                out_path, frames = future.result()
+                results.append((out_path, frames))
+                print(f"✅ [{done}/{len(tasks)}] {out_path} ({frames} 帧)")
+            except Exception as e:
+                print(f"❌ [{done}/{len(tasks)}] {task.dataset_path} episode={task.episode_idx}: {e}")
+    print(f"🏁 [Exporter] 完成 {len(results)}/{len(tasks)}，耗时 {time.time() - start:.1f}s")
+    return results
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="批量导出数据集轨迹为 Rerun .rrd 录制文件")
+    parser.add_argument("paths", nargs="+", help="数据集路径 (文件或目录)")
+    parser.add_argument("-o", "--output", required=True, help="输出目录")
+    parser.add_argument("--per", choices=("episode", "dataset"), default="episode", help="每条轨迹或每个数据集一个 .rrd")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--encoding", choices=IMAGE_ENCODINGS, default=DEFAULT_IMAGE_ENCODING, help="图像写入策略")
+    parser.add_argument("--jpeg-quality", type=int, default=80)
+    parser.add_argument("--preview-scale", type=int, default=1, help="图像边长缩小倍数 1/2/4/8")
+    parser.add_argument("--rule", default=None, help="adapter_rules.json 中的规则名")
+    args = parser.parse_args(argv)
+
+    options = ExportOptions(args.encoding, args.jpeg_quality, args.preview_scale, args.rule)
+    export_datasets(args.paths, args.output, args.per, args.workers, options)
+
+if __name__ == "__main__":
+    main()
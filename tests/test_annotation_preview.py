@@ -0,0 +1,90 @@
+# tests/test_annotation_preview.py
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# 标注界面依赖 streamlit / openai / tkinter，审核模块依赖 pynput (需要图形环境)，不可用时跳过
+pytest.importorskip("streamlit")
+pytest.importorskip("openai")
+pytest.importorskip("tkinter")
+pytest.importorskip("pynput.keyboard")
+from src.ui import annotation_app
+from src.core.interface import BaseDatasetReader, FrameData
+
+LOAD_SECONDS = 0.3
+
+
+class SlowReader(BaseDatasetReader):
+    """load 耗时固定，记录加载区间与 get_frame 所在线程"""
+    def __init__(self, length, ok=True):
+        super().__init__()
+        self.length, self.ok = length, ok
+        self.load_window = None
+        self.frame_threads = set()
+        self.closed = False
+
+    def load(self, file_path):
+        start = time.monotonic()
+        time.sleep(LOAD_SECONDS)
+        self.load_window = (start, time.monotonic())
+        return self.ok
+
+    def get_frame(self, index, specific_cameras=None):
+        self.frame_threads.add(threading.current_thread().name)
+        return FrameData(timestamp=index / 10, images={"cam": np.full((2, 2, 3), index, np.uint8)})
+
+    def get_length(self): return self.length
+    def get_all_sensors(self): return ["cam"]
+    def get_total_episodes(self): return 1
+    def set_episode(self, episode_idx): pass
+    def get_current_episode_path(self): return ""
+    def close(self): self.closed = True
+
+
+class FakeProgress:
+    def __init__(self): self.values = []
+    def progress(self, value, text=""): self.values.append(value)
+    def empty(self): pass
+
+
+@pytest.fixture
+def preview(monkeypatch):
+    readers = {"a": SlowReader(25), "b": SlowReader(40), "broken": SlowReader(10, ok=False), "c": SlowReader(7)}
+    logged, bar = [], FakeProgress()
+    monkeypatch.setattr(annotation_app.ReaderFactory, "get_reader", lambda path, rule_name=None: readers[path])
+    monkeypatch.setattr(annotation_app, "setup_comparison_layout", lambda names, cameras: None)
+    monkeypatch.setattr(annotation_app, "log_image", lambda path, img=None, **kwargs: logged.append((path, int(img[0, 0, 0]))))
+    for name in ("init", "log", "set_time_sequence"):
+        monkeypatch.setattr(annotation_app.rr, name, lambda *args, **kwargs: None)
+    monkeypatch.setattr(annotation_app.st, "progress", lambda *args, **kwargs: bar)
+    for name in ("success", "error"):
+        monkeypatch.setattr(annotation_app.st, name, lambda *args, **kwargs: None)
+    return readers, logged, bar
+
+
+def test_samples_load_concurrently_and_all_frames_are_logged(preview):
+    readers, logged, bar = preview
+    start = time.monotonic()
+    annotation_app.run_parallel_preview(["a", "b", "broken", "c"], image_encoding="raw")
+
+    # 四个样本同时加载，总耗时接近一次 load 而不是四次之和
+    windows = [r.load_window for r in readers.values()]
+    assert max(s for s, _ in windows) < min(e for _, e in windows)
+    assert time.monotonic() - start < 3 * LOAD_SECONDS
+
+    # 加载失败的样本跳过，其余样本每帧推送且只推送一次
+    expected = {(f"preview/sample_{s}/cam", i) for s, n in ((0, 25), (1, 40), (3, 7)) for i in range(n)}
+    assert len(logged) == len(expected) and set(logged) == expected
+    # 解码在各样本的后台线程中进行，不占用界面线程
+    main = threading.main_thread().name
+    assert all(main not in r.frame_threads for r in readers.values())
+
+    # 进度按所有样本的总帧数计算，单调递增到 1
+    assert bar.values == sorted(bar.values) and bar.values[-1] == 1.0
+    assert all(r.closed for name, r in readers.items() if name != "broken")
@@ -0,0 +1,183 @@
+# tests/test_dasmcap_adapter.py
+import os
+import shutil
+import sys
+
+import av
+import numpy as np
+import pytest
+from google.protobuf import descriptor_pb2, descriptor_pool, message_factory
+from mcap_protobuf.writer import Writer
+from scipy.spatial.transform import Rotation
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.adapters.dasmcap_adapter import DASMCAPAdapter, VideoDecoder
+from src.core.interface import AdapterConfig
+
+N = 12
+T0, DT = 1_000_000_000, 33_333_333
+CAMERA = "/robot0/sensor/camera0/compressed"
+ARMS = {
+    "left": {"pose_topic": "/robot0/vio/eef_pose", "joint_topic": "/robot0/joint", "gripper_topic": "/robot0/gripper"},
+    "right": {"pose_topic": "/robot1/vio/eef_pose"},
+}
+BASE = {"/base/odom": "odom"}
+
+
+def _message_classes():
+    fdp = descriptor_pb2.FileDescriptorProto(name="das_test.proto", package="dastest", syntax="proto3")
+    F = descriptor_pb2.FieldDescriptorProto
+
+    def add(name, fields):
+        m = fdp.message_type.add(name=name)
+        for i, (field, ftype, tname) in enumerate(fields, 1):
+            f = m.field.add(name=field, number=i, type=ftype, label=F.LABEL_OPTIONAL)
+            if tname: f.type_name = tname
+
+    add("CompressedVideo", [("data", F.TYPE_BYTES, None)])
+    add("Vec3", [(k, F.TYPE_DOUBLE, None) for k in "xyz"])
+    add("Quat", [(k, F.TYPE_DOUBLE, None) for k in "xyzw"])
+    add("Pose", [("position", F.TYPE_MESSAGE, ".dastest.Vec3"), ("orientation", F.TYPE_MESSAGE, ".dastest.Quat")])
+    add("PoseStamped", [("pose", F.TYPE_MESSAGE, ".dastest.Pose")])
+    add("Scalar", [("value", F.TYPE_DOUBLE, None)])
+    pool = descriptor_pool.DescriptorPool()
+    pool.Add(fdp)
+    return {n: message_factory.GetMessageClass(pool.FindMessageTypeByName(f"dastest.{n}"))
+            for n in ("CompressedVideo", "PoseStamped", "Scalar")}
+
+
+def _h264(n, bframes=0):
+    codec = av.CodecContext.create("libx264", "w")
+    codec.width, codec.height, codec.pix_fmt, codec.framerate = 64, 48, "yuv420p", 30
+    params = "keyint=5:min-keyint=5:scenecut=0:repeat-headers=1"
+    codec.options = {"bf": str(bframes), "x264-params": f"{params}:b-adapt=0"} if bframes else \
+        {"bf": "0", "tune": "zerolatency", "x264-params": params}
+    out = []
+    for i in range(n):
+        frame = av.VideoFrame.from_ndarray(np.full((48, 64, 3), 20 + i * 6, np.uint8), format="rgb24")
+        frame.pts = i
+        out += [bytes(p) for p in codec.encode(frame)]
+    return out + [bytes(p) for p in codec.encode(None)]
+
+
+@pytest.fixture(scope="module")
+def episode(tmp_path_factory):
+    cls = _message_classes()
+    path = tmp_path_factory.mktemp("das") / "episode.mcap"
+    with open(path, "wb") as f:
+        w = Writer(f, chunk_size=4000)
+        for i, packet in enumerate(_h264(N)):
+            t = T0 + i * DT
+            w.write_message(CAMERA, cls["CompressedVideo"](data=packet), log_time=t, publish_time=t)
+        # 状态频率与相机不同，且起止时间落在相机时间轴内外，覆盖插值、外推与姿态端点截断
+        for i in range(8):
+            t = T0 + 10_000_000 + i * 50_000_000
+            for r, angle in ((0, 0.2), (1, -0.3)):
+                m = cls["PoseStamped"]()
+                m.pose.position.x, m.pose.position.y, m.pose.position.z = i * 0.01, r, 0.5 - i * 0.02
+                q = Rotation.from_euler("zyx", [angle * i, 0.1 * i, 0.05 * r]).as_quat()
+                m.pose.orientation.x, m.pose.orientation.y, m.pose.orientation.z, m.pose.orientation.w = q
+                w.write_message(f"/robot{r}/vio/eef_pose", m, log_time=t, publish_time=t)
+            w.write_message("/robot0/joint", cls["Scalar"](value=np.sin(i)), log_time=t, publish_time=t)
+            w.write_message("/robot0/gripper", cls["Scalar"](value=0.01 * i), log_time=t, publish_time=t)
+            w.write_message("/base/odom", cls["Scalar"](value=1.5 - 0.1 * i * i), log_time=t, publish_time=t)
+        w.finish()
+    return path
+
+
+@pytest.fixture
+def reader(episode):
+    config = AdapterConfig(image_keys_map={CAMERA: "cam_high"}, arm_groups=ARMS, state_keys_map=BASE)
+    reader = DASMCAPAdapter(config)
+    assert reader.load(str(episode))
+    yield reader
+    reader.close()
+
+
+def _legacy_qpos(reader, target_time) -> np.ndarray:
+    """逐帧插值求 QPos 的原实现，作为整段状态矩阵的对照"""
+    qpos = []
+    for arm_name in sorted(reader.arm_groups):
+        group = reader.arm_groups[arm_name]
+        pt = group.get("pose_topic")
+        if pt and f"{pt}_pos" in reader.interpolators:
+            pos = reader.interpolators[f"{pt}_pos"](target_time)
+            t_min, t_max = reader.interpolators[f"{pt}_rot_bounds"]
+            rot = reader.interpolators[f"{pt}_rot"](np.clip(target_time, t_min, t_max)).as_quat()
+            qpos.extend(pos.tolist() + rot.tolist())
+        jt = group.get("joint_topic")
+        if jt and jt in reader.interpolators:
+            joints = reader.interpolators[jt](target_time)
+            qpos.extend(joints.tolist() if joints.ndim > 0 else [float(joints)])
+        gt = group.get("gripper_topic")
+        if gt and gt in reader.interpolators:
+            qpos.append(float(reader.interpolators[gt](target_time) * 10))
+    for topic in reader.base_map:
+        if topic in reader.interpolators:
+            base = reader.interpolators[topic](target_time)
+            qpos.extend(base.tolist() if base.ndim > 0 else [float(base)])
+    return np.array(qpos)
+
+
+def test_qpos_matrix_matches_per_frame_interpolation(reader):
+    matrix = reader.get_episode_states()["qpos"]
+    assert reader.get_length() == N
+    assert matrix.dtype == np.float32 and matrix.shape == (N, 7 + 1 + 1 + 7 + 1)
+    assert matrix.flags["C_CONTIGUOUS"]
+    for i in range(N):
+        expected = _legacy_qpos(reader, reader.timestamps[i])
+        np.testing.assert_allclose(matrix[i], expected, rtol=1e-5, atol=1e-6)
+        np.testing.assert_array_equal(reader.get_frame(i).state["qpos"], matrix[i])
+
+
+def test_qpos_names_follow_column_order(reader):
+    pose = ["x", "y", "z", "qx", "qy", "qz", "qw"]
+    assert reader.get_state_schema()["qpos"] == (
+        [f"left/{k}" for k in pose] + ["left/joint_0", "left/gripper"]
+        + [f"right/{k}" for k in pose] + ["base/odom_0"]
+    )
+    matrix = reader.get_episode_states()["qpos"]
+    names = reader.get_state_schema()["qpos"]
+    # 按名称取列与原始数据对应：右臂 y 恒为 1，夹爪已放大 10 倍
+    np.testing.assert_allclose(matrix[:, names.index("right/y")], 1.0)
+    t = reader.timestamps[4]
+    np.testing.assert_allclose(matrix[4, names.index("left/gripper")],
+                               float(reader.interpolators["/robot0/gripper"](t)) * 10, rtol=1e-5)
+
+
+@pytest.fixture(scope="module")
+def bframe_episodes(tmp_path_factory):
+    """两条相同的轨迹，相机码流含 B 帧；消息按解码顺序写入，时间戳单调递增"""
+    cls = _message_classes()
+    root = tmp_path_factory.mktemp("das_bframes")
+    packets = _h264(N, bframes=2)
+    with open(root / "a.mcap", "wb") as f:
+        w = Writer(f, chunk_size=4000)
+        for i, packet in enumerate(packets):
+            t = T0 + i * DT
+            w.write_message(CAMERA, cls["CompressedVideo"](data=packet), log_time=t, publish_time=t)
+        w.finish()
+    shutil.copy(root / "a.mcap", root / "b.mcap")
+    decoder = VideoDecoder()
+    reference = [img for p in packets for _, img in decoder.decode_frames(p)] + [img for _, img in decoder.flush()]
+    return root, reference
+
+
+def test_bframe_camera_frames_follow_display_order(bframe_episodes):
+    root, reference = bframe_episodes
+    reader = DASMCAPAdapter(AdapterConfig(image_keys_map={CAMERA: "cam_high"}))
+    assert reader.load(str(root))
+    assert reader.video_streams["cam_high"].reorder
+    assert reader.get_length() == N and reader.timestamps == sorted(reader.timestamps)
+    for i in [0, 1, 2, 3, 7, 11, 4, 6]:
+        np.testing.assert_array_equal(reader.get_frame(i).images["cam_high"], reference[i])
+
+    # 其他轨迹的快照走 MessageIndex 快速路径，同样按显示顺序取帧
+    fractions = [0.0, 0.1, 0.3, 0.5, 0.9]
+    snapshot = reader.get_snapshot_frames(fractions, episode_idx=1)
+    assert reader.current_episode_idx == 0 and snapshot.length == N
+    for pos, i in enumerate(snapshot.batch.indices):
+        img, _ = snapshot.batch.image_at("cam_high", pos)
+        np.testing.assert_array_equal(img, reference[i])
+    reader.close()
@@ -0,0 +1,117 @@
+# tests/test_dasmcap_stream.py
+import os
+import sys
+
+import av
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.adapters.dasmcap_adapter import LazyVideoStream, VideoDecoder, is_h264_bframe, is_h264_keyframe
+
+N, GOP = 35, 10
+
+
+def _encode(options):
+    """每帧亮度不同的 H.264 Annex-B 码流，关键帧带 SPS"""
+    codec = av.CodecContext.create("libx264", "w")
+    codec.width, codec.height, codec.pix_fmt, codec.framerate = 64, 48, "yuv420p", 30
+    codec.options = options
+    out = []
+    for i in range(N):
+        frame = av.VideoFrame.from_ndarray(np.full((48, 64, 3), 20 + i * 6, np.uint8), format="rgb24")
+        frame.pts = i
+        out += [bytes(p) for p in codec.encode(frame)]
+    out += [bytes(p) for p in codec.encode(None)]
+    assert len(out) == N
+    return out
+
+
+def _decode_all(packets):
+    decoder = VideoDecoder()
+    frames = [img for p in packets for _, img in decoder.decode_frames(p)] + [img for _, img in decoder.flush()]
+    assert len(frames) == N
+    return frames
+
+
+@pytest.fixture(scope="module")
+def packets():
+    return _encode({"bf": "0", "tune": "zerolatency",
+                    "x264-params": f"keyint={GOP}:min-keyint={GOP}:scenecut=0:repeat-headers=1"})
+
+
+@pytest.fixture(scope="module")
+def bframe_packets():
+    """含 B 帧的码流：包按解码顺序排列 (I P B B ...)，与显示顺序不同"""
+    return _encode({"bf": "2", "x264-params": f"keyint={GOP}:min-keyint={GOP}:scenecut=0:repeat-headers=1:b-adapt=0"})
+
+
+@pytest.fixture(scope="module")
+def reference(packets):
+    return _decode_all(packets)
+
+
+def _stream(packets, fetch=None, window_size=64, reorder=False):
+    """fetch 不为 None 时包引用为下标，由 fetch 取得字节 (用于模拟读取/解码失败)"""
+    keyframes = [i for i, p in enumerate(packets) if is_h264_keyframe(p)]
+    refs = list(range(len(packets))) if fetch else list(packets)
+    return LazyVideoStream(refs, keyframes, fetch or (lambda p: p), window_size, reorder=reorder)
+
+
+def test_sequential_and_random_access_match_full_decode(packets, reference):
+    stream = _stream(packets, window_size=4)
+    for i in list(range(N)) + [33, 2, 17, 9, 10, 0, 34]:
+        np.testing.assert_array_equal(stream.get(i), reference[i])
+
+
+def test_failed_packet_does_not_shift_later_frames(packets, reference):
+    stream = _stream(packets, fetch=lambda i: b"\x00\x00\x00\x01\x41garbage" if i == 13 else packets[i])
+    frames = [stream.get(i) for i in range(N)]
+    # 失败的包占位为 None；同一 GOP 后续的 P 帧缺少参考帧会有误差，但仍对应自己的下标
+    assert frames[13] is None
+    assert all(f is not None for i, f in enumerate(frames) if i != 13)
+    # 顺序播放跨入下一个 GOP 后与完整解码逐像素一致 (按输出计数时这里会整体错位一帧)
+    for i in range(20, N):
+        np.testing.assert_array_equal(frames[i], reference[i])
+
+
+def test_missing_frames_return_none_without_redecoding(packets):
+    fetched = []
+    def fetch(i):
+        fetched.append(i)
+        return b"" if i == 5 else packets[i]
+    stream = _stream(packets, fetch=fetch)
+    assert stream.get(6) is not None
+    count = len(fetched)
+    assert stream.get(5) is None
+    assert len(fetched) == count
+
+
+def test_bframe_detection(packets, bframe_packets):
+    assert not any(is_h264_bframe(p) for p in packets)
+    flags = [is_h264_bframe(p) for p in bframe_packets]
+    assert any(flags)
+    # 关键帧不是 B 帧
+    assert not any(f for f, p in zip(flags, bframe_packets) if is_h264_keyframe(p))
+
+
+def test_bframe_stream_follows_display_order(bframe_packets):
+    reference = _decode_all(bframe_packets)
+    # 画面亮度随显示顺序单调递增，确认对照本身是显示顺序
+    assert np.all(np.diff([img.mean() for img in reference]) > 0)
+    stream = _stream(bframe_packets, window_size=4, reorder=True)
+    for i in list(range(N)) + [33, 2, 17, 9, 10, 0, 34, 1]:
+        np.testing.assert_array_equal(stream.get(i), reference[i])
+
+
+def test_failed_bframe_packet_stays_in_its_gop(bframe_packets):
+    reference = _decode_all(bframe_packets)
+    bad = next(i for i, p in enumerate(bframe_packets) if i > GOP and is_h264_bframe(p))
+    stream = _stream(bframe_packets, fetch=lambda i: b"" if i == bad else bframe_packets[i], reorder=True)
+    frames = [stream.get(i) for i in range(N)]
+    # 出错的 GOP 末尾占位为 None，之后的 GOP 与完整解码一致
+    gop_end = (bad // GOP + 1) * GOP
+    assert frames[gop_end - 1] is None
+    for i in list(range(bad // GOP * GOP)) + list(range(gop_end, N)):
+        np.testing.assert_array_equal(frames[i], reference[i])
@@ -0,0 +1,97 @@
+# tests/test_episode_pool.py
+import os
+import sys
+
+import h5py
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.adapters.hdf5_adapter import HDF5Adapter
+from src.core.episode_pool import EpisodeHandlePool, empty_like, estimate_nbytes
+from src.core.interface import AdapterConfig
+
+
+@pytest.fixture(autouse=True)
+def fresh_shared_pool(monkeypatch):
+    monkeypatch.setattr(EpisodeHandlePool, "_shared", None)
+
+
+def _checkin(pool, key, released, nbytes=0):
+    pool.checkin(key, {"data": np.zeros(nbytes, np.uint8), "key": key}, lambda state: released.append(state["key"]))
+
+
+def test_lru_by_entries_and_bytes():
+    released = []
+    pool = EpisodeHandlePool(max_entries=2, max_mb=1)
+    _checkin(pool, "a", released)
+    _checkin(pool, "b", released)
+    _checkin(pool, "c", released)
+    assert released == ["a"] and len(pool) == 2
+
+    _checkin(pool, "big", released, nbytes=2 * 1024 * 1024)   # 超过整个预算，直接释放
+    assert released == ["a", "big"]
+    _checkin(pool, "d", released, nbytes=700 * 1024)
+    _checkin(pool, "e", released, nbytes=700 * 1024)
+    assert released == ["a", "big", "b", "c", "d"]
+
+
+def test_checkout_is_exclusive():
+    released = []
+    pool = EpisodeHandlePool(max_entries=4)
+    _checkin(pool, "a", released)
+    assert pool.checkout("a")["key"] == "a"
+    assert pool.checkout("a") is None
+    assert pool.stats()["hits"] == 1 and pool.stats()["misses"] == 1
+    assert released == []
+
+
+def test_last_detach_releases_everything():
+    released = []
+    pool = EpisodeHandlePool(max_entries=4)
+    pool.attach()
+    pool.attach()
+    _checkin(pool, "a", released)
+    pool.detach()
+    assert released == [] and len(pool) == 1
+    pool.detach()
+    assert released == ["a"] and len(pool) == 0
+
+
+def test_helpers():
+    assert estimate_nbytes({"a": np.zeros(10, np.uint8), "b": [b"xy", "z"]}) == 13
+    assert empty_like(np.ones((3, 2))).shape == (0, 0)
+    assert empty_like({"a": 1}) == {} and empty_like(True) is False and empty_like(object()) is None
+
+
+def _episodes(tmp_path, n=2):
+    for i in range(n):
+        with h5py.File(tmp_path / f"episode_{i}.hdf5", "w") as f:
+            f.create_dataset("observations/qpos", data=np.full((5, 2), i, np.float32))
+            f.create_dataset("observations/images/cam", data=np.full((5, 4, 4, 3), i, np.uint8))
+
+
+def test_hdf5_reader_close_releases_pooled_files(tmp_path):
+    _episodes(tmp_path)
+    config = AdapterConfig(extra_options={"episode_pool_size": 4})
+    first, second = HDF5Adapter(config), HDF5Adapter(config)
+    assert first.load(str(tmp_path)) and second.load(str(tmp_path))
+    pool = first.episode_pool
+    assert pool is second.episode_pool and pool.stats()["owners"] == 2
+
+    first.set_episode(1)                # episode_0 的句柄移入池中
+    handle = pool._entries[next(iter(pool._entries))][0]["file"]
+    assert handle.id.valid
+
+    first.close()                       # 另一个读取器仍在使用，池保留
+    assert len(pool) == 2 and handle.id.valid
+    second.close()                      # 最后一个读取器关闭，池中句柄全部关闭
+    assert len(pool) == 0 and not handle.id.valid
+
+    # 关闭后重新使用会再次登记
+    first.set_episode(0)
+    assert pool.stats()["owners"] == 1
+    assert first.get_frame(0).images["cam"][0, 0, 0] == 0
+    first.close()
+    assert len(pool) == 0
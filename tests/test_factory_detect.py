@@ -0,0 +1,138 @@
+# tests/test_factory_detect.py
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.factory import ReaderFactory
+
+
+def reference_detect_type(path: Path) -> str:
+    """重构前基于 glob 的 detect_type，作为一致性对照"""
+    if path.is_dir():
+        if (path / "data.json").exists(): return "Unitree"
+        if (path / "meta" / "info.json").exists(): return "LeRobot"
+        if (path / "metadata.yaml").exists(): return "ROS"
+
+        has_loose_files = list(path.glob("*.hdf5")) or list(path.glob("*.h5")) or list(path.glob("*.bag")) or list(path.glob("*.mcap"))
+        if not has_loose_files:
+            if list(path.glob("*/meta/info.json")): return "LeRobot"
+            if list(path.glob("*/data.json")): return "Unitree"
+            if (path / "data").is_dir():
+                try:
+                    next((path / "data").rglob("*.parquet"))
+                    return "LeRobot"
+                except StopIteration: pass
+
+        if list(path.glob("*.hdf5")) or list(path.glob("*.h5")): return "HDF5"
+        if list(path.glob("*.bag")) or list(path.glob("*.mcap")): return "ROS"
+        if list(path.glob("*.jpg")) or list(path.glob("*.png")) or list(path.glob("colors/*.jpg")): return "RawFolder"
+    else:
+        ext = path.suffix.lower()
+        if ext in ['.h5', '.hdf5']: return "HDF5"
+        if ext in ['.bag', '.mcap']: return "ROS"
+        if ext == '.parquet': return "LeRobot"
+    return "Unknown"
+
+
+TREES = {
+    "unitree": ["data.json", "colors/0.jpg"],
+    "unitree_multi": ["ep0/data.json", "ep1/data.json"],
+    "lerobot": ["meta/info.json", "data/chunk-000/episode_000000.parquet"],
+    "lerobot_multi": ["a/meta/info.json", "b/meta/info.json"],
+    "lerobot_data_only": ["data/chunk-000/sub/x.parquet"],
+    "meta_without_info": ["meta/stats.json", "img.png"],
+    "ros_dir": ["metadata.yaml", "x.db3"],
+    "hdf5_loose": ["a.hdf5", "sub/meta/info.json"],
+    "h5_upper": ["a.H5"],
+    "mcap_loose": ["a.mcap", "b.jpg"],
+    "bag_and_json": ["a.bag", "ep/data.json"],
+    "images": ["0001.jpg", "0002.jpg"],
+    "png_upper": ["x.PNG"],
+    "colors": ["colors/0.jpg", "depth/0.png"],
+    "colors_png": ["colors/0.png"],
+    "empty_data": ["data/chunk-000/readme.txt"],
+    "unknown": ["notes.txt"],
+}
+
+
+@pytest.fixture
+def trees(tmp_path):
+    for name, files in TREES.items():
+        for rel in files:
+            p = tmp_path / name / rel
+            p.parent.mkdir(parents=True, exist_ok=True)
+            p.write_bytes(b"")
+    (tmp_path / "empty").mkdir()
+    return tmp_path
+
+
+def test_detect_type_matches_glob_reference(trees):
+    ReaderFactory.clear_type_cache()
+    paths = [p for p in sorted(trees.iterdir())] + [trees / "lerobot" / "data" / "chunk-000" / "episode_000000.parquet",
+                                                    trees / "hdf5_loose" / "a.hdf5", trees / "missing"]
+    for path in paths:
+        expected = reference_detect_type(path)
+        assert ReaderFactory.detect_type(path) == expected, path.name
+        # 命中缓存后结果不变
+        assert ReaderFactory.detect_type(path) == expected, path.name
+
+
+def _touch(path: Path):
+    # 保证依赖目录的 mtime 与上一次探测时不同 (部分文件系统时间戳精度为毫秒级)
+    time.sleep(0.02)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"")
+
+
+@pytest.mark.parametrize("added, expected", [
+    ("sub/meta/info.json", "LeRobot"),          # 子目录内新增 meta/info.json
+    ("sub/data.json", "Unitree"),               # 子目录内新增 data.json
+    ("data/chunk-000/x.parquet", "LeRobot"),    # data/ 的下层目录内新增 parquet
+    ("colors/0.jpg", "RawFolder"),              # colors/ 内新增图片
+])
+def test_cache_sees_changes_in_subdirectories(tmp_path, added, expected):
+    ReaderFactory.clear_type_cache()
+    root = tmp_path / "ds"
+    for d in ("sub/meta", "data/chunk-000", "colors"):
+        (root / d).mkdir(parents=True)
+    assert ReaderFactory.detect_type(root) == "Unknown"
+    top_mtime = os.stat(root).st_mtime_ns
+    _touch(root / added)
+    assert os.stat(root).st_mtime_ns == top_mtime
+    assert ReaderFactory.detect_type(root) == expected == reference_detect_type(root)
+
+
+@pytest.mark.parametrize("existing, added, expected", [
+    ("sub", "sub/meta/info.json", "LeRobot"),          # 子目录新建 meta/info.json
+    ("sub/meta", "sub/meta/info.json", "LeRobot"),     # 已有空的 meta/ 内新增 info.json
+    ("sub", "sub/data.json", "Unitree"),
+    ("meta", "meta/info.json", "LeRobot"),             # 数据集根目录自身的 meta/info.json
+])
+def test_cache_sees_marker_files_without_mtime_change(tmp_path, existing, added, expected):
+    # 模拟 mtime 精度较粗的文件系统：新增标志文件后把沿途目录的 mtime 恢复原值
+    ReaderFactory.clear_type_cache()
+    root = tmp_path / "ds"
+    (root / existing).mkdir(parents=True)
+    assert ReaderFactory.detect_type(root) == "Unknown"
+    dirs = [root / Path(added).parents[i] for i in range(len(Path(added).parents) - 1)] + [root]
+    stamps = {d: os.stat(d).st_mtime_ns for d in dirs if d.exists()}
+    (root / added).parent.mkdir(parents=True, exist_ok=True)
+    (root / added).write_bytes(b"{}")
+    for d in dirs:
+        mtime = stamps.get(d, os.stat(d).st_mtime_ns)
+        os.utime(d, ns=(mtime, mtime))
+    assert ReaderFactory.detect_type(root) == expected == reference_detect_type(root)
+
+
+def test_type_cache_is_bounded(tmp_path, monkeypatch):
+    ReaderFactory.clear_type_cache()
+    monkeypatch.setattr(ReaderFactory, "TYPE_CACHE_SIZE", 3)
+    for i in range(10):
+        (tmp_path / f"d{i}").mkdir()
+        ReaderFactory.detect_type(tmp_path / f"d{i}")
+    assert list(ReaderFactory._type_cache) == [str(tmp_path / f"d{i}") for i in (7, 8, 9)]
@@ -0,0 +1,94 @@
+# tests/test_frame_cache.py
+import os
+import sys
+import threading
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.adapters.folder_adapter import FolderAdapter
+from src.core.frame_cache import FrameCache
+from src.core.interface import AdapterConfig
+
+MB = 1024 * 1024
+
+
+@pytest.fixture(autouse=True)
+def fresh_shared_cache(monkeypatch):
+    monkeypatch.setattr(FrameCache, "_shared", None)
+
+
+def _img(mb: float) -> np.ndarray:
+    return np.zeros(int(mb * MB), np.uint8)
+
+
+def test_lru_eviction_by_bytes():
+    cache = FrameCache(max_mb=3)
+    for key in "abc":
+        cache.put(key, _img(1))
+    cache.get("a")                  # a 变为最近使用
+    cache.put("d", _img(1))
+    assert set(cache._data) == {"a", "c", "d"}
+    assert cache.current_bytes == 3 * MB
+
+
+def test_oversized_and_none_are_not_cached():
+    cache = FrameCache(max_mb=1)
+    cache.put("big", _img(2))
+    cache.put("none", None)
+    assert len(cache) == 0 and cache.current_bytes == 0
+
+
+def test_cached_arrays_are_read_only():
+    cache = FrameCache(max_mb=1)
+    value = cache.get_or_load("k", lambda: np.ones((2, 2)))
+    with pytest.raises(ValueError):
+        value[0, 0] = 5
+    assert cache.get_or_load("k", lambda: pytest.fail("loader called on hit")) is value
+    assert cache.stats()["hits"] == 1
+
+
+def test_get_or_load_is_thread_safe():
+    cache = FrameCache(max_mb=1)
+    def worker(start):
+        for i in range(200):
+            cache.get_or_load((start + i) % 50, lambda: np.zeros(1024, np.uint8))
+    threads = [threading.Thread(target=worker, args=(s,)) for s in range(8)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert cache.current_bytes == sum(v.nbytes for v in cache._data.values()) <= cache.max_bytes
+
+
+def test_shared_budget_follows_latest_request_and_is_capped():
+    big = FrameCache.from_options({"frame_cache_mb": 10 ** 6})
+    assert big.max_bytes == FrameCache.MAX_SHARED_MB * MB
+
+    for key in "abcd":
+        big.put(key, _img(1))
+    small = FrameCache.from_options({"frame_cache_mb": 2})
+    assert small is big
+    assert big.max_bytes == 2 * MB and big.current_bytes <= 2 * MB
+    assert set(big._data) == {"c", "d"}
+    assert FrameCache.from_options({}) is None
+
+
+def test_folder_get_frames_uses_frame_cache(tmp_path, monkeypatch):
+    for i in range(4):
+        cv2.imwrite(str(tmp_path / f"{i:04d}_cam.png"), np.full((8, 8, 3), i * 10, np.uint8))
+    reader = FolderAdapter(AdapterConfig(extra_options={"frame_cache_mb": 8}))
+    assert reader.load(str(tmp_path))
+
+    calls = []
+    read_image = FolderAdapter._read_image
+    monkeypatch.setattr(FolderAdapter, "_read_image", staticmethod(lambda path, scale=1: calls.append(path) or read_image(path, scale)))
+
+    first = reader.get_frames([2, 0, 2])
+    assert len(calls) == 2          # 重复的下标只解码一次
+    reader.get_frame(0)
+    second = reader.get_frames([0, 2, 3])
+    assert len(calls) == 3          # 只有 3 未命中缓存
+    np.testing.assert_array_equal(first.images["cam"][0], second.images["cam"][1])
+    reader.close()
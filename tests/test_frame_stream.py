@@ -0,0 +1,88 @@
+# tests/test_frame_stream.py
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.frame_stream import FrameStream
+from src.core.interface import BaseDatasetReader, FrameData
+
+
+class CountingReader(BaseDatasetReader):
+    """记录 get_frame 的调用与最大并发数"""
+    def __init__(self, length=30, concurrent=False, delay=0.002):
+        super().__init__()
+        self.length = length
+        self.supports_concurrent_reads = concurrent
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def load(self, file_path): return True
+    def get_length(self): return self.length
+    def get_all_sensors(self): return ["cam"]
+    def get_total_episodes(self): return 1
+    def set_episode(self, episode_idx): pass
+    def close(self): pass
+    def get_current_episode_path(self): return "counting"
+
+    def get_frame(self, index, specific_cameras=None):
+        with self.lock:
+            self.calls.append((index, specific_cameras))
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        return FrameData(timestamp=index / 10, images={"cam": np.full((1, 1, 3), index, np.uint8)})
+
+
+def test_yields_all_frames_in_order():
+    reader = CountingReader(concurrent=True)
+    with FrameStream(reader, depth=4, workers=4) as stream:
+        assert len(stream) == 30
+        result = [(i, int(frame.images["cam"][0, 0, 0])) for i, frame in stream]
+    assert result == [(i, i) for i in range(30)]
+    assert reader.max_active > 1
+
+
+def test_custom_indices_and_cameras():
+    reader = CountingReader()
+    with FrameStream(reader, indices=[5, 1, 5], cameras=["cam"]) as stream:
+        assert [i for i, _ in stream] == [5, 1, 5]
+    assert sorted(reader.calls) == [(1, ["cam"]), (5, ["cam"]), (5, ["cam"])]
+
+
+def test_non_concurrent_reader_uses_one_worker():
+    reader = CountingReader(concurrent=False)
+    stream = FrameStream(reader, depth=8, workers=4)
+    assert stream.workers == 1
+    list(stream)
+    assert reader.max_active == 1
+
+
+def test_prefetch_depth_is_bounded():
+    reader = CountingReader(concurrent=True, delay=0)
+    seen = []
+    with FrameStream(reader, depth=3, workers=2) as stream:
+        for i, _ in stream:
+            time.sleep(0.01)
+            seen.append((i, len(reader.calls)))
+    # 产出第 i 帧时，除已产出的 i + 1 帧外最多还有 depth 帧在预取
+    assert all(calls - (i + 1) <= 3 for i, calls in seen)
+    assert max(calls - (i + 1) for i, calls in seen[:-3]) == 3
+
+
+def test_early_break_stops_reading():
+    reader = CountingReader(length=200, concurrent=True)
+    with FrameStream(reader, depth=4, workers=2) as stream:
+        for i, _ in stream:
+            if i == 5: break
+    assert stream._executor is None and not stream._pending
+    assert len(reader.calls) <= 6 + 4
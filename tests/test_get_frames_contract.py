@@ -0,0 +1,113 @@
+# tests/test_get_frames_contract.py
+import json
+import os
+import sys
+
+import cv2
+import h5py
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.adapters.folder_adapter import FolderAdapter
+from src.adapters.hdf5_adapter import HDF5Adapter
+from src.adapters.lerobot_adapter import LeRobotAdapter
+from src.core.interface import BaseDatasetReader, FrameBatch, FrameData
+
+N = 6
+
+
+class ListReader(BaseDatasetReader):
+    """只实现 get_frame 的最小读取器，用于检验基类默认的 get_frames"""
+    def load(self, file_path): return True
+    def get_length(self): return N
+    def get_all_sensors(self): return ["cam"]
+    def get_frame(self, index, specific_cameras=None):
+        if index < 0 or index >= N: return None
+        return FrameData(timestamp=index * 0.1, images={"cam": np.full((2, 2, 3), index, np.uint8)},
+                         state={"qpos": np.array([index, -index], dtype=np.float32)})
+    def get_total_episodes(self): return 1
+    def set_episode(self, episode_idx): pass
+    def close(self): pass
+    def get_current_episode_path(self): return "list"
+
+
+def _hdf5(tmp_path):
+    path = tmp_path / "ep.hdf5"
+    with h5py.File(path, "w") as f:
+        f.create_dataset("observations/images/cam", data=np.arange(N, dtype=np.uint8)[:, None, None, None] * np.ones((N, 4, 4, 3), np.uint8))
+        f.create_dataset("observations/qpos", data=np.arange(N * 2, dtype=np.float32).reshape(N, 2))
+    reader = HDF5Adapter()
+    assert reader.load(str(path))
+    return reader
+
+
+def _folder(tmp_path):
+    for i in range(N):
+        cv2.imwrite(str(tmp_path / f"{i:04d}_cam.png"), np.full((4, 4, 3), i * 10, np.uint8))
+    reader = FolderAdapter()
+    assert reader.load(str(tmp_path))
+    return reader
+
+
+def _lerobot(tmp_path):
+    (tmp_path / "meta").mkdir()
+    (tmp_path / "meta" / "info.json").write_text(json.dumps({
+        "codebase_version": "v2.1", "fps": 10, "total_episodes": 1,
+        "data_path": "data/chunk-{episode_chunk:03d}/episode_{episode_index:06d}.parquet",
+        "features": {"observation.state": {"dtype": "float32", "shape": [2]}},
+    }))
+    (tmp_path / "data" / "chunk-000").mkdir(parents=True)
+    pq.write_table(pa.table({
+        "timestamp": np.arange(N) / 10.0, "episode_index": np.zeros(N, np.int64), "frame_index": np.arange(N),
+        "observation.state": pa.array([[float(i), -float(i)] for i in range(N)], type=pa.list_(pa.float32(), 2)),
+    }), str(tmp_path / "data" / "chunk-000" / "episode_000000.parquet"))
+    reader = LeRobotAdapter()
+    assert reader.load(str(tmp_path))
+    return reader
+
+
+READERS = {"base": lambda tmp_path: ListReader(), "hdf5": _hdf5, "folder": _folder, "lerobot": _lerobot}
+
+
+@pytest.fixture(params=sorted(READERS))
+def reader(request, tmp_path):
+    r = READERS[request.param](tmp_path)
+    yield r
+    r.close()
+
+
+def test_out_of_range_raises(reader):
+    for bad in ([N], [-1], [0, N + 3]):
+        with pytest.raises(IndexError):
+            reader.get_frames(bad)
+
+
+def test_positions_match_request(reader):
+    wanted = [3, 0, 3, N - 1]
+    batch = reader.get_frames(wanted)
+    assert batch.indices == wanted
+    assert len(batch.timestamps) == len(wanted)
+    for pos, i in enumerate(wanted):
+        frame = reader.get_frame(i)
+        assert batch.timestamps[pos] == pytest.approx(frame.timestamp)
+        for cam, img in frame.images.items():
+            np.testing.assert_array_equal(batch.images[cam][pos], img)
+        for key, value in (frame.state or {}).items():
+            np.testing.assert_array_equal(batch.state[key][pos], value)
+
+
+def test_empty_request(reader):
+    batch = reader.get_frames([])
+    assert batch.indices == [] and len(batch.timestamps) == 0
+
+
+def test_from_frames_keeps_failed_positions():
+    frames = [FrameData(0.0, {"cam": np.zeros((2, 2, 3))}), None, FrameData(0.2, {"cam": np.ones((2, 2, 3))})]
+    batch = FrameBatch.from_frames([0, 1, 2], frames)
+    assert batch.indices == [0, 1, 2]
+    assert np.isnan(batch.timestamps[1])
+    assert batch.images["cam"][1] is None and batch.images["cam"][2] is not None
@@ -0,0 +1,97 @@
+# tests/test_hdf5_blocks.py
+import os
+import sys
+import threading
+from concurrent.futures import CancelledError
+
+import cv2
+import h5py
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.adapters.hdf5_adapter import HDF5Adapter
+from src.core.frame_stream import FrameStream
+from src.core.image_codec import decode_image
+from src.core.interface import AdapterConfig
+
+N = 300
+
+
+def _jpeg(i: int) -> np.ndarray:
+    img = np.zeros((24, 32, 3), dtype=np.uint8)
+    img[:, :, 0] = i % 256
+    img[i % 24, :, 1] = 255
+    ok, buf = cv2.imencode(".jpg", img)
+    return buf.ravel()
+
+
+@pytest.fixture
+def episode(tmp_path):
+    path = tmp_path / "episode_0.hdf5"
+    with h5py.File(path, "w") as f:
+        # 一维变长 JPEG 数据集，chunk 行数远大于 block_rows
+        ds = f.create_dataset("observations/images/cam_jpeg", (N,), dtype=h5py.vlen_dtype(np.uint8), chunks=(256,))
+        for i in range(N): ds[i] = _jpeg(i)
+        f.create_dataset("observations/images/cam_raw", data=np.random.randint(0, 255, (N, 8, 10, 3), dtype=np.uint8),
+                         chunks=(64, 8, 10, 3))
+        f.create_dataset("observations/qpos", data=np.arange(N * 2, dtype=np.float32).reshape(N, 2))
+    return path
+
+
+def _reader(path, **extra) -> HDF5Adapter:
+    reader = HDF5Adapter(AdapterConfig(extra_options=dict(block_rows=16, **extra)))
+    assert reader.load(str(path))
+    return reader
+
+
+def test_random_access_reads_one_capped_block(episode):
+    reader = _reader(episode)
+    frame = reader.get_frame(200, ["cam_jpeg"])
+    stats = reader.get_io_stats()
+    assert stats["blocks_read"] == 1 and stats["rows_read"] == 16
+    # 只解码被访问的一行
+    assert stats["images_decoded"] == 1
+    np.testing.assert_array_equal(frame.images["cam_jpeg"], decode_image(_jpeg(200).tobytes()))
+    reader.close()
+
+
+def test_block_reads_match_direct_reads(episode):
+    reader = _reader(episode)
+    with h5py.File(episode, "r") as f:
+        raw = f["observations/images/cam_raw"][()]
+    for i in (0, 15, 16, 63, 64, 299):
+        frame = reader.get_frame(i)
+        np.testing.assert_array_equal(frame.images["cam_raw"], raw[i])
+        np.testing.assert_array_equal(frame.images["cam_jpeg"], decode_image(_jpeg(i).tobytes()))
+    reader.keep_encoded_images = True
+    assert reader.get_frame(17).encoded_images["cam_jpeg"] == _jpeg(17).tobytes()
+    reader.close()
+
+
+def test_concurrent_stream_decodes_each_row_once(episode):
+    reader = _reader(episode, chunk_cache_size=64)
+    with FrameStream(reader, depth=32, workers=8, cameras=["cam_jpeg"]) as stream:
+        frames = {i: f for i, f in stream}
+    assert len(frames) == N
+    stats = reader.get_io_stats()
+    assert stats["images_decoded"] == N
+    assert stats["blocks_read"] == -(-N // 16)
+    reader.close()
+
+
+def test_close_does_not_cancel_pending_readers(episode):
+    reader = _reader(episode)
+    errors = []
+    def worker(start):
+        try:
+            for i in range(start, N, 7): reader.get_frame(i, ["cam_jpeg"])
+        except Exception as e:
+            # 关闭后的新请求报 "File not loaded" 等错误属预期，但等待中的块/解码结果不应被取消
+            errors.append(e)
+    threads = [threading.Thread(target=worker, args=(s,)) for s in range(4)]
+    for t in threads: t.start()
+    reader.close()
+    for t in threads: t.join()
+    assert not [e for e in errors if isinstance(e, CancelledError)]
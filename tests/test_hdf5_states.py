@@ -0,0 +1,78 @@
+# tests/test_hdf5_states.py
+import os
+import sys
+
+import h5py
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.adapters.hdf5_adapter import HDF5Adapter
+from src.core.interface import AdapterConfig
+
+N = 12
+BASE = {"qpos": "observations/qpos", "effort": "observations/effort", "missing": "observations/nothing",
+        "scalar": "observations/scalar"}
+ARMS = {"left": {"eef": "left/eef", "gripper": "left/gripper"}}
+
+
+@pytest.fixture
+def episode(tmp_path):
+    data = {
+        "observations/qpos": np.arange(N * 6, dtype=np.float32).reshape(N, 6),
+        "observations/effort": np.linspace(0, 1, N),
+        "left/eef": np.random.rand(N, 7),
+        "left/gripper": np.arange(N, dtype=np.int32),
+    }
+    path = tmp_path / "episode_0.hdf5"
+    with h5py.File(path, "w") as f:
+        for key, value in data.items():
+            f.create_dataset(key, data=value)
+        f.create_dataset("observations/scalar", data=3.0)
+    return path, data
+
+
+@pytest.fixture
+def dataset_reads(monkeypatch):
+    """记录 h5py.Dataset 的读取次数"""
+    reads = []
+    real_getitem = h5py.Dataset.__getitem__
+    def counting_getitem(self, args, *rest, **kwargs):
+        reads.append(self.name)
+        return real_getitem(self, args, *rest, **kwargs)
+    monkeypatch.setattr(h5py.Dataset, "__getitem__", counting_getitem)
+    return reads
+
+
+def test_states_are_preloaded_once_per_episode(episode, dataset_reads):
+    path, data = episode
+    reader = HDF5Adapter(AdapterConfig(state_keys_map=BASE, arm_groups=ARMS))
+    assert reader.load(str(path))
+    # 每个映射的数据集在 set_episode 时整段读取一次，缺失与标量数据集跳过
+    assert sorted(dataset_reads) == sorted(f"/{p}" for p in data)
+
+    dataset_reads.clear()
+    for i in range(N):
+        frame = reader.get_frame(i)
+        np.testing.assert_array_equal(frame.state["qpos"], data["observations/qpos"][i])
+        np.testing.assert_array_equal(frame.state["left_eef"], data["left/eef"][i])
+        assert frame.state["left_gripper"] == i
+    batch = reader.get_frames([3, 0, 11])
+    np.testing.assert_array_equal(batch.state["effort"], data["observations/effort"][[3, 0, 11]])
+    # 逐帧与批量读取只是数组切片，不再访问 HDF5
+    assert dataset_reads == []
+    reader.close()
+
+
+def test_episode_states_are_full_arrays(episode):
+    path, data = episode
+    reader = HDF5Adapter(AdapterConfig(state_keys_map=BASE, arm_groups=ARMS))
+    assert reader.load(str(path))
+    states = reader.get_episode_states()
+    assert {k: v.shape for k, v in states.items()} == {"qpos": (N, 6), "effort": (N, 1), "left_eef": (N, 7),
+                                                       "left_gripper": (N, 1)}
+    np.testing.assert_array_equal(states["qpos"], data["observations/qpos"])
+    np.testing.assert_array_equal(states["effort"][:, 0], data["observations/effort"])
+    assert reader.get_state_schema()["left_eef"] == [f"left_eef_{j}" for j in range(7)]
+    reader.close()
@@ -0,0 +1,96 @@
+# tests/test_image_codec.py
+import os
+import subprocess
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.adapters.folder_adapter import FolderAdapter
+from src.core.frame_cache import FrameCache
+from src.core.image_codec import decode_image, downscale, normalize_scale, read_image
+from src.core.interface import AdapterConfig
+
+
+def _rgb(h=36, w=50):
+    img = np.zeros((h, w, 3), np.uint8)
+    img[..., 0] = 200   # 纯红，用于检查通道顺序
+    return img
+
+
+def _encode(img, ext):
+    ok, buf = cv2.imencode(ext, cv2.cvtColor(img, cv2.COLOR_RGB2BGR))
+    assert ok
+    return buf.tobytes()
+
+
+@pytest.mark.parametrize("value, expected", [
+    (1, 1), (2, 2), (3, 2), (4, 4), (7, 4), (8, 8), (16, 8),
+    (0.5, 2), (0.25, 4), (None, 1), (0, 1), ("2", 2), ("bad", 1), (-3, 1),
+])
+def test_normalize_scale(value, expected):
+    assert normalize_scale(value) == expected
+
+
+def test_interface_does_not_load_opencv():
+    # 接口层只需要 normalize_scale，导入时不应加载 OpenCV
+    code = "import sys; import src.core.interface; assert 'cv2' not in sys.modules"
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    subprocess.run([sys.executable, "-c", code], cwd=root, check=True)
+
+
+def test_reader_preview_scale_is_normalized_on_assignment(tmp_path, monkeypatch):
+    monkeypatch.setattr(FrameCache, "_shared", None)
+    cv2.imwrite(str(tmp_path / "0000_cam.png"), np.zeros((16, 16, 3), np.uint8))
+    reader = FolderAdapter(AdapterConfig(extra_options={"preview_scale": 0.25, "frame_cache_mb": 8}))
+    assert reader.preview_scale == 4
+    assert reader.load(str(tmp_path))
+
+    # 调用方直接赋值非档位值：缓存 key 与解码使用同一个倍数
+    reader.preview_scale = 3
+    assert reader.preview_scale == 2
+    img = reader.get_frame(0).images["cam"]
+    assert img.shape[:2] == (8, 8)
+    assert [key[-1] for key in reader.frame_cache._data] == [2]
+    reader.close()
+
+
+@pytest.mark.parametrize("scale, size", [(1, (36, 50)), (2, (18, 25)), (4, (9, 13)), (8, (5, 7)), (3, (18, 25))])
+def test_decode_jpeg_scales_and_returns_rgb(scale, size):
+    # JPEG 在 IDCT 阶段缩小，边长向上取整
+    img = decode_image(_encode(_rgb(), ".jpg"), scale)
+    assert img.shape == size + (3,)
+    r, g, b = img.reshape(-1, 3).mean(axis=0)
+    assert r > 150 and g < 30 and b < 30
+
+
+@pytest.mark.parametrize("scale", [1, 2, 4, 8])
+def test_decode_png_scales_and_returns_rgb(scale):
+    img = decode_image(_encode(_rgb(48, 64), ".png"), scale)
+    assert img.shape == (48 // scale, 64 // scale, 3)
+    assert tuple(img[0, 0]) == (200, 0, 0)
+
+
+def test_decode_image_accepts_ndarray_and_rejects_garbage():
+    data = np.frombuffer(_encode(_rgb(), ".png"), np.uint8)
+    assert decode_image(data).shape == (36, 50, 3)
+    assert decode_image(b"not an image") is None
+
+
+def test_read_image(tmp_path):
+    path = tmp_path / "img.jpg"
+    path.write_bytes(_encode(_rgb(), ".jpg"))
+    assert read_image(path, 2).shape == (18, 25, 3)
+    assert read_image(tmp_path / "missing.jpg") is None
+
+
+def test_downscale_matches_reduced_decode_size():
+    img = _rgb()
+    assert downscale(img, 1) is img
+    assert downscale(None, 4) is None
+    for scale in (2, 4, 8):
+        assert downscale(img, scale).shape == decode_image(_encode(img, ".jpg"), scale).shape
+    assert downscale(np.zeros((3, 3), np.uint16), 8).shape == (1, 1)
@@ -0,0 +1,132 @@
+# tests/test_inspector.py
+import json
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.inspector import DatasetInspector
+
+
+def _write(path, data: bytes = b"x", mtime: float = None):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def _make_lerobot(root, episodes: int):
+    _write(root / "meta" / "info.json", json.dumps({"total_episodes": episodes}).encode(), mtime=1_000_000)
+    _write(root / "data" / "chunk-000" / "episode_000000.parquet", b"p" * 10, mtime=1_000_000)
+    _write(root / "videos" / "chunk-000" / "top" / "episode_000000.mp4", b"v" * 1000, mtime=1_000_000)
+
+
+def _record(inspector, path):
+    index = json.loads(inspector.index_path.read_text(encoding="utf-8"))
+    return next(r for entry in index["dirs"].values() for r in entry["records"] if r["path"] == str(path))
+
+
+def test_rescan_detects_nested_lerobot_changes(tmp_path):
+    # grp 下含 */meta/info.json，整体识别为一个多仓库 LeRobot 数据集，改动发生在两层之下
+    ds = tmp_path / "grp"
+    _make_lerobot(ds / "lr", episodes=2)
+    first = DatasetInspector(str(tmp_path), workers=2)
+    first.scan()
+    assert first.changes["added"] == [str(ds)]
+    before = _record(first, ds)
+    assert before["episodes"] == 2
+    # 视频目录不参与大小统计，首次扫描无需遍历
+    assert not any(rel.startswith("videos") for rel in before["files"])
+
+    # 只改动数据集内部: 改写 info.json、新增一个 parquet (数据集目录本身 mtime 不变)
+    ds_mtime = os.stat(ds).st_mtime
+    _write(ds / "lr" / "meta" / "info.json", json.dumps({"total_episodes": 5}).encode(), mtime=2_000_000)
+    _write(ds / "lr" / "data" / "chunk-000" / "episode_000001.parquet", b"p" * 12, mtime=2_000_000)
+    assert os.stat(ds).st_mtime == ds_mtime
+
+    second = DatasetInspector(str(tmp_path), workers=2)
+    second.scan()
+    assert second.changes["modified"] == [str(ds)]
+    after = _record(second, ds)
+    assert after["episodes"] == 5
+    assert after["size"] > before["size"]
+
+
+def test_rescan_without_changes_reuses_index(tmp_path):
+    _make_lerobot(tmp_path / "lr", episodes=2)
+    _write(tmp_path / "a.hdf5", b"h" * 8)
+    DatasetInspector(str(tmp_path)).scan()
+
+    again = DatasetInspector(str(tmp_path))
+    again.scan()
+    assert again.dirs_rescanned == 0
+    assert again.changes == {"added": [], "removed": [], "modified": []}
+    assert again.get_all_valid_paths() == sorted([str(tmp_path / "a.hdf5"), str(tmp_path / "lr")])
+
+
+def test_rescan_of_root_dataset_ignores_index_file(tmp_path):
+    # 扫描根目录本身就是数据集时，首次写入索引文件不应让下一次扫描报告修改
+    _make_lerobot(tmp_path / "lr", episodes=2)
+    DatasetInspector(str(tmp_path)).scan()
+
+    again = DatasetInspector(str(tmp_path))
+    again.scan()
+    assert again.get_all_valid_paths() == [str(tmp_path)]
+    assert again.changes["modified"] == []
+
+
+def _make_tree(root):
+    """多层目录下散落的 HDF5 / MCAP 文件，外加一个 LeRobot 数据集与一个无关目录"""
+    for i in range(3):
+        for j in range(4):
+            _write(root / f"site_{i}" / f"day_{j}" / f"episode_{j}.hdf5", b"h" * (10 + j))
+        _write(root / f"site_{i}" / "bags" / f"run_{i}.mcap", b"m" * 20)
+    _make_lerobot(root / "lerobot" / "lr", episodes=3)
+    _write(root / "docs" / "readme.txt", b"t")
+
+
+def _summary(inspector):
+    return inspector.report, dict(inspector.grouped_datasets), dict(inspector.stats)
+
+
+def test_parallel_scan_matches_serial_scan(tmp_path):
+    _make_tree(tmp_path)
+    serial = DatasetInspector(str(tmp_path), use_index=False, workers=1)
+    serial.scan()
+    assert len(serial.report) == 3 * 4 + 3 + 1
+    for kwargs in ({"workers": 8}, {"workers": 4, "use_processes": True}):
+        parallel = DatasetInspector(str(tmp_path), use_index=False, **kwargs)
+        parallel.scan()
+        assert _summary(parallel) == _summary(serial)
+        assert [r["path"] for r in parallel.report] == sorted(r["path"] for r in serial.report)
+
+
+def test_rescan_reuses_index_and_refreshes_only_touched_episode(tmp_path):
+    _make_tree(tmp_path)
+    progress = []
+    first = DatasetInspector(str(tmp_path), workers=4, progress_callback=lambda *args: progress.append(args))
+    first.scan()
+    assert first.dirs_reused == 0
+    # 进度回调: 已完成数逐次加一，最后一次等于目录总数
+    assert [done for done, _, _ in progress] == list(range(1, first.dirs_rescanned + 1))
+    assert progress[-1][0] == progress[-1][1] == first.dirs_rescanned
+    index_before = json.loads(first.index_path.read_text(encoding="utf-8"))
+
+    again = DatasetInspector(str(tmp_path), workers=4)
+    again.scan()
+    assert again.dirs_rescanned == 0 and again.dirs_reused == first.dirs_rescanned
+    assert again.changes == {"added": [], "removed": [], "modified": []}
+    assert _summary(again) == _summary(first)
+
+    # 原地改写一条轨迹：所在目录 mtime 不变，只有该记录被刷新
+    touched = tmp_path / "site_1" / "day_2" / "episode_2.hdf5"
+    _write(touched, b"h" * 99, mtime=3_000_000)
+    third = DatasetInspector(str(tmp_path), workers=4)
+    third.scan()
+    assert third.dirs_rescanned == 0
+    assert third.changes == {"added": [], "removed": [], "modified": [str(touched)]}
+    index_after = json.loads(third.index_path.read_text(encoding="utf-8"))
+    before = {r["path"]: r for e in index_before["dirs"].values() for r in e["records"]}
+    after = {r["path"]: r for e in index_after["dirs"].values() for r in e["records"]}
+    assert [p for p in after if after[p] != before[p]] == [str(touched)]
+    assert after[str(touched)]["size"] == 99
@@ -0,0 +1,163 @@
+# tests/test_lerobot_adapter.py
+import fractions
+import json
+import os
+import sys
+from pathlib import Path
+
+import av
+import cv2
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import src.adapters.lerobot_adapter as lerobot_adapter
+from src.adapters.lerobot_adapter import LeRobotAdapter
+
+N = 8
+
+
+def _jpeg(i: int) -> bytes:
+    ok, buf = cv2.imencode(".jpg", np.full((12, 16, 3), i * 20, np.uint8))
+    return buf.tobytes()
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    """v2.1 单轨迹：状态列、内嵌 JPEG 相机列，以及一个未映射的大字段"""
+    (tmp_path / "meta").mkdir()
+    (tmp_path / "meta" / "info.json").write_text(json.dumps({
+        "codebase_version": "v2.1", "fps": 10, "total_episodes": 1,
+        "features": {"observation.state": {"dtype": "float32", "shape": [3]},
+                     "observation.images.top": {"dtype": "image", "shape": [12, 16, 3]}},
+    }))
+    (tmp_path / "data" / "chunk-000").mkdir(parents=True)
+    state = np.arange(N * 3, dtype=np.float32).reshape(N, 3)
+    pq.write_table(pa.table({
+        "timestamp": np.arange(N) / 10.0, "episode_index": np.zeros(N, np.int64), "frame_index": np.arange(N),
+        "observation.state": pa.array(list(state), type=pa.list_(pa.float32(), 3)),
+        "action": pa.array([[float(i)] * 2 for i in range(N)], type=pa.list_(pa.float32())),
+        "observation.images.top": pa.array([_jpeg(i) for i in range(N)], type=pa.binary()),
+        "debug.blob": pa.array([b"x" * 4096] * N, type=pa.binary()),
+    }), str(tmp_path / "data" / "chunk-000" / "episode_000000.parquet"), row_group_size=3)
+    return tmp_path, state
+
+
+def test_state_columns_are_contiguous_row_slices(dataset):
+    root, state = dataset
+    reader = LeRobotAdapter()
+    assert reader.load(str(root))
+    qpos, action = reader.state_arrays["qpos"], reader.state_arrays["action"]
+    # 定长与等长变长 list 列都转换为连续的 (T, D) 数组
+    assert qpos.shape == (N, 3) and qpos.flags["C_CONTIGUOUS"]
+    assert action.shape == (N, 2) and action.flags["C_CONTIGUOUS"]
+    np.testing.assert_array_equal(qpos, state)
+    for i in (0, 5, N - 1):
+        frame = reader.get_frame(i)
+        np.testing.assert_array_equal(frame.state["qpos"], state[i])
+        np.testing.assert_array_equal(frame.state["action"], [float(i)] * 2)
+        assert frame.timestamp == pytest.approx(i / 10.0)
+        assert frame.images["top"].shape == (12, 16, 3)
+    assert {k: v.shape for k, v in reader.get_episode_states().items()} == {"qpos": (N, 3), "action": (N, 2)}
+    reader.close()
+
+
+def test_parquet_is_memory_mapped_and_projected(dataset, monkeypatch):
+    root, _ = dataset
+    opened, requested = [], []
+
+    class SpyParquetFile(pq.ParquetFile):
+        def __init__(self, source, *args, memory_map=False, **kwargs):
+            opened.append(memory_map)
+            super().__init__(source, *args, memory_map=memory_map, **kwargs)
+
+        def read(self, columns=None, **kwargs):
+            requested.append(columns)
+            return super().read(columns=columns, **kwargs)
+
+        def read_row_groups(self, row_groups, columns=None, **kwargs):
+            requested.append(columns)
+            return super().read_row_groups(row_groups, columns=columns, **kwargs)
+
+    monkeypatch.setattr(lerobot_adapter.pq, "ParquetFile", SpyParquetFile)
+    reader = LeRobotAdapter()
+    assert reader.load(str(root))
+    assert opened and all(opened)
+    # 只读索引列、映射的状态列与相机列，未映射的 debug.blob 不读取
+    assert requested and all(cols is not None and "debug.blob" not in cols for cols in requested)
+    assert set(requested[-1]) == {"timestamp", "episode_index", "frame_index", "observation.state", "action",
+                                  "observation.images.top"}
+    reader.close()
+
+
+CAMERAS = ("observation.images.top", "observation.images.wrist")
+VIDEO_TPL = "videos/chunk-{episode_chunk:03d}/{video_key}/episode_{episode_index:06d}.mp4"
+
+
+def _write_video(path, level):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with av.open(str(path), "w") as container:
+        stream = container.add_stream("libx264", rate=10)
+        stream.width, stream.height, stream.pix_fmt = 32, 32, "yuv420p"
+        stream.codec_context.time_base = fractions.Fraction(1, 10)
+        stream.options = {"g": "4", "bf": "0"}
+        for i in range(N):
+            frame = av.VideoFrame.from_ndarray(np.full((32, 32, 3), level + i * 10, np.uint8), format="rgb24")
+            frame.pts = i
+            for packet in stream.encode(frame):
+                container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+
+
+def _video_dataset(root, video_path_tpl):
+    """两条轨迹、两路视频相机的 v2.1 数据集"""
+    (root / "meta").mkdir(parents=True)
+    info = {"codebase_version": "v2.1", "fps": 10, "total_episodes": 2, "chunks_size": 1000,
+            "features": {cam: {"dtype": "video", "shape": [32, 32, 3]} for cam in CAMERAS}}
+    if video_path_tpl: info["video_path"] = video_path_tpl
+    (root / "meta" / "info.json").write_text(json.dumps(info))
+    for ep in range(2):
+        path = root / "data" / "chunk-000" / f"episode_{ep:06d}.parquet"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        pq.write_table(pa.table({"timestamp": np.arange(N) / 10.0, "episode_index": np.full(N, ep, np.int64),
+                                 "frame_index": np.arange(N)}), str(path))
+        for c, cam in enumerate(CAMERAS):
+            _write_video(root / VIDEO_TPL.format(episode_chunk=0, video_key=cam, episode_index=ep), 20 + 100 * c + ep * 5)
+    return root
+
+
+def _levels(reader, episode):
+    reader.set_episode(episode)
+    return [[int(round(reader.get_frame(i).images[cam].mean())) for cam in ("top", "wrist")] for i in range(N)]
+
+
+def _expected(episode):
+    return [[20 + ep_shift + i * 10 for ep_shift in (episode * 5, 100 + episode * 5)] for i in range(N)]
+
+
+@pytest.mark.parametrize("template, walks", [(VIDEO_TPL, 0), ("", 1)])
+def test_video_paths_resolved_once(tmp_path, monkeypatch, template, walks):
+    root = _video_dataset(tmp_path / "ds", template)
+    reader = LeRobotAdapter()
+    assert reader.load(str(root))
+
+    calls = []
+    real_walk = os.walk
+    def counting_walk(*args, **kwargs):
+        calls.append(args[0])
+        return real_walk(*args, **kwargs)
+    def no_rglob(*args, **kwargs): raise AssertionError("逐帧读取不应递归遍历目录")
+    monkeypatch.setattr(lerobot_adapter.os, "walk", counting_walk)
+    monkeypatch.setattr(Path, "rglob", no_rglob)
+
+    # 模板能直接拼出路径时不遍历目录；无模板时整个数据集只遍历一次，两条轨迹、两路相机共用
+    for ep in (0, 1, 0):
+        levels = _levels(reader, ep)
+        assert np.allclose(levels, _expected(ep), atol=3)
+    assert len(calls) == walks
+    assert sorted(reader.video_files) == [(cam, 0) for cam in CAMERAS]
+    reader.close()
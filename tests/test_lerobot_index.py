@@ -0,0 +1,51 @@
+# tests/test_lerobot_index.py
+import os
+import sys
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import src.adapters.lerobot_adapter as lerobot_adapter
+from src.adapters.lerobot_adapter import LeRobotAdapter
+
+# 三条轨迹，长度 4 / 6 / 5
+EPISODES = np.repeat([7, 8, 9], [4, 6, 5])
+EXPECTED = [(7, (0, 4)), (8, (4, 10)), (9, (10, 15))]
+
+
+def _write(path, row_group_size):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    table = pa.table({"episode_index": EPISODES, "frame_index": np.arange(len(EPISODES)),
+                      "timestamp": np.arange(len(EPISODES)) / 30.0})
+    pq.write_table(table, str(path), row_group_size=row_group_size)
+    return path
+
+
+def _split(path):
+    entries = LeRobotAdapter()._index_from_parquet(path.parent, path, {})
+    return [(e.get("episode_index"), e.get("row_range")) for e in entries]
+
+
+@pytest.mark.parametrize("row_group_size", [2, 5, 100])
+def test_multi_episode_file_split(tmp_path, row_group_size):
+    # row group 与轨迹边界对齐 (2) 时只用统计信息，跨越边界 (5, 100) 时回退读取列，结果一致
+    path = _write(tmp_path / "data" / "file-000.parquet", row_group_size)
+    assert _split(path) == EXPECTED
+
+
+def test_aligned_row_groups_do_not_read_column(tmp_path, monkeypatch):
+    path = _write(tmp_path / "data" / "file-000.parquet", 2)
+    def fail(*args, **kwargs): raise AssertionError("不应读取 episode_index 列")
+    monkeypatch.setattr(pq.ParquetFile, "read", fail)
+    assert _split(path) == EXPECTED
+
+
+def test_v2_episode_files_are_not_opened(tmp_path, monkeypatch):
+    path = _write(tmp_path / "data" / "chunk-000" / "episode_000003.parquet", 100)
+    def fail(*args, **kwargs): raise AssertionError("v2 单轨迹文件在 load 阶段不应被打开")
+    monkeypatch.setattr(lerobot_adapter.pq, "ParquetFile", fail)
+    assert _split(path) == [(None, None)]
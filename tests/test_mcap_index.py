@@ -0,0 +1,103 @@
+# tests/test_mcap_index.py
+import os
+import sys
+
+import pytest
+from mcap.writer import Writer
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.mcap_index import McapChunkIndex
+
+N = 50
+
+
+def _write(path, use_chunking=True):
+    with open(path, "wb") as f:
+        writer = Writer(f, chunk_size=512, use_chunking=use_chunking)
+        writer.start()
+        schema = writer.register_schema("test/Blob", "raw", b"")
+        channels = {topic: writer.register_channel(topic, "raw", schema) for topic in ("/cam", "/state")}
+        for i in range(N):
+            for topic, channel in channels.items():
+                # log_time 与写入顺序不完全一致，检验索引按 log_time 排序
+                log_time = 1000 + i * 10 + (5 if topic == "/state" else 0) - (3 if i % 7 == 0 else 0)
+                writer.add_message(channel, log_time=log_time, publish_time=log_time,
+                                   data=f"{topic}:{i};".encode() * 8)
+        writer.finish()
+
+
+def _seq(data: bytes) -> int:
+    return int(data.split(b";")[0].split(b":")[1])
+
+
+@pytest.fixture
+def index(tmp_path):
+    _write(tmp_path / "a.mcap")
+    idx = McapChunkIndex(tmp_path / "a.mcap", cache_size=2)
+    assert idx.open()
+    yield idx
+    idx.close()
+
+
+def test_summary(index):
+    assert len(index.chunk_indexes) > 2
+    assert index.topics() == {"/cam": "test/Blob", "/state": "test/Blob"}
+    assert set(index.channel_ids(["/cam"]).values()) == {"/cam"}
+
+
+def test_message_index_points_at_messages(index):
+    entries = index.build_message_index(["/cam"])
+    assert list(entries) == ["/cam"]
+    cam = entries["/cam"]
+    assert len(cam) == N
+    assert [e[0] for e in cam] == sorted(e[0] for e in cam)
+    for log_time, chunk_idx, offset in cam:
+        message = index.read_message(chunk_idx, offset)
+        assert message.log_time == log_time
+        assert index.channels[message.channel_id].topic == "/cam"
+    assert sorted(_seq(index.read_message(c, o).data) for _, c, o in cam) == list(range(N))
+
+
+def test_read_message_rejects_bad_offset(index):
+    _, chunk_idx, offset = index.build_message_index(["/cam"])["/cam"][0]
+    with pytest.raises(Exception):
+        index.read_message(chunk_idx, offset + 1)
+
+
+def test_iter_messages_filters_topics_in_file_order(index):
+    messages = list(index.iter_messages(["/state"]))
+    assert len(messages) == N
+    assert {topic for topic, *_ in messages} == {"/state"}
+    assert [_seq(m.data) for *_, m in messages] == list(range(N))
+    assert len(list(index.iter_messages())) == 2 * N
+
+
+def test_chunk_cache_is_bounded(index):
+    for _, chunk_idx, offset in index.build_message_index(["/cam"])["/cam"]:
+        index.read_message(chunk_idx, offset)
+    assert len(index._chunk_cache) <= 2
+    assert index.cache_misses >= len(index.chunk_indexes)
+    assert index.cache_hits > 0
+    assert 0 < index.nbytes
+
+
+def test_unchunked_file_is_not_indexed(tmp_path):
+    _write(tmp_path / "flat.mcap", use_chunking=False)
+    idx = McapChunkIndex(tmp_path / "flat.mcap")
+    assert not idx.open()
+    assert idx._file is None
+
+
+@pytest.mark.parametrize("content", [b"not an mcap file", "truncated"])
+def test_unreadable_summary_closes_file(tmp_path, content):
+    path = tmp_path / "bad.mcap"
+    if content == "truncated":
+        _write(path)
+        data = path.read_bytes()
+        path.write_bytes(data[: len(data) // 2])
+    else:
+        path.write_bytes(content)
+    idx = McapChunkIndex(path)
+    assert not idx.open()
+    assert idx._file is None
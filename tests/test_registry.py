@@ -0,0 +1,53 @@
+# tests/test_registry.py
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.registry import AdapterRegistry
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+ADAPTER_MODULES = ["src.adapters.hdf5_adapter", "src.adapters.ros_adapter", "src.adapters.lerobot_adapter",
+                   "src.adapters.unitree_adapter", "src.adapters.folder_adapter", "src.adapters.dasmcap_adapter"]
+HEAVY_MODULES = ["h5py", "mcap", "cv2", "av", "pandas", "pyarrow", "rosbags"]
+
+
+def _run(code: str):
+    """在全新解释器中执行，sys.modules 不受本进程已导入模块的影响"""
+    subprocess.run([sys.executable, "-c", textwrap.dedent(code)], cwd=ROOT, check=True)
+
+
+@pytest.mark.parametrize("module", ["src.core.factory", "src.core.inspector"])
+def test_import_does_not_load_adapters_or_heavy_deps(module):
+    _run(f"""
+        import sys
+        import {module}
+        from src.core.registry import AdapterRegistry
+        loaded = [m for m in {ADAPTER_MODULES + HEAVY_MODULES!r} if m in sys.modules]
+        assert not loaded, loaded
+        assert AdapterRegistry.names() == {sorted(["HDF5", "ROS", "LeRobot", "Unitree", "RawFolder", "DASMCAP"])!r}
+    """)
+
+
+def test_get_class_imports_only_the_requested_adapter():
+    _run(f"""
+        import sys
+        import src.core.factory
+        from src.core.registry import AdapterRegistry
+        cls = AdapterRegistry.get_class("HDF5")
+        assert cls.__name__ == "HDF5Adapter" and cls.__module__ == "src.adapters.hdf5_adapter"
+        assert "src.adapters.hdf5_adapter" in sys.modules
+        others = [m for m in {ADAPTER_MODULES[1:]!r} if m in sys.modules]
+        assert not others, others
+        # 第二次直接命中已注册的类
+        assert AdapterRegistry.get_class("HDF5") is cls
+    """)
+
+
+def test_unknown_adapter_raises():
+    with pytest.raises(ValueError):
+        AdapterRegistry.get_class("NoSuchFormat")
@@ -0,0 +1,42 @@
+# tests/test_rerun_visualizer.py
+import os
+import sys
+
+import numpy as np
+import rerun as rr
+import rerun.dataframe as rdf
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.ui.rerun_visualizer import RerunVisualizer
+
+
+def _record(tmp_path, log):
+    path = str(tmp_path / "out.rrd")
+    rec = rr.RecordingStream("test_viz")
+    rec.save(path)
+    viz = RerunVisualizer(recording=rec)
+    log(viz)
+    rec.flush()
+    rec.disconnect()
+    return rdf.load_recording(path).view(index="frame_idx", contents="/**").select().read_all()
+
+
+def test_log_states_truncates_mismatched_lengths(tmp_path):
+    T = 10
+    states = {
+        "qpos": np.arange((T + 1) * 2, dtype=np.float64).reshape(T + 1, 2),   # 比帧数多一行
+        "action": np.ones((T - 3, 1)),                                          # 比帧数少三行
+    }
+    table = _record(tmp_path, lambda viz: viz.log_states(states, np.arange(T) * 0.1))
+    qpos = table["/world/robot/qpos/j1:Scalars:scalars"].to_pylist()
+    assert [v[0] for v in qpos] == list(states["qpos"][:T, 1])
+    action = [v for v in table["/world/robot/action/j0:Scalars:scalars"].to_pylist() if v is not None]
+    assert len(action) == T - 3
+
+
+def test_log_states_uses_frame_index_offset(tmp_path):
+    T = 5
+    table = _record(tmp_path, lambda viz: viz.log_states({"qpos": np.zeros((T, 1))}, np.arange(T) * 0.1,
+                                                            frame_indices=np.arange(100, 100 + T)))
+    assert table["frame_idx"].to_pylist() == list(range(100, 100 + T))
@@ -0,0 +1,52 @@
+# tests/test_reviewer_prefetch.py
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# pynput 需要图形环境，无显示器时跳过
+pytest.importorskip("pynput.keyboard")
+from src.core.reviewer import DatasetReviewer
+
+
+class FakeReader:
+    closed = False
+    def close(self): self.closed = True
+
+
+def test_stop_prefetch_does_not_wait_for_running_task(monkeypatch):
+    reviewer = DatasetReviewer(visualizer=None)
+    reviewer.dataset_paths = ["a", "b"]
+    reviewer.episode_counts = {0: 1, 1: 1}
+    reader = FakeReader()
+    started, release = threading.Event(), threading.Event()
+
+    def get_reader(path, d_idx):
+        reviewer._prefetch_readers[path] = reader
+        return reader
+
+    def build_snapshot(reader, path, ep_idx):
+        started.set()
+        release.wait(5)
+        return {"error": "cancelled"}
+
+    monkeypatch.setattr(reviewer, "_get_prefetch_reader", get_reader)
+    monkeypatch.setattr(DatasetReviewer, "_build_snapshot", staticmethod(build_snapshot))
+
+    reviewer._schedule_prefetch()
+    assert started.wait(2)
+    executor = reviewer._prefetch_executor
+
+    t0 = time.perf_counter()
+    reviewer._stop_prefetch()
+    assert time.perf_counter() - t0 < 0.5
+    # 正在读取的后台读取器不由前台线程关闭
+    assert not reader.closed
+
+    release.set()
+    executor.shutdown(wait=True)
+    assert reader.closed and not reviewer._prefetch_readers
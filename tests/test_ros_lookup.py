@@ -0,0 +1,44 @@
+# tests/test_ros_lookup.py
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.adapters.ros_adapter import RosAdapter
+from src.core.interface import AdapterConfig
+
+MS = 10**6
+
+
+def _adapter(policy: str) -> RosAdapter:
+    reader = RosAdapter(AdapterConfig(extra_options={"match_policy": policy, "match_window_ms": 50}))
+    times = [100 * MS, 130 * MS, 160 * MS, 400 * MS]
+    reader.mcap_messages = [{"topic": "/cam", "log_time": t, "id": i} for i, t in enumerate(times)]
+    reader._build_time_index()
+    return reader
+
+
+def _ids(reader, target_ms):
+    return [m["id"] for m in reader._lookup_messages("/cam", target_ms * MS)]
+
+
+def test_nearest_returns_closest_message():
+    reader = _adapter("nearest")
+    assert _ids(reader, 125) == [1]
+    assert _ids(reader, 300) == []
+
+
+@pytest.mark.parametrize("policy", ["latest", "window"])
+def test_latest_returns_single_newest_message_in_window(policy):
+    reader = _adapter(policy)
+    assert reader.match_policy == "latest"
+    # 窗口 (75, 175) 内有 100/130/160 三条，只返回最晚的一条
+    assert _ids(reader, 125) == [2]
+    assert _ids(reader, 300) == []
+
+
+def test_unknown_policy_falls_back_to_nearest():
+    assert _adapter("all").match_policy == "nearest"
@@ -0,0 +1,120 @@
+# tests/test_rrd_exporter.py
+import json
+import os
+import sys
+from pathlib import Path
+
+import cv2
+import h5py
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.ui import rrd_exporter
+from src.ui.rrd_exporter import ExportOptions, ExportTask, _output_names, export_task, plan_tasks
+
+rr_dataframe = pytest.importorskip("rerun.dataframe")
+
+
+@pytest.fixture(autouse=True)
+def worker_readers():
+    # export_task 在模块级缓存读取器，测试之间不共享
+    yield
+    for reader in rrd_exporter._worker_readers.values():
+        reader.close()
+    rrd_exporter._worker_readers.clear()
+
+
+def _folder_dataset(root: Path, frames=3) -> Path:
+    """单轨迹图片文件夹: root/0000_front.jpg ..."""
+    root.mkdir(parents=True)
+    for i in range(frames):
+        cv2.imwrite(str(root / f"{i:04d}_front.jpg"), np.full((16, 20, 3), 40 * i, np.uint8))
+    return root
+
+
+def _hdf5_episode(path: Path, frames=4) -> Path:
+    with h5py.File(path, "w") as f:
+        f.create_dataset("observations/images/front", data=np.random.randint(0, 255, (frames, 8, 10, 3), np.uint8))
+        f.create_dataset("observations/qpos", data=np.arange(frames * 2, dtype=np.float32).reshape(frames, 2))
+    return path
+
+
+def _hdf5_dataset(root: Path, episodes=2, frames=4) -> Path:
+    """多轨迹 HDF5 目录: root/episode_k.hdf5"""
+    root.mkdir(parents=True)
+    for ep in range(episodes):
+        _hdf5_episode(root / f"episode_{ep}.hdf5", frames)
+    return root
+
+
+def test_output_names_keep_distinct_parents(tmp_path):
+    a, b = tmp_path / "a" / "data", tmp_path / "b" / "data"
+    f = tmp_path / "c" / "episode.hdf5"
+    for d in (a, b, f.parent): d.mkdir(parents=True)
+    f.touch()
+    names = _output_names([str(a), str(b), str(f)])
+    assert names == {str(a): Path("a/data"), str(b): Path("b/data"), str(f): Path("c/episode")}
+
+
+def test_plan_tasks_per_episode_and_dataset(tmp_path):
+    ds = _hdf5_dataset(tmp_path / "src" / "h5_ds")
+    out = tmp_path / "out"
+    tasks = plan_tasks([str(ds), str(ds)], str(out), "episode", ExportOptions())
+    # 重复路径只规划一次
+    assert [(t.output_path, t.episode_idx) for t in tasks] == [
+        (str(out / "h5_ds" / "episode_000000.rrd"), 0),
+        (str(out / "h5_ds" / "episode_000001.rrd"), 1),
+    ]
+    tasks = plan_tasks([str(ds)], str(out), "dataset", ExportOptions())
+    assert [(t.output_path, t.episode_idx) for t in tasks] == [(str(out / "h5_ds.rrd"), None)]
+
+
+def test_plan_tasks_skips_unrecognised_dataset(tmp_path):
+    ds = _folder_dataset(tmp_path / "ds")
+    junk = tmp_path / "junk"
+    junk.mkdir()
+    (junk / "notes.txt").write_text("x")
+    tasks = plan_tasks([str(junk), str(ds)], str(tmp_path / "out"), "episode", ExportOptions())
+    assert [t.dataset_path for t in tasks] == [str(ds)]
+
+
+def test_plan_tasks_skips_dataset_whose_load_raises(tmp_path):
+    # LeRobot 结构但 parquet 已损坏：load() 抛异常，不应中断后面的数据集
+    bad = tmp_path / "bad_lr"
+    (bad / "meta").mkdir(parents=True)
+    (bad / "meta" / "info.json").write_text(json.dumps({"fps": 30, "features": {}}))
+    (bad / "data" / "chunk-000").mkdir(parents=True)
+    (bad / "data" / "chunk-000" / "episode_000000.parquet").write_bytes(b"PAR1")
+    h5 = _hdf5_episode(tmp_path / "good.hdf5")
+    tasks = plan_tasks([str(bad), str(h5)], str(tmp_path / "out"), "dataset", ExportOptions())
+    assert [t.dataset_path for t in tasks] == [str(h5)]
+
+
+def test_plan_tasks_rejects_output_conflict(tmp_path):
+    # 目录 x 与文件 x.hdf5 在 per=dataset 下都会写入 x.rrd
+    ds = _folder_dataset(tmp_path / "x")
+    h5 = _hdf5_episode(tmp_path / "x.hdf5")
+    with pytest.raises(ValueError):
+        plan_tasks([str(ds), str(h5)], str(tmp_path / "out"), "dataset", ExportOptions())
+
+
+@pytest.mark.parametrize("encoding", ["passthrough", "raw"])
+def test_export_task_writes_readable_recording(tmp_path, encoding):
+    ds = _hdf5_dataset(tmp_path / "ds", episodes=2, frames=4)
+    options = ExportOptions(image_encoding=encoding)
+
+    out = str(tmp_path / "ep1.rrd")
+    assert export_task(ExportTask(str(ds), out, 1), options) == (out, 4)
+    out_all = str(tmp_path / "all.rrd")
+    # 整数据集模式下两条轨迹首尾相接
+    assert export_task(ExportTask(str(ds), out_all), options) == (out_all, 8)
+
+    recording = rr_dataframe.load_recording(out_all)
+    view = recording.view(index="frame_idx", contents="/**")
+    table = view.select().read_all()
+    assert sorted(table.column("frame_idx").to_pylist()) == list(range(8))
+    entities = {c.entity_path for c in recording.schema().component_columns()}
+    assert any("front" in e for e in entities)
+    assert "/world/episode" in entities
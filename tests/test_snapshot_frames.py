@@ -0,0 +1,132 @@
+# tests/test_snapshot_frames.py
+import os
+import sys
+
+import cv2
+import h5py
+import numpy as np
+import pytest
+from mcap.writer import Writer
+from rosbags.typesys import Stores, get_typestore
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.adapters.hdf5_adapter import HDF5Adapter
+from src.adapters.ros_adapter import RosAdapter
+from src.core.interface import AdapterConfig, BaseDatasetReader, FrameData
+
+N = 10
+
+
+class TwoCameraReader(BaseDatasetReader):
+    """cam_head 在所有帧上都没有图像，用于检验快照的相机回退"""
+    def __init__(self):
+        super().__init__()
+        self.current_episode_idx = 0
+    def load(self, file_path): return True
+    def get_length(self): return N
+    def get_all_sensors(self): return ["cam_wrist", "cam_head"]
+    def get_frame(self, index, specific_cameras=None):
+        cams = [c for c in (specific_cameras or self.get_all_sensors()) if c != "cam_head"]
+        return FrameData(timestamp=index / 10, images={c: np.full((2, 2, 3), index, np.uint8) for c in cams})
+    def get_total_episodes(self): return 2
+    def set_episode(self, episode_idx): self.current_episode_idx = episode_idx
+    def close(self): pass
+    def get_current_episode_path(self): return f"ep{self.current_episode_idx}"
+
+
+def test_base_falls_back_to_camera_with_images():
+    snap = TwoCameraReader().get_snapshot_frames((0.0, 0.5, 1.0))
+    assert snap.camera == "cam_wrist"
+    assert snap.batch.indices == [0, 5, 9]
+    assert snap.batch.has_images("cam_wrist")
+
+
+def test_base_out_of_range_episode_is_empty():
+    reader = TwoCameraReader()
+    snap = reader.get_snapshot_frames((0.0, 1.0), episode_idx=5)
+    assert snap.camera is None and len(snap.batch) == 0 and snap.length == 0
+    assert reader.current_episode_idx == 0
+
+
+def _write_h5(path, head_rows):
+    with h5py.File(path, "w") as f:
+        f.create_dataset("observations/qpos", data=np.zeros((N, 2), np.float32))
+        f.create_dataset("observations/images/cam_head", data=np.ones((head_rows, 4, 4, 3), np.uint8))
+        f.create_dataset("observations/images/cam_wrist", data=np.arange(N, dtype=np.uint8)[:, None, None, None] * np.ones((N, 4, 4, 3), np.uint8))
+
+
+def test_hdf5_snapshot_other_episode(tmp_path):
+    _write_h5(tmp_path / "episode_0.hdf5", N)
+    _write_h5(tmp_path / "episode_1.hdf5", 0)
+    reader = HDF5Adapter()
+    assert reader.load(str(tmp_path))
+
+    # 越界轨迹与其他适配器一致返回空快照，不抛异常
+    assert len(reader.get_snapshot_frames((0.0,), episode_idx=7).batch) == 0
+
+    # episode_1 的主视角 cam_head 没有数据，回退到 cam_wrist
+    snap = reader.get_snapshot_frames((0.0, 0.5, 1.0), episode_idx=1)
+    assert snap.camera == "cam_wrist" and snap.length == N
+    np.testing.assert_array_equal(snap.batch.images["cam_wrist"][:, 0, 0, 0], [0, 5, 9])
+    assert reader.current_episode_idx == 0
+    reader.close()
+
+
+def _write_mcap(path, broken_camera=None):
+    typestore = get_typestore(Stores.ROS2_HUMBLE)
+    msg_type = "sensor_msgs/msg/CompressedImage"
+    CompressedImage = typestore.types[msg_type]
+    Header, Time = typestore.types["std_msgs/msg/Header"], typestore.types["builtin_interfaces/msg/Time"]
+    with open(path, "wb") as f:
+        writer = Writer(f, chunk_size=4096)
+        writer.start()
+        schema = writer.register_schema(msg_type, "ros2msg", b"")
+        channels = {name: writer.register_channel(f"/{name}/image", "cdr", schema) for name in ("cam_a", "cam_b")}
+        for i in range(N):
+            for name, channel in channels.items():
+                ok, buf = cv2.imencode(".png", np.full((4, 4, 3), i * 10, np.uint8))
+                data = b"broken" if name == broken_camera else buf.tobytes()
+                msg = CompressedImage(header=Header(stamp=Time(sec=0, nanosec=0), frame_id=""), format="png",
+                                      data=np.frombuffer(data, np.uint8))
+                log_time = 1_000_000_000 + i * 33_000_000
+                # publish_time 与 log_time 不同，检验各条读取路径使用同一时间轴
+                writer.add_message(channel, log_time=log_time, publish_time=log_time - 5_000_000,
+                                   data=typestore.serialize_cdr(msg, msg_type))
+        writer.finish()
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_ros_fast_path_matches_full_read(tmp_path, lazy):
+    _write_mcap(tmp_path / "a.mcap")
+    _write_mcap(tmp_path / "b.mcap", broken_camera="cam_a")
+    reader = RosAdapter(AdapterConfig(extra_options={"lazy_mcap": lazy}))
+    assert reader.load(str(tmp_path))
+
+    snap = reader.get_snapshot_frames((0.0, 0.5, 1.0), episode_idx=1)
+    assert reader.current_episode_idx == 0
+    assert snap.camera == "cam_b/image"
+
+    reader.set_episode(1)
+    full = reader.get_frames(snap.batch.indices, [snap.camera])
+    assert snap.length == reader.get_length()
+    np.testing.assert_allclose(snap.batch.timestamps, full.timestamps)
+    np.testing.assert_array_equal(snap.batch.images[snap.camera], full.images[snap.camera])
+    reader.close()
+
+
+@pytest.mark.parametrize("episode_idx", [0, 1])
+def test_ros_snapshot_keeps_encoded_images(tmp_path, episode_idx):
+    _write_mcap(tmp_path / "a.mcap")
+    _write_mcap(tmp_path / "b.mcap")
+    reader = RosAdapter()
+    reader.keep_encoded_images = True
+    assert reader.load(str(tmp_path))
+
+    snap = reader.get_snapshot_frames((0.0, 1.0), episode_idx=episode_idx)
+    assert snap.camera not in snap.batch.images
+    for pos, i in enumerate(snap.batch.indices):
+        img, data = snap.batch.image_at(snap.camera, pos)
+        assert img is None and data[:8] == b"\x89PNG\r\n\x1a\n"
+        np.testing.assert_array_equal(cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR), np.full((4, 4, 3), i * 10, np.uint8))
+    reader.close()
@@ -0,0 +1,53 @@
+# tests/test_video_reader.py
+import fractions
+import os
+import sys
+
+import av
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.adapters.lerobot_adapter import SequentialVideoReader
+
+FPS = 10
+N = 20
+
+
+def _write_video(path):
+    with av.open(str(path), "w") as container:
+        stream = container.add_stream("libx264", rate=FPS)
+        stream.width, stream.height, stream.pix_fmt = 32, 32, "yuv420p"
+        stream.codec_context.time_base = fractions.Fraction(1, FPS)
+        stream.options = {"g": "5", "bf": "0"}
+        for i in range(N):
+            frame = av.VideoFrame.from_ndarray(np.full((32, 32, 3), i * 12, np.uint8), format="rgb24")
+            frame.pts = i
+            for packet in stream.encode(frame):
+                container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+
+
+def _level(img):
+    return int(round(img.mean() / 12))
+
+
+def test_sequential_and_random_access(tmp_path):
+    _write_video(tmp_path / "v.mp4")
+    reader = SequentialVideoReader(tmp_path / "v.mp4", fps=FPS)
+    assert [_level(reader.get(i / FPS)) for i in range(N)] == list(range(N))
+    assert [_level(reader.get(i / FPS)) for i in (15, 3, 19, 0)] == [15, 3, 19, 0]
+    reader.close()
+
+
+def test_miss_past_end_is_not_cached(tmp_path):
+    _write_video(tmp_path / "v.mp4")
+    reader = SequentialVideoReader(tmp_path / "v.mp4", fps=FPS)
+    last = (N - 1) / FPS
+    assert reader.get(last + 5.0) is None
+    # 越界之后请求最后一帧仍能正常返回，而不是命中上一次的 None
+    assert _level(reader.get(last)) == N - 1
+    assert reader.get(last + 5.0) is None
+    assert _level(reader.get(last, scale=2)) == N - 1
+    reader.close()